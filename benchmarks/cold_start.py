@@ -0,0 +1,117 @@
+"""Measure cold-start cost: importing the app, loading agents and building a provider.
+
+Each sample runs in a fresh interpreter so nothing is cached in ``sys.modules``.
+Reports the median wall time per phase and the slowest modules by cumulative
+import time (from ``python -X importtime``), and exits non-zero when importing
+the app exceeds ``--budget-ms``:
+
+    python -m benchmarks.cold_start --runs 5 --budget-ms 800
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict
+
+# Runs in the child interpreter; prints one JSON line of phase timings.
+_PHASES = """
+import json, time
+started = time.perf_counter()
+import src.app
+imported = time.perf_counter()
+from src.core.agent import AGENT_ENTRY_POINTS, preload_agents
+agents = preload_agents(list(AGENT_ENTRY_POINTS))
+loaded = time.perf_counter()
+from src.api.routes import get_vertex_provider
+get_vertex_provider()
+built = time.perf_counter()
+print(json.dumps({
+    "import_app_ms": (imported - started) * 1000,
+    "load_agents_ms": (loaded - imported) * 1000,
+    "build_provider_ms": (built - loaded) * 1000,
+    "agents_ms": {key: seconds * 1000 for key, seconds in agents.items()},
+}))
+"""
+
+# Building a provider needs configuration but no network or credentials.
+_ENV = {
+    "VERTEX_MODEL": "cold-start-model",
+    "GCP_PROJECT": "cold-start-project",
+    "GCP_REGION": "us-central1",
+    "VERTEX_ACCESS_TOKEN": "local",
+    "VERTEX_BASE_URL": "http://127.0.0.1:9",
+}
+
+
+def _child_env() -> Dict[str, str]:
+    return {**os.environ, **{k: os.environ.get(k) or v for k, v in _ENV.items()}}
+
+
+def measure_phases() -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-c", _PHASES],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=_child_env(),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(module: str, top: int) -> Dict[str, float]:
+    """Modules with the largest cumulative import time, in milliseconds."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=_child_env(),
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((name.strip(), int(cumulative) / 1000))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return {name: round(ms, 1) for name, ms in rows[:top]}
+
+
+def run(runs: int, top: int) -> Dict[str, Any]:
+    samples = [measure_phases() for _ in range(runs)]
+    report: Dict[str, Any] = {
+        phase: round(statistics.median(sample[phase] for sample in samples), 1)
+        for phase in ("import_app_ms", "load_agents_ms", "build_provider_ms")
+    }
+    report["agents_ms"] = {
+        key: round(statistics.median(sample["agents_ms"][key] for sample in samples), 1)
+        for key in samples[0]["agents_ms"]
+    }
+    report["slowest_imports"] = slowest_imports("src.app", top)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=0.0,
+        help="fail when the median app import time exceeds this (0 disables)",
+    )
+    args = parser.parse_args()
+
+    report = run(args.runs, args.top)
+    report["budget_ms"] = args.budget_ms or None
+    print(json.dumps(report, indent=2))
+    if args.budget_ms and report["import_app_ms"] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
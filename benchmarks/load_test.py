@@ -0,0 +1,395 @@
+"""Load test the survey endpoint under a real ASGI server with a stub provider.
+
+Starts ``uvicorn benchmarks.stub_app:app`` in a subprocess, drives complete
+survey conversations at a fixed concurrency, and reports throughput,
+per-turn-type latency percentiles and the server's CPU and RSS. Results are
+written as JSON (tagged with the git commit) so runs can be compared.
+
+Run from the repository root (needs uvicorn and httpx):
+
+    python -m benchmarks.load_test --conversations 500 --concurrency 50 \
+        --latency lognormal:400:0.5 --output load.json
+    python -m benchmarks.load_test --baseline load.json
+
+With ``--vertex-standin`` the unpatched ``src.app:app`` is served instead and
+talks to a local Vertex stand-in (``benchmarks.vertex_standin``) over HTTP,
+so the real SDK client, retries and streaming are exercised.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from benchmarks.vertex_standin import FaultConfig, VertexStandIn
+from src.agents.survey_agent.catalog import get_catalog
+
+SURVEY_PATH = os.getenv("AGENT_SURVEY_PATH") or os.getenv("SURVEY_PATH") or "/survey"
+CANNED_ANSWERS = {
+    "q1": "The goal is to gather onboarding feedback.",
+    "q2": "New hires in engineering.",
+    "q3": "Next Monday.",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _process_usage(pid: int) -> Dict[str, Optional[float]]:
+    """CPU seconds and current RSS of ``pid`` from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as handle:
+            fields = handle.read().rsplit(")", 1)[1].split()
+        with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+            status = dict(
+                line.split(":", 1) for line in handle.read().splitlines() if ":" in line
+            )
+    except OSError:
+        return {"cpu_seconds": None, "rss_mb": None, "peak_rss_mb": None}
+    ticks = os.sysconf("SC_CLK_TCK")
+    return {
+        # utime and stime are fields 14 and 15 of /proc/<pid>/stat.
+        "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+        "rss_mb": int(status["VmRSS"].split()[0]) / 1024,
+        "peak_rss_mb": int(status["VmHWM"].split()[0]) / 1024,
+    }
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+def _payload(
+    conversation: int, turn: int, content: str, state: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {
+        "source": "msteams",
+        "event_type": "message_mentioned",
+        "team": {"id": "TEAM_ID", "channel_id": f"CHANNEL_{conversation % 16}"},
+        "message": {
+            "id": f"MESSAGE_{conversation}_{turn}",
+            "content_type": "html",
+            "content": content,
+            "created_at": "2026-02-19T10:15:30Z",
+            "reply_to_id": None,
+        },
+        "sender": {"id": f"USER_{conversation}", "display_name": "Load Test"},
+        "mentions": [],
+        "correlation_id": f"LOAD_{conversation}_{turn}",
+    }
+    if state is not None:
+        payload["survey_state"] = state
+    return payload
+
+
+async def run_conversation(
+    client: httpx.AsyncClient,
+    conversation: int,
+    samples: Dict[str, List[float]],
+    turns: List[int],
+    opening: str,
+) -> int:
+    """Walk one survey to completion; return 1 if it failed, else 0."""
+    state = None
+    content = opening
+    for turn in range(len(get_catalog()) + 1):
+        turn_type = "start" if state is None else "answer"
+        started = time.perf_counter()
+        response = await client.post(
+            SURVEY_PATH, json=_payload(conversation, turn, content, state)
+        )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        body = response.json() if response.status_code in (200, 429) else {}
+        if not body.get("ok"):
+            samples.setdefault("error", []).append(elapsed_ms)
+            return 1
+        result = body["result"]
+        if result["status"] == "completed":
+            samples.setdefault("complete", []).append(elapsed_ms)
+            turns.append(turn + 1)
+            return 0
+        samples.setdefault(turn_type, []).append(elapsed_ms)
+        state = result["survey_state"]
+        question_id = state["current_question_id"]
+        content = CANNED_ANSWERS.get(question_id, f"Answer for {question_id}.")
+    return 1
+
+
+async def drive(
+    base_url: str, conversations: int, concurrency: int, opening: str
+) -> Dict[str, Any]:
+    samples: Dict[str, List[float]] = {}
+    turns: List[int] = []
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for conversation in range(conversations):
+        queue.put_nowait(conversation)
+    failures = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal failures
+        while not queue.empty():
+            failures += await run_conversation(
+                client, queue.get_nowait(), samples, turns, opening
+            )
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=120.0
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    requests = sum(len(values) for values in samples.values())
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": requests,
+        "failed_conversations": failures,
+        "requests_per_second": round(requests / elapsed, 2),
+        "completed_surveys": len(turns),
+        "turns_per_survey": round(sum(turns) / len(turns), 2) if turns else None,
+        "turns": {
+            turn_type: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50), 2),
+                "p95_ms": round(percentile(values, 95), 2),
+                "p99_ms": round(percentile(values, 99), 2),
+            }
+            for turn_type, values in sorted(samples.items())
+        },
+    }
+
+
+def _model_calls(base_url: str) -> int:
+    """Model calls the server made, from its provider call histogram."""
+    text = httpx.get(f"{base_url}/metrics", timeout=5.0).text
+    return sum(
+        int(float(line.rsplit(" ", 1)[1]))
+        for line in text.splitlines()
+        if line.startswith("survey_provider_call_duration_seconds_count")
+    )
+
+
+def _wait_for_server(base_url: str, server: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Server exited during startup.")
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("Server did not become ready in time.")
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    port = args.port or _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "BENCH_LATENCY": args.latency,
+        "BENCH_ERROR_RATE": str(args.error_rate),
+        "BENCH_SEED": str(args.seed),
+    }
+    if args.extraction:
+        env["EXTRACTION_ENABLED"] = "true"
+    app = "benchmarks.stub_app:app"
+    standin = None
+    if args.vertex_standin:
+        standin = VertexStandIn(
+            FaultConfig(
+                latency=args.latency,
+                error_rate=args.error_rate,
+                malformed_rate=args.malformed_rate,
+                fenced_rate=args.fenced_rate,
+                seed=args.seed,
+            )
+        ).start()
+        app = "src.app:app"
+        env.update(
+            {
+                "VERTEX_BASE_URL": standin.url,
+                "VERTEX_ACCESS_TOKEN": "local",
+                "VERTEX_MODEL": "stand-in-model",
+                "GCP_PROJECT": "stand-in-project",
+                "GCP_REGION": "us-central1",
+            }
+        )
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            app,
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+    try:
+        _wait_for_server(base_url, server, timeout=30.0)
+        before = _process_usage(server.pid)
+        report = asyncio.run(
+            drive(base_url, args.conversations, args.concurrency, args.opening)
+        )
+        after = _process_usage(server.pid)
+        model_calls = _model_calls(base_url)
+        parsing = httpx.get(f"{base_url}/stats", timeout=5.0).json().get(
+            "survey_parsing"
+        )
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+        if standin is not None:
+            standin.stop()
+
+    cpu_seconds = None
+    if before["cpu_seconds"] is not None and after["cpu_seconds"] is not None:
+        cpu_seconds = round(after["cpu_seconds"] - before["cpu_seconds"], 3)
+    return {
+        "commit": _git_commit(),
+        "config": {
+            "conversations": args.conversations,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "error_rate": args.error_rate,
+            "seed": args.seed,
+            "vertex_standin": args.vertex_standin,
+            "malformed_rate": args.malformed_rate,
+            "fenced_rate": args.fenced_rate,
+            "extraction": args.extraction,
+            "opening": args.opening,
+        },
+        **report,
+        "model_calls_per_survey": (
+            round(model_calls / report["completed_surveys"], 2)
+            if report["completed_surveys"]
+            else None
+        ),
+        "parsing": parsing,
+        "server": {
+            "cpu_seconds": cpu_seconds,
+            "cpu_percent": (
+                round(cpu_seconds / report["elapsed_seconds"] * 100, 1)
+                if cpu_seconds is not None
+                else None
+            ),
+            "rss_mb": after["rss_mb"],
+            "peak_rss_mb": after["peak_rss_mb"],
+        },
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Relative change against a baseline run; positive means larger."""
+
+    def change(new: Optional[float], old: Optional[float]) -> Optional[float]:
+        if new is None or not old:
+            return None
+        return round((new - old) / old * 100, 1)
+
+    return {
+        "baseline_commit": baseline.get("commit"),
+        "requests_per_second_pct": change(
+            result["requests_per_second"], baseline["requests_per_second"]
+        ),
+        "p95_ms_pct": {
+            turn_type: change(
+                stats["p95_ms"], baseline["turns"].get(turn_type, {}).get("p95_ms")
+            )
+            for turn_type, stats in result["turns"].items()
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--latency",
+        default="fixed:50",
+        help="fixed:MS, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA (milliseconds)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument(
+        "--vertex-standin",
+        action="store_true",
+        help="serve src.app:app against a local Vertex stand-in instead of a stub",
+    )
+    parser.add_argument(
+        "--malformed-rate",
+        type=float,
+        default=0.0,
+        help="stand-in only: share of truncated model answers",
+    )
+    parser.add_argument(
+        "--fenced-rate",
+        type=float,
+        default=0.0,
+        help="stand-in only: share of fenced answers to unconstrained requests",
+    )
+    parser.add_argument(
+        "--opening",
+        default="<p>Hello @Agent please run survey</p>",
+        help="first message of each survey; the stub provider extracts one answer "
+        "per ';'-separated part",
+    )
+    parser.add_argument(
+        "--extraction",
+        action="store_true",
+        help="enable multi-answer extraction from the opening message",
+    )
+    parser.add_argument("--output", help="write the JSON report to this path")
+    parser.add_argument("--baseline", help="compare against a previous JSON report")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            result["comparison"] = compare(result, json.load(handle))
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Measure per-request CPU spent turning an agent result into response bytes.
+
+Compares FastAPI's response_model path (validate the returned model against
+``SurveyResponse`` again, encode it with ``jsonable_encoder`` and then
+``json.dumps``) with the single-validation path the survey routes use, for
+survey states of increasing size:
+
+    python -m benchmarks.response_bench --answers 10 100 300 --words 50
+"""
+
+import argparse
+import asyncio
+import json
+import timeit
+from typing import Any, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from src.api import routes
+from src.api.schemas import SurveyRequest
+from src.app import app
+from src.core.models import AgentResult, Answer
+
+REQUEST = {
+    "source": "msteams",
+    "event_type": "message_mentioned",
+    "team": {"id": "TEAM_ID", "channel_id": "CHANNEL_ID"},
+    "message": {
+        "id": "MESSAGE_ID",
+        "content_type": "text",
+        "content": "please run survey",
+        "created_at": "2026-02-19T10:15:30Z",
+    },
+    "sender": {"id": "USER_ID", "display_name": "Bench"},
+    "mentions": [],
+    "correlation_id": "BENCH",
+}
+
+
+def make_result(answers: int, words: int) -> AgentResult:
+    text = " ".join(["feedback"] * words)
+    question_ids = [f"q{index}" for index in range(answers)]
+    return AgentResult(
+        summary="Survey in progress.",
+        answers=[
+            Answer(question_id=question_id, question="Question?", answer=text)
+            for question_id in question_ids
+        ],
+        model="bench-model",
+        latency_ms=1,
+        status="in_progress",
+        agent_message="Next question?",
+        agent_state={
+            "status": "in_progress",
+            "initial_message": "please run survey",
+            "current_question_id": question_ids[-1],
+            "awaiting_question_id": question_ids[-1],
+            "answers": [
+                {"question_id": question_id, "answer": text}
+                for question_id in question_ids
+            ],
+            "turns": answers,
+        },
+    )
+
+
+def run(sizes: List[int], words: int, number: int, repeat: int) -> Dict[str, Any]:
+    route = next(r for r in app.routes if getattr(r, "path", "") == routes.SURVEY_PATH)
+    request = SurveyRequest.model_validate(REQUEST)
+    agent_key = routes.SURVEY_AGENT.key
+    loop = asyncio.new_event_loop()
+    report: Dict[str, Any] = {"words_per_answer": words}
+    try:
+        for size in sizes:
+            result = make_result(size, words)
+
+            def response_model() -> bytes:
+                body = routes._build_success_response(request, result, agent_key)
+                content = loop.run_until_complete(
+                    serialize_response(
+                        field=route.response_field, response_content=body
+                    )
+                )
+                return JSONResponse(content).body
+
+            def single_validation() -> bytes:
+                body = routes._build_success_response(request, result, agent_key)
+                return routes._json_response(body).body
+
+            if json.loads(response_model()) != json.loads(single_validation()):
+                raise AssertionError("Serialization paths disagree.")
+            timings = {
+                name: min(timeit.repeat(path, number=number, repeat=repeat))
+                / number
+                * 1e6
+                for name, path in (
+                    ("response_model_us", response_model),
+                    ("single_validation_us", single_validation),
+                )
+            }
+            timings["speedup"] = (
+                timings["response_model_us"] / timings["single_validation_us"]
+            )
+            timings["bytes"] = len(single_validation())
+            report[f"answers_{size}"] = {
+                key: round(value, 1) for key, value in timings.items()
+            }
+    finally:
+        loop.close()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--words", type=int, default=50)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.answers, args.words, args.number, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare the JSON survey_state round trip with the compact state token.
+
+Run from the repository root:
+
+    python -m benchmarks.state_token_bench
+"""
+
+import json
+import timeit
+from typing import Any, Dict
+
+from src.agents.survey_agent.catalog import SURVEY_QUESTION_CATALOG
+from src.agents.survey_agent.models import (
+    StateAnswer,
+    SurveyState,
+    survey_state_to_dict,
+)
+from src.agents.survey_agent.state import decode_survey_state
+from src.agents.survey_agent.state_token import decode_state_token, encode_state_token
+from src.api.schemas import SurveyState as SurveyStateSchema
+
+SECRET = b"benchmark-secret"
+ITERATIONS = 5000
+
+
+def build_state(answer_words: int) -> SurveyState:
+    answer = " ".join(["feedback"] * answer_words)
+    return SurveyState(
+        status="in_progress",
+        initial_message="<p>Hello @Agent please run the onboarding survey</p>",
+        current_question_id=SURVEY_QUESTION_CATALOG[-1]["question_id"],
+        awaiting_question_id=SURVEY_QUESTION_CATALOG[-1]["question_id"],
+        answers=[
+            StateAnswer(question_id=question["question_id"], answer=answer)
+            for question in SURVEY_QUESTION_CATALOG[:-1]
+        ],
+    )
+
+
+def _per_call_us(statement: Any) -> float:
+    return timeit.timeit(statement, number=ITERATIONS) / ITERATIONS * 1e6
+
+
+def measure(answer_words: int) -> Dict[str, Any]:
+    state = build_state(answer_words)
+    json_text = json.dumps(survey_state_to_dict(state))
+    token = encode_state_token(state, SECRET)
+
+    def json_decode() -> SurveyState | None:
+        model = SurveyStateSchema.model_validate(json.loads(json_text))
+        return decode_survey_state(model, None)
+
+    return {
+        "answer_words": answer_words,
+        "json_bytes": len(json_text.encode("utf-8")),
+        "token_bytes": len(token),
+        "json_encode_us": _per_call_us(
+            lambda: json.dumps(survey_state_to_dict(state))
+        ),
+        "token_encode_us": _per_call_us(lambda: encode_state_token(state, SECRET)),
+        "json_decode_us": _per_call_us(json_decode),
+        "token_decode_us": _per_call_us(lambda: decode_state_token(token, SECRET)),
+    }
+
+
+def main() -> None:
+    results = [measure(answer_words) for answer_words in (5, 50, 500)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""ASGI app with the Vertex provider replaced by a StubProvider.
+
+Configured from the environment so it can be served by any ASGI server:
+
+    BENCH_LATENCY=lognormal:400:0.5 BENCH_ERROR_RATE=0.01 \
+        uvicorn benchmarks.stub_app:app --port 8000
+"""
+
+import os
+
+from benchmarks.stub_provider import LatencyModel, StubProvider
+from src.api import routes
+from src.app import app
+
+_provider = StubProvider(
+    latency=LatencyModel.parse(os.getenv("BENCH_LATENCY", "fixed:50")),
+    error_rate=float(os.getenv("BENCH_ERROR_RATE", "0")),
+    error_code=int(os.getenv("BENCH_ERROR_CODE", "503")),
+    seed=int(os.getenv("BENCH_SEED", "0")),
+)
+routes.get_vertex_provider = lambda: _provider
+
+__all__ = ["app"]
@@ -0,0 +1,159 @@
+"""Survey-aware fake model for benchmarks.
+
+``answer_prompt`` recognises the survey prompts and returns well-formed
+routing, batched routing, extraction or final output, accepting every answer.
+Extraction treats a message with ``;``-separated parts as answering the
+unanswered questions in order, one part each. The
+``StubProvider`` adds configurable latency and error injection on top.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from src.agents.survey_agent.prompts import (
+    BATCH_REQUESTS_HEADER,
+    FINAL_SUMMARY_DELIMITER,
+)
+
+_CURRENT_ID = re.compile(r"^Current question id: (.*)$", re.MULTILINE)
+_USER_MESSAGE = re.compile(r"^Current user message: (.*)$", re.MULTILINE)
+_ALLOWED_IDS = re.compile(r"^Allowed next ids: (.*)$", re.MULTILINE)
+_EXTRACTION_MESSAGE = re.compile(r"^User message: (.*)$", re.MULTILINE)
+_UNANSWERED_IDS = re.compile(r"^Unanswered question ids: (.*)$", re.MULTILINE)
+
+
+def _routing_decision(prompt: str) -> Dict[str, object]:
+    current = _CURRENT_ID.search(prompt)
+    message = _USER_MESSAGE.search(prompt)
+    allowed = _ALLOWED_IDS.search(prompt)
+    current_id = current.group(1).strip() if current else ""
+    allowed_ids = (
+        [item.strip() for item in allowed.group(1).split(",")] if allowed else []
+    )
+    next_ids = [item for item in allowed_ids if item not in (current_id, "END")]
+    return {
+        "next_question_id": next_ids[0] if next_ids else "END",
+        "accepted_answer": True,
+        "normalized_answer": message.group(1).strip() if message else "",
+        "assistant_message": "Thanks.",
+    }
+
+
+def _extracted_answers(prompt: str) -> Dict[str, object]:
+    message = _EXTRACTION_MESSAGE.search(prompt)
+    parts = [part.strip() for part in (message.group(1) if message else "").split(";")]
+    if len(parts) < 2:
+        return {"answers": []}
+    unanswered = _UNANSWERED_IDS.search(prompt)
+    question_ids = unanswered.group(1).split(", ") if unanswered else []
+    return {
+        "answers": [
+            {"question_id": question_id, "answer": part, "confidence": 0.9}
+            for question_id, part in zip(question_ids, parts)
+            if part
+        ]
+    }
+
+
+def answer_prompt(prompt: str) -> str:
+    """Return a plausible model output for any survey prompt."""
+    if BATCH_REQUESTS_HEADER in prompt:
+        sections = json.loads(prompt.split(BATCH_REQUESTS_HEADER, 1)[1])
+        results = [
+            {"index": index, **_routing_decision(section)}
+            for index, section in enumerate(sections)
+        ]
+        return json.dumps({"results": results})
+    if "Allowed next ids:" in prompt:
+        return json.dumps(_routing_decision(prompt))
+    if "Unanswered question ids:" in prompt:
+        return json.dumps(_extracted_answers(prompt))
+    if FINAL_SUMMARY_DELIMITER in prompt:
+        return (
+            "Thanks, I have captured your survey responses.\n"
+            f"{FINAL_SUMMARY_DELIMITER}\nSurvey completed successfully."
+        )
+    return json.dumps(
+        {
+            "summary": "Survey completed successfully.",
+            "agent_message": "Thanks, I have captured your survey responses.",
+        }
+    )
+
+
+@dataclass(frozen=True)
+class LatencyModel:
+    """Per-call latency in milliseconds.
+
+    Specs: ``fixed:MS``, ``uniform:LOW_MS:HIGH_MS`` or
+    ``lognormal:MEDIAN_MS:SIGMA`` (a long-tailed distribution).
+    """
+
+    kind: str
+    params: tuple
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, rest = spec.partition(":")
+        params = tuple(float(value) for value in rest.split(":") if value)
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}.get(kind)
+        if expected is None or len(params) != expected:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        return cls(kind=kind, params=params)
+
+    def sample_seconds(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            milliseconds = self.params[0]
+        elif self.kind == "uniform":
+            milliseconds = rng.uniform(*self.params)
+        else:
+            median, sigma = self.params
+            milliseconds = rng.lognormvariate(0.0, sigma) * median
+        return max(milliseconds, 0.0) / 1000
+
+
+class StubUpstreamError(Exception):
+    """Injected upstream failure; ``code`` is read by the retry classifier."""
+
+    def __init__(self, code: int) -> None:
+        super().__init__(f"stub upstream returned {code}")
+        self.code = code
+
+
+class StubProvider:
+    """Provider stand-in with latency and error injection, for load tests."""
+
+    def __init__(
+        self,
+        latency: LatencyModel,
+        error_rate: float = 0.0,
+        error_code: int = 503,
+        seed: Optional[int] = None,
+        model_name: str = "stub-model",
+    ) -> None:
+        self.model_name = model_name
+        self._latency = latency
+        self._error_rate = error_rate
+        self._error_code = error_code
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    def _next_call(self) -> float:
+        self.calls += 1
+        if self._rng.random() < self._error_rate:
+            raise StubUpstreamError(self._error_code)
+        return self._latency.sample_seconds(self._rng)
+
+    def generate(self, prompt: str) -> str:
+        time.sleep(self._next_call())
+        return answer_prompt(prompt)
+
+    async def agenerate(self, prompt: str) -> str:
+        await asyncio.sleep(self._next_call())
+        return answer_prompt(prompt)
+
@@ -0,0 +1,428 @@
+"""Local stand-in for the Vertex AI generateContent API.
+
+Answers ``:generateContent`` and ``:streamGenerateContent?alt=sse`` for any
+model with survey-aware output (see ``benchmarks.stub_provider``), and can
+inject latency, slow streaming, 429/503 bursts, malformed or fenced model
+output and hangs. Fences are only added when the request did not ask for
+schema-constrained JSON. ``cachedContents`` handles are kept in memory and prepended to
+requests that reference them. Point the service at it with:
+
+    VERTEX_BASE_URL=http://127.0.0.1:8090 VERTEX_ACCESS_TOKEN=local
+
+Run from the repository root:
+
+    python -m benchmarks.vertex_standin --port 8090 --latency lognormal:400:0.5 \
+        --burst 429:3:50 --malformed-rate 0.01
+
+Faults can be changed while running with ``POST /_standin/faults`` (a JSON
+object with any FaultConfig field) and counters read from
+``GET /_standin/stats``.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.stub_provider import LatencyModel, answer_prompt
+
+
+@dataclass(frozen=True)
+class FaultConfig:
+    # Latency specs use the LatencyModel syntax, in milliseconds.
+    latency: str = "fixed:0"
+    # Extra latency per 1000 prompt characters not served from a cached prefix.
+    prompt_ms_per_kchar: float = 0.0
+    stream_chunk_chars: int = 24
+    stream_chunk_delay: str = "fixed:0"
+    error_rate: float = 0.0
+    error_code: int = 503
+    # Every burst_period calls, the next burst_length calls fail with burst_code.
+    burst_code: int = 429
+    burst_length: int = 0
+    burst_period: int = 0
+    retry_after_seconds: Optional[float] = None
+    malformed_rate: float = 0.0
+    # Wrap JSON answers in a markdown fence with a line of prose.
+    fenced_rate: float = 0.0
+    hang_rate: float = 0.0
+    hang_seconds: float = 300.0
+    seed: Optional[int] = None
+
+    def update(self, values: Dict[str, Any]) -> "FaultConfig":
+        known = {field.name for field in fields(self)}
+        unknown = set(values) - known
+        if unknown:
+            raise ValueError(f"Unknown fault settings: {sorted(unknown)}")
+        updated = replace(self, **values)
+        LatencyModel.parse(updated.latency)
+        LatencyModel.parse(updated.stream_chunk_delay)
+        return updated
+
+
+@dataclass(frozen=True)
+class _Plan:
+    delay_seconds: float
+    error_code: Optional[int] = None
+    malformed: bool = False
+    fenced: bool = False
+    hang: bool = False
+
+
+class _State:
+    def __init__(self, faults: FaultConfig) -> None:
+        self.lock = threading.Lock()
+        self.faults = faults
+        self.rng = random.Random(faults.seed)
+        self.calls = 0
+        # cachedContents name -> (text, monotonic expiry)
+        self.caches: Dict[str, Tuple[str, float]] = {}
+        self.counters: Dict[str, int] = {
+            "generate": 0,
+            "stream": 0,
+            "errors": 0,
+            "malformed": 0,
+            "fenced": 0,
+            "hangs": 0,
+            "cache_creates": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+        }
+
+    def plan(self, prompt_chars: int = 0) -> _Plan:
+        with self.lock:
+            faults = self.faults
+            call = self.calls
+            self.calls += 1
+            delay = LatencyModel.parse(faults.latency).sample_seconds(self.rng)
+            delay += faults.prompt_ms_per_kchar * prompt_chars / 1_000_000
+            if (
+                faults.burst_period > 0
+                and call % faults.burst_period < faults.burst_length
+            ):
+                self.counters["errors"] += 1
+                return _Plan(delay_seconds=0.0, error_code=faults.burst_code)
+            if self.rng.random() < faults.error_rate:
+                self.counters["errors"] += 1
+                return _Plan(delay_seconds=delay, error_code=faults.error_code)
+            if self.rng.random() < faults.hang_rate:
+                self.counters["hangs"] += 1
+                return _Plan(delay_seconds=faults.hang_seconds, hang=True)
+            malformed = self.rng.random() < faults.malformed_rate
+            if malformed:
+                self.counters["malformed"] += 1
+            fenced = self.rng.random() < faults.fenced_rate
+            return _Plan(delay_seconds=delay, malformed=malformed, fenced=fenced)
+
+    def update(self, values: Dict[str, Any]) -> FaultConfig:
+        with self.lock:
+            self.faults = self.faults.update(values)
+            # Bursts restart from the first call after a change.
+            self.calls = 0
+            if "seed" in values:
+                self.rng = random.Random(self.faults.seed)
+            return self.faults
+
+    def chunk_delay(self) -> float:
+        with self.lock:
+            spec = self.faults.stream_chunk_delay
+            return LatencyModel.parse(spec).sample_seconds(self.rng)
+
+
+def _parts_text(content: Optional[Dict[str, Any]]) -> str:
+    parts = (content or {}).get("parts") or []
+    return "".join(part.get("text", "") for part in parts)
+
+
+def _prompt_text(body: Dict[str, Any]) -> str:
+    contents = body.get("contents") or []
+    return _parts_text(contents[-1]) if contents else ""
+
+
+def _cached_text(body: Dict[str, Any]) -> str:
+    return _parts_text(body.get("systemInstruction")) + "".join(
+        _parts_text(content) for content in body.get("contents") or []
+    )
+
+
+def _timestamp(seconds_from_now: float) -> str:
+    moment = datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now)
+    return moment.isoformat().replace("+00:00", "Z")
+
+
+def _response(text: str, finished: bool = True) -> Dict[str, Any]:
+    candidate: Dict[str, Any] = {"content": {"role": "model", "parts": [{"text": text}]}}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {
+            "promptTokenCount": 0,
+            "candidatesTokenCount": 0,
+            "totalTokenCount": 0,
+        },
+    }
+
+
+def _error_body(code: int) -> Dict[str, Any]:
+    status = {
+        404: "NOT_FOUND",
+        429: "RESOURCE_EXHAUSTED",
+        503: "UNAVAILABLE",
+    }.get(code, "INTERNAL")
+    return {"error": {"code": code, "message": "Injected by stand-in.", "status": status}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_StandInHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(
+        self, status: int, payload: Dict[str, Any], headers: Optional[Dict] = None
+    ) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self) -> None:
+        if self.path == "/_standin/stats":
+            state = self.server.state
+            with state.lock:
+                payload = {**state.counters, "faults": asdict(state.faults)}
+            self._send_json(200, payload)
+            return
+        self._send_json(404, _error_body(404))
+
+    def do_POST(self) -> None:
+        body = self._read_json()
+        state = self.server.state
+        if self.path == "/_standin/faults":
+            try:
+                faults = state.update(body)
+            except (TypeError, ValueError) as exc:
+                self._send_json(400, {"error": {"code": 400, "message": str(exc)}})
+                return
+            self._send_json(200, asdict(faults))
+            return
+
+        path = self.path.split("?", 1)[0]
+        if path.endswith("/cachedContents"):
+            self._create_cache(state, path, body)
+        elif path.endswith(":generateContent"):
+            self._generate(state, body, stream=False)
+        elif path.endswith(":streamGenerateContent"):
+            self._generate(state, body, stream=True)
+        else:
+            self._send_json(404, _error_body(404))
+
+    def _create_cache(self, state: _State, path: str, body: Dict[str, Any]) -> None:
+        ttl_seconds = float(str(body.get("ttl") or "3600s").rstrip("s"))
+        # /v1beta1/projects/P/locations/L/cachedContents -> projects/P/locations/L
+        parent = path.split("/", 2)[2].rsplit("/", 1)[0]
+        with state.lock:
+            state.counters["cache_creates"] += 1
+            name = f"{parent}/cachedContents/{len(state.caches) + 1}"
+            state.caches[name] = (_cached_text(body), time.monotonic() + ttl_seconds)
+        self._send_json(
+            200,
+            {
+                "name": name,
+                "model": body.get("model", ""),
+                "createTime": _timestamp(0),
+                "expireTime": _timestamp(ttl_seconds),
+            },
+        )
+
+    def _generate(self, state: _State, body: Dict[str, Any], stream: bool) -> None:
+        prompt = _prompt_text(body)
+        cache_name = body.get("cachedContent")
+        cached_text = ""
+        with state.lock:
+            state.counters["stream" if stream else "generate"] += 1
+            retry_after = state.faults.retry_after_seconds
+            chunk_chars = max(state.faults.stream_chunk_chars, 1)
+            if cache_name:
+                cached = state.caches.get(cache_name)
+                hit = cached is not None and cached[1] > time.monotonic()
+                state.counters["cache_hits" if hit else "cache_misses"] += 1
+                if hit:
+                    cached_text = cached[0]
+        if cache_name and not cached_text:
+            self._send_json(404, _error_body(404))
+            return
+        plan = state.plan(len(prompt))
+        prompt = cached_text + prompt
+        time.sleep(plan.delay_seconds)
+        if plan.error_code is not None:
+            headers = {}
+            if retry_after is not None:
+                headers["Retry-After"] = f"{retry_after:g}"
+            self._send_json(plan.error_code, _error_body(plan.error_code), headers)
+            return
+
+        text = answer_prompt(prompt)
+        constrained = (body.get("generationConfig") or {}).get(
+            "responseMimeType"
+        ) == "application/json"
+        if plan.fenced and not constrained and text.startswith("{"):
+            with state.lock:
+                state.counters["fenced"] += 1
+            text = f"Here is the JSON you asked for:\n```json\n{text}\n```"
+        if plan.malformed:
+            text = text[: len(text) // 2]
+        if not stream:
+            self._send_json(200, _response(text))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        chunks = [
+            text[start : start + chunk_chars]
+            for start in range(0, len(text), chunk_chars)
+        ] or [""]
+        for index, chunk in enumerate(chunks):
+            if index:
+                time.sleep(state.chunk_delay())
+            event = _response(chunk, finished=index == len(chunks) - 1)
+            self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8"))
+            self.wfile.flush()
+        self.close_connection = True
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    state: _State
+
+
+class VertexStandIn:
+    """Runs the stand-in on a background thread; usable as a context manager."""
+
+    def __init__(
+        self,
+        faults: Optional[FaultConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self._server = _StandInHTTPServer((host, port), _Handler)
+        self._server.state = _State(faults or FaultConfig())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def counters(self) -> Dict[str, int]:
+        with self._server.state.lock:
+            return dict(self._server.state.counters)
+
+    def set_faults(self, **values: Any) -> None:
+        self._server.state.update(values)
+
+    def expire_caches(self) -> None:
+        """Expire every cachedContents handle, as upstream does after its TTL."""
+        state = self._server.state
+        with state.lock:
+            state.caches = {name: (text, 0.0) for name, (text, _) in state.caches.items()}
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def start(self) -> "VertexStandIn":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="vertex-standin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "VertexStandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def _parse_burst(value: str) -> List[int]:
+    code, length, period = (int(part) for part in value.split(":"))
+    return [code, length, period]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="fixed:0")
+    parser.add_argument("--prompt-ms-per-kchar", type=float, default=0.0)
+    parser.add_argument("--stream-chunk-chars", type=int, default=24)
+    parser.add_argument("--stream-chunk-delay", default="fixed:0")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-code", type=int, default=503)
+    parser.add_argument(
+        "--burst", type=_parse_burst, help="CODE:LENGTH:PERIOD, e.g. 429:3:50"
+    )
+    parser.add_argument("--retry-after", type=float)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--fenced-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=300.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    burst_code, burst_length, burst_period = args.burst or (429, 0, 0)
+    faults = FaultConfig().update(
+        {
+            "latency": args.latency,
+            "prompt_ms_per_kchar": args.prompt_ms_per_kchar,
+            "stream_chunk_chars": args.stream_chunk_chars,
+            "stream_chunk_delay": args.stream_chunk_delay,
+            "error_rate": args.error_rate,
+            "error_code": args.error_code,
+            "burst_code": burst_code,
+            "burst_length": burst_length,
+            "burst_period": burst_period,
+            "retry_after_seconds": args.retry_after,
+            "malformed_rate": args.malformed_rate,
+            "fenced_rate": args.fenced_rate,
+            "hang_rate": args.hang_rate,
+            "hang_seconds": args.hang_seconds,
+            "seed": args.seed,
+        }
+    )
+    standin = VertexStandIn(faults, host=args.host, port=args.port)
+    print(f"Vertex stand-in listening on {standin.url}", flush=True)
+    try:
+        standin.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,14 @@
-from src.agents.survey_agent.runner import run_survey_agent
-
-__all__ = ["run_survey_agent"]
+from src.agents.survey_agent.models import survey_state_from_dict
+from src.agents.survey_agent.runner import run_survey_agent, stream_survey_agent
+from src.agents.survey_agent.state import decode_survey_state, encode_survey_state
+from src.agents.survey_agent.state_token import decode_state_token, encode_state_token
 
+__all__ = [
+    "decode_state_token",
+    "decode_survey_state",
+    "encode_state_token",
+    "encode_survey_state",
+    "run_survey_agent",
+    "stream_survey_agent",
+    "survey_state_from_dict",
+]
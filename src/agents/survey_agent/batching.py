@@ -0,0 +1,70 @@
+import threading
+import weakref
+from typing import Any, Dict, List, Optional
+
+from src.agents.survey_agent.formatter import split_batch_routing_output
+from src.agents.survey_agent.budget import get_prompt_budget
+from src.agents.survey_agent.prompts import build_batch_routing_prompt
+from src.config.settings import RoutingBatchSettings, get_routing_batch_settings
+from src.core.metrics import PROMPT_TOKENS
+from src.core.stats import register_stats_source
+from src.providers.base import ModelProvider
+from src.providers.batching import PromptBatcher
+
+_batcher_lock = threading.Lock()
+_batch_settings: Optional[RoutingBatchSettings] = None
+_routing_batchers: "weakref.WeakKeyDictionary[Any, PromptBatcher]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_batch_settings() -> RoutingBatchSettings:
+    global _batch_settings
+    if _batch_settings is None:
+        _batch_settings = get_routing_batch_settings()
+    return _batch_settings
+
+
+def _combine_routing_prompts(routing_prompts: List[str]) -> str:
+    prompt = build_batch_routing_prompt(routing_prompts)
+    PROMPT_TOKENS.observe("routing_batch", get_prompt_budget().tokens(prompt))
+    return prompt
+
+
+def get_routing_batcher(provider: ModelProvider) -> Optional[PromptBatcher]:
+    """Return the routing batcher shared by all turns using ``provider``."""
+    settings = _get_batch_settings()
+    if not settings.enabled:
+        return None
+    with _batcher_lock:
+        batcher = _routing_batchers.get(provider)
+        if batcher is None:
+            batcher = PromptBatcher(
+                provider=provider,
+                combine=_combine_routing_prompts,
+                split=split_batch_routing_output,
+                max_batch_size=settings.max_batch_size,
+                max_delay_seconds=settings.max_delay_ms / 1000,
+            )
+            _routing_batchers[provider] = batcher
+        return batcher
+
+
+def reset_routing_batchers() -> None:
+    """Drop batchers so the next turn re-reads the batching configuration."""
+    global _batch_settings
+    with _batcher_lock:
+        _batch_settings = None
+        _routing_batchers.clear()
+
+
+def _routing_batch_stats() -> Dict[str, Any]:
+    enabled = _batch_settings is not None and _batch_settings.enabled
+    totals: Dict[str, Any] = {"enabled": enabled}
+    for batcher in list(_routing_batchers.values()):
+        for key, value in batcher.stats().items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+register_stats_source("survey_routing_batcher", _routing_batch_stats)
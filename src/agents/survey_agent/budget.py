@@ -0,0 +1,93 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, List
+
+from src.config.settings import PromptBudgetSettings, get_prompt_budget_settings
+from src.core.metrics import PROMPT_TRUNCATIONS
+
+TRUNCATION_MARKER = " [...] "
+# Share of a trimmed field kept from the start; the rest comes from the end.
+HEAD_FRACTION = 0.7
+# How far a cut may move back to land on whitespace instead of mid-word.
+_WORD_BOUNDARY_WINDOW = 16
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """Rough token count; model tokenizers average about four characters a token."""
+    return math.ceil(len(text) / chars_per_token) if text else 0
+
+
+def _cut_head(text: str, size: int) -> str:
+    head = text[:size]
+    if size < len(text) and not text[size].isspace():
+        boundary = head.rfind(" ", max(size - _WORD_BOUNDARY_WINDOW, 0))
+        if boundary > 0:
+            head = head[:boundary]
+    return head.rstrip()
+
+
+def _cut_tail(text: str, size: int) -> str:
+    if size <= 0:
+        return ""
+    start = len(text) - size
+    tail = text[start:]
+    if start > 0 and not text[start - 1].isspace():
+        boundary = tail.find(" ", 0, _WORD_BOUNDARY_WINDOW)
+        if boundary >= 0:
+            tail = tail[boundary:]
+    return tail.lstrip()
+
+
+def truncate_middle(text: str, max_tokens: int, chars_per_token: float = 4.0) -> str:
+    """Trim ``text`` to ``max_tokens``, keeping its head and tail around a marker.
+
+    The opening of a message usually carries the answer and the end its
+    conclusion, so the middle is dropped. Cuts prefer word boundaries; the
+    result is deterministic for a given input and budget. ``max_tokens`` of
+    zero or less disables trimming.
+    """
+    max_chars = int(max_tokens * chars_per_token)
+    if max_tokens <= 0 or len(text) <= max_chars:
+        return text
+    keep = max(max_chars - len(TRUNCATION_MARKER), 0)
+    head_chars = math.ceil(keep * HEAD_FRACTION)
+    return (
+        _cut_head(text, head_chars)
+        + TRUNCATION_MARKER
+        + _cut_tail(text, keep - head_chars)
+    ).strip()
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    """Per-field token budgets applied to user-supplied prompt inputs."""
+
+    settings: PromptBudgetSettings
+
+    def tokens(self, prompt: str) -> int:
+        return estimate_tokens(prompt, self.settings.chars_per_token)
+
+    def _fit(self, field: str, text: str, max_tokens: int) -> str:
+        fitted = truncate_middle(text, max_tokens, self.settings.chars_per_token)
+        if fitted != text:
+            PROMPT_TRUNCATIONS.inc(field)
+        return fitted
+
+    def user_message(self, text: str) -> str:
+        return self._fit("user_message", text, self.settings.user_message_tokens)
+
+    def initial_message(self, text: str) -> str:
+        return self._fit(
+            "initial_message", text, self.settings.initial_message_tokens
+        )
+
+    def answers(self, items: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        budget = self.settings.answer_tokens
+        return [
+            {**item, "answer": self._fit("answer", item["answer"], budget)}
+            for item in items
+        ]
+
+
+def get_prompt_budget() -> PromptBudget:
+    return PromptBudget(get_prompt_budget_settings())
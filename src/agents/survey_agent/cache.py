@@ -0,0 +1,79 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from src.agents.survey_agent.models import RoutingDecision
+from src.config.settings import get_routing_cache_settings
+from src.core.cache import TTLCache
+from src.core.stats import register_stats_source
+
+_cache_lock = threading.Lock()
+_routing_cache: Optional[TTLCache[RoutingDecision]] = None
+_routing_cache_loaded = False
+
+
+def normalize_user_message(message: str) -> str:
+    return " ".join(message.split()).casefold()
+
+
+def routing_cache_key(
+    catalog_fingerprint: bytes,
+    current_question_id: str,
+    current_user_message: str,
+    answered_ids: Iterable[str],
+    allowed_next_ids: Iterable[str],
+) -> str:
+    """Canonical hash of the inputs that decide an accepted routing decision.
+
+    Sender, opening message and earlier answer texts are left out, so the same
+    reply to the same question ("everyone", "next week") is reused across
+    users. Only accepted decisions are cached, without their assistant_message.
+    """
+    payload = json.dumps(
+        [
+            catalog_fingerprint.hex(),
+            current_question_id,
+            normalize_user_message(current_user_message),
+            sorted(answered_ids),
+            list(allowed_next_ids),
+        ],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_routing_cache() -> Optional[TTLCache[RoutingDecision]]:
+    """Return the process-wide routing cache, or None when disabled."""
+    global _routing_cache, _routing_cache_loaded
+    if _routing_cache_loaded:
+        return _routing_cache
+    with _cache_lock:
+        if not _routing_cache_loaded:
+            settings = get_routing_cache_settings()
+            if settings.enabled:
+                _routing_cache = TTLCache(
+                    max_entries=settings.max_entries,
+                    ttl_seconds=settings.ttl_seconds,
+                )
+            _routing_cache_loaded = True
+    return _routing_cache
+
+
+def reset_routing_cache() -> None:
+    """Drop the cache so the next turn re-reads its configuration."""
+    global _routing_cache, _routing_cache_loaded
+    with _cache_lock:
+        _routing_cache = None
+        _routing_cache_loaded = False
+
+
+def _routing_cache_stats() -> Dict[str, Any]:
+    cache = _routing_cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats().as_dict()}
+
+
+register_stats_source("survey_routing_cache", _routing_cache_stats)
@@ -1,6 +1,18 @@
-from typing import Dict, List
+import copy
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
-SURVEY_QUESTION_CATALOG: List[Dict[str, str]] = [
+from src.config.files import load_data_file
+from src.config.settings import get_catalog_settings
+from src.core.stats import register_stats_source
+
+# Optional "fast_path" entries declare local validators (see fast_path.py) that
+# may accept an unambiguous answer without a routing model call.
+SURVEY_QUESTION_CATALOG: List[Dict[str, Any]] = [
     {
         "question_id": "q1",
         "question": "What is the goal of this survey request?",
@@ -10,11 +22,288 @@ SURVEY_QUESTION_CATALOG: List[Dict[str, str]] = [
         "question_id": "q2",
         "question": "Who is the intended audience?",
         "solution_id": "s2",
+        "fast_path": {
+            "kind": "phrase",
+            "max_words": 5,
+            "keywords": [
+                "all",
+                "everyone",
+                "employees",
+                "staff",
+                "engineers",
+                "engineering",
+                "developers",
+                "managers",
+                "leadership",
+                "executives",
+                "team",
+                "teams",
+                "sales",
+                "marketing",
+                "support",
+                "customers",
+                "users",
+                "interns",
+                "new hires",
+            ],
+        },
     },
     {
         "question_id": "q3",
         "question": "When should the survey be run?",
         "solution_id": "s3",
+        "fast_path": {"kind": "date"},
     },
 ]
 
+
+@dataclass(frozen=True)
+class CompiledCatalog:
+    """An ordered, indexed question catalog, built once per load.
+
+    Answered questions are tracked as a bitmask over catalog positions, so
+    "first unanswered" is a bit trick and "remaining" only visits the
+    unanswered questions instead of rescanning the whole list.
+    """
+
+    questions: Tuple[Dict[str, Any], ...]
+    question_ids: Tuple[str, ...]
+    index: Mapping[str, int]
+    fingerprint: bytes
+    full_mask: int
+    source: str = "builtin"
+    # The questions as listed in the static prompt prefixes, rendered once per load.
+    prompt_block: str = ""
+    _by_id: Mapping[str, Dict[str, Any]] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+    def __contains__(self, question_id: object) -> bool:
+        return question_id in self.index
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.questions)
+
+    def question(self, question_id: str) -> Dict[str, Any]:
+        return self._by_id[question_id]
+
+    def answered_mask(self, answers_by_id: Mapping[str, str]) -> int:
+        mask = 0
+        for question_id, answer in answers_by_id.items():
+            position = self.index.get(question_id)
+            if position is not None and answer.strip():
+                mask |= 1 << position
+        return mask
+
+    def first_unanswered(self, mask: int) -> Optional[str]:
+        unanswered = ~mask & self.full_mask
+        if not unanswered:
+            return None
+        return self.question_ids[(unanswered & -unanswered).bit_length() - 1]
+
+    def _positions(self, bits: int) -> Iterator[int]:
+        while bits:
+            lowest = bits & -bits
+            yield lowest.bit_length() - 1
+            bits ^= lowest
+
+    def unanswered_ids(self, mask: int) -> List[str]:
+        return [
+            self.question_ids[position]
+            for position in self._positions(~mask & self.full_mask)
+        ]
+
+    def answered_ids(self, mask: int) -> List[str]:
+        return [self.question_ids[position] for position in self._positions(mask)]
+
+
+def _invalid_catalog(reason: str) -> ValueError:
+    return ValueError(f"Invalid survey catalog: {reason}")
+
+
+def compile_catalog(
+    questions: Iterable[Mapping[str, Any]], source: str = "builtin"
+) -> CompiledCatalog:
+    """Validate ``questions`` and build the lookup tables; the input is copied."""
+    compiled = tuple(copy.deepcopy(dict(question)) for question in questions)
+    if not compiled:
+        raise _invalid_catalog("no questions")
+    index: Dict[str, int] = {}
+    for position, question in enumerate(compiled):
+        question_id = question.get("question_id")
+        if not isinstance(question_id, str) or not question_id.strip():
+            raise _invalid_catalog(f"question {position} has no question_id")
+        if not isinstance(question.get("question"), str):
+            raise _invalid_catalog(f"{question_id} has no question text")
+        if question_id in index or question_id == "END":
+            raise _invalid_catalog(f"duplicate or reserved id {question_id}")
+        index[question_id] = position
+    question_ids = tuple(index)
+    return CompiledCatalog(
+        questions=compiled,
+        question_ids=question_ids,
+        index=index,
+        fingerprint=hashlib.sha256("\n".join(question_ids).encode("utf-8")).digest(),
+        full_mask=(1 << len(compiled)) - 1,
+        source=source,
+        prompt_block="Survey questions:\n"
+        + "".join(
+            f"- {question['question_id']}: {question['question']}\n"
+            for question in compiled
+        )
+        + "\n",
+        _by_id={question["question_id"]: question for question in compiled},
+    )
+
+
+def load_catalog(path: str) -> CompiledCatalog:
+    """Load a JSON or YAML catalog: a list of questions or {"questions": [...]}."""
+    data = load_data_file(path)
+    if isinstance(data, dict):
+        data = data.get("questions")
+    if not isinstance(data, list) or not all(isinstance(q, dict) for q in data):
+        raise _invalid_catalog("expected a list of question objects")
+    return compile_catalog(data, source=path)
+
+
+class CatalogLoader:
+    """Serves the current catalog, reloading the file when it changes.
+
+    The file's modification time and size are checked at most every
+    ``reload_seconds``. A file that fails to load or validate is ignored and
+    the previous catalog stays in service.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        reload_seconds: float,
+        clock=time.monotonic,
+    ) -> None:
+        self._path = path
+        self._reload_seconds = reload_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._signature = self._stat()
+        self._catalog = load_catalog(path)
+        self._checked_at = clock()
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def _stat(self) -> Tuple[float, int]:
+        stat = os.stat(self._path)
+        return stat.st_mtime, stat.st_size
+
+    def get(self) -> CompiledCatalog:
+        if self._reload_seconds <= 0:
+            return self._catalog
+        now = self._clock()
+        if now - self._checked_at < self._reload_seconds:
+            return self._catalog
+        with self._lock:
+            if now - self._checked_at >= self._reload_seconds:
+                self._checked_at = now
+                self._maybe_reload()
+        return self._catalog
+
+    def _maybe_reload(self) -> None:
+        try:
+            signature = self._stat()
+            if signature == self._signature:
+                return
+            catalog = load_catalog(self._path)
+        except (OSError, ValueError, TypeError):
+            self.reload_errors += 1
+            return
+        self._signature = signature
+        self._catalog = catalog
+        self.reloads += 1
+
+    def stats(self) -> Dict[str, Any]:
+        catalog = self._catalog
+        return {
+            "source": catalog.source,
+            "questions": len(catalog),
+            "fingerprint": catalog.fingerprint[:4].hex(),
+            "reloads": self.reloads,
+            "reload_errors": self.reload_errors,
+        }
+
+
+_catalog_lock = threading.Lock()
+_catalog_loader: Optional[CatalogLoader] = None
+_builtin_catalog: Optional[CompiledCatalog] = None
+_catalog_loaded = False
+# catalog path -> loader, for agents configured with their own catalog
+_path_loaders: Dict[str, CatalogLoader] = {}
+
+
+def get_catalog(path: Optional[str] = None) -> CompiledCatalog:
+    """Return the compiled catalog at ``path``, or the process-wide default.
+
+    The default is SURVEY_CATALOG_PATH or the built-in catalog. Every catalog
+    is reloaded on change per SURVEY_CATALOG_RELOAD_SECONDS.
+    """
+    global _catalog_loader, _builtin_catalog, _catalog_loaded
+    if path:
+        return _path_loader(path).get()
+    if not _catalog_loaded:
+        with _catalog_lock:
+            if not _catalog_loaded:
+                settings = get_catalog_settings()
+                if settings.path:
+                    _catalog_loader = CatalogLoader(
+                        settings.path, settings.reload_seconds
+                    )
+                else:
+                    _builtin_catalog = compile_catalog(SURVEY_QUESTION_CATALOG)
+                _catalog_loaded = True
+    if _catalog_loader is not None:
+        return _catalog_loader.get()
+    assert _builtin_catalog is not None
+    return _builtin_catalog
+
+
+def _path_loader(path: str) -> CatalogLoader:
+    loader = _path_loaders.get(path)
+    if loader is None:
+        with _catalog_lock:
+            loader = _path_loaders.get(path)
+            if loader is None:
+                loader = CatalogLoader(path, get_catalog_settings().reload_seconds)
+                _path_loaders[path] = loader
+    return loader
+
+
+def reset_catalog() -> None:
+    """Drop the catalogs so the next turn re-reads their configuration."""
+    global _catalog_loader, _builtin_catalog, _catalog_loaded
+    with _catalog_lock:
+        _catalog_loader = None
+        _builtin_catalog = None
+        _catalog_loaded = False
+        _path_loaders.clear()
+
+
+def _catalog_stats() -> Dict[str, Any]:
+    loader = _catalog_loader
+    if loader is not None:
+        stats = loader.stats()
+    elif _builtin_catalog is not None:
+        catalog = _builtin_catalog
+        stats = {
+            "source": catalog.source,
+            "questions": len(catalog),
+            "fingerprint": catalog.fingerprint[:4].hex(),
+        }
+    else:
+        stats = {"loaded": False}
+    if _path_loaders:
+        stats["agent_catalogs"] = {
+            path: loader.stats() for path, loader in list(_path_loaders.items())
+        }
+    return stats
+
+
+register_stats_source("survey_catalog", _catalog_stats)
@@ -0,0 +1,235 @@
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, Optional
+
+from src.core.stats import register_stats_source
+
+
+@dataclass(frozen=True)
+class AnswerMatch:
+    normalized_answer: str
+    confidence: float
+
+
+AnswerValidator = Callable[[str, Dict[str, Any]], Optional[AnswerMatch]]
+
+ANSWER_VALIDATORS: Dict[str, AnswerValidator] = {}
+
+_WEEKDAYS = r"monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+_MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?"
+    r"|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+_MONTH_NUMBERS = {
+    name: number
+    for number, name in enumerate(
+        "jan feb mar apr may jun jul aug sep oct nov dec".split(), start=1
+    )
+}
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+# Longest phrases first, so "end of the month" is not read as a bare "month".
+_DATE_EXPRESSIONS = [
+    re.compile(r"\bend\s+of\s+(?:the\s+)?(?:week|month|quarter)\b"),
+    re.compile(r"\bin\s+(?:\d+|a|one|two|three)\s+(?:days?|weeks?|months?)\b"),
+    re.compile(
+        rf"\b(?P<month>{_MONTHS})\.?\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?"
+        r"(?:,?\s+(?P<year>\d{4}))?\b"
+    ),
+    re.compile(
+        rf"\b(?P<day>\d{{1,2}})(?:st|nd|rd|th)?\s+(?P<month>{_MONTHS})\.?"
+        r"(?:,?\s+(?P<year>\d{4}))?\b"
+    ),
+    re.compile(
+        rf"\b(?:(?:this|next|coming)\s+)?(?:{_WEEKDAYS}|week|month|quarter)\b"
+        r"(?:\s+(?:morning|afternoon))?"
+    ),
+    re.compile(r"\b(?:today|tomorrow|asap|immediately)\b"),
+]
+# Words that may surround a date without making the reply ambiguous.
+_DATE_FILLER = {
+    "run", "it", "send", "launch", "start", "starting", "please", "on", "by",
+    "from", "the", "we", "should", "can", "let's", "lets", "do", "at", "ideally",
+}
+_QUESTION_WORDS = {"what", "why", "how", "who", "which", "where", "when"}
+_NON_ANSWERS = {"no", "nope", "idk", "skip", "dunno", "pass", "n/a", "hello", "hi"}
+# Negation, hedging or exceptions turn a keyword hit into something only the
+# model can interpret ("not all of them", "maybe sales, ask the team").
+_UNCERTAIN_WORDS = {
+    "not", "no", "never", "none", "nobody", "neither", "nor", "don't", "dont",
+    "isn't", "aren't", "maybe", "perhaps", "probably", "possibly", "might",
+    "unsure", "unclear", "idk", "dunno", "tbd", "ask", "depends", "except",
+    "excluding", "but", "or",
+}
+# Words that may join audience keywords without adding meaning of their own.
+_PHRASE_FILLER = {"a", "an", "the", "our", "my", "of", "in", "and", "&", "for", "to"}
+
+
+def register_answer_validator(kind: str, validator: AnswerValidator) -> None:
+    ANSWER_VALIDATORS[kind] = validator
+
+
+def _clean(text: str) -> str:
+    cleaned = " ".join(text.split()).strip(" .!,;")
+    return cleaned[:1].upper() + cleaned[1:]
+
+
+def _clean_date(text: str) -> str:
+    cleaned = _clean(text)
+    return re.sub(
+        rf"\b(?:{_WEEKDAYS}|{_MONTHS})\b",
+        lambda match: match.group(0).capitalize(),
+        cleaned,
+    )
+
+
+def _words(text: str) -> list[str]:
+    return re.findall(r"[\w'/]+", text.lower())
+
+
+def _date_confidence(lowered: str, start: int, end: int, exact: float) -> float:
+    remainder = lowered[:start] + " " + lowered[end:]
+    extra_words = [word for word in _words(remainder) if word not in _DATE_FILLER]
+    return exact if not extra_words else 0.6
+
+
+def _is_calendar_day(match: re.Match[str]) -> bool:
+    month = _MONTH_NUMBERS[match.group("month")[:3]]
+    # Without a year, February 29th is allowed.
+    year = int(match.group("year") or 2000)
+    try:
+        date(year, month, int(match.group("day")))
+    except ValueError:
+        return False
+    return True
+
+
+def validate_date(message: str, rule: Dict[str, Any]) -> Optional[AnswerMatch]:
+    if "?" in message:
+        return None
+    lowered = " ".join(message.lower().split())
+    iso_match = _ISO_DATE.search(lowered)
+    if iso_match:
+        try:
+            parsed = date.fromisoformat(iso_match.group(0))
+        except ValueError:
+            return None
+        return AnswerMatch(
+            normalized_answer=parsed.isoformat(),
+            confidence=_date_confidence(
+                lowered, iso_match.start(), iso_match.end(), exact=1.0
+            ),
+        )
+
+    for expression in _DATE_EXPRESSIONS:
+        match = expression.search(lowered)
+        if match is None:
+            continue
+        if "day" in expression.groupindex and not _is_calendar_day(match):
+            return None
+        return AnswerMatch(
+            normalized_answer=_clean_date(match.group(0)),
+            confidence=_date_confidence(lowered, match.start(), match.end(), 0.95),
+        )
+    return None
+
+
+def validate_phrase(message: str, rule: Dict[str, Any]) -> Optional[AnswerMatch]:
+    if "?" in message:
+        return None
+    words = _words(message)
+    max_words = int(rule.get("max_words", 6))
+    if not words or len(words) > max_words:
+        return None
+    if set(words) & (_QUESTION_WORDS | _UNCERTAIN_WORDS):
+        return None
+    if " ".join(words) in _NON_ANSWERS:
+        return None
+    # Confidence is the share of meaningful words that are audience keywords,
+    # so "engineers and managers" is accepted but "senior engineers" is not.
+    covered = [False] * len(words)
+    for keyword in rule.get("keywords", []):
+        keyword_words = _words(str(keyword))
+        size = len(keyword_words)
+        for start in range(len(words) - size + 1):
+            if size and words[start : start + size] == keyword_words:
+                covered[start : start + size] = [True] * size
+    content = [
+        is_covered
+        for word, is_covered in zip(words, covered)
+        if is_covered or word not in _PHRASE_FILLER
+    ]
+    coverage = sum(content) / len(content) if content else 0.0
+    return AnswerMatch(normalized_answer=_clean(message), confidence=0.95 * coverage)
+
+
+def validate_regex(message: str, rule: Dict[str, Any]) -> Optional[AnswerMatch]:
+    pattern = rule.get("pattern")
+    if not isinstance(pattern, str):
+        return None
+    match = re.fullmatch(pattern, message.strip(), flags=re.IGNORECASE)
+    if match is None:
+        return None
+    return AnswerMatch(
+        normalized_answer=_clean(match.group(0)),
+        confidence=float(rule.get("confidence", 0.95)),
+    )
+
+
+register_answer_validator("date", validate_date)
+register_answer_validator("phrase", validate_phrase)
+register_answer_validator("regex", validate_regex)
+
+
+class FastPathCounters:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.accepted = 0
+        self.fallbacks = 0
+
+    def record(self, accepted: bool) -> None:
+        with self._lock:
+            self.attempts += 1
+            if accepted:
+                self.accepted += 1
+            else:
+                self.fallbacks += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "accepted": self.accepted,
+                "fallbacks": self.fallbacks,
+                "hit_rate": self.accepted / self.attempts if self.attempts else 0.0,
+            }
+
+
+FAST_PATH_COUNTERS = FastPathCounters()
+register_stats_source("survey_fast_path", FAST_PATH_COUNTERS.as_dict)
+
+
+def match_answer(
+    question: Dict[str, Any], user_message: str, min_confidence: float
+) -> Optional[AnswerMatch]:
+    """Accept an answer locally when the question's validator is confident enough.
+
+    Returns None when the question declares no validator or the validator is
+    unsure; the caller then falls back to the routing model.
+    """
+    rule = question.get("fast_path")
+    if not isinstance(rule, dict):
+        return None
+    validator = ANSWER_VALIDATORS.get(str(rule.get("kind")))
+    if validator is None:
+        return None
+    match = validator(user_message, rule)
+    accepted = (
+        match is not None
+        and bool(match.normalized_answer)
+        and match.confidence >= min_confidence
+    )
+    FAST_PATH_COUNTERS.record(accepted)
+    return match if accepted else None
@@ -1,13 +1,18 @@
 import json
-from typing import Any, Dict, List, Optional, Tuple
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from src.core.errors import CoreError
+from src.core.metrics import MODEL_OUTPUTS, PARSE_FAILURES, PARSE_REPAIRS
 from src.core.models import Answer
-from src.agents.survey_agent.models import RoutingDecision
+from src.core.stats import register_stats_source
+from src.core.tracing import traced
+from src.agents.survey_agent.models import ExtractedAnswer, RoutingDecision
+from src.agents.survey_agent.prompts import FINAL_SUMMARY_DELIMITER
 
 
 def build_answers(
-    answers_by_id: Dict[str, str], questions: List[Dict[str, Any]]
+    answers_by_id: Dict[str, str], questions: Sequence[Dict[str, Any]]
 ) -> List[Answer]:
     answers: List[Answer] = []
     for question in questions:
@@ -26,15 +31,87 @@ def build_answers(
     return answers
 
 
-def parse_routing_output(model_output: str) -> RoutingDecision:
+_FENCED_BLOCK = re.compile(r"```[a-zA-Z]*\s*(.*?)\s*```", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_SMART_QUOTES = str.maketrans({"\u201c": '"', "\u201d": '"'})
+# Candidate object starts tried when scanning prose for the first JSON object.
+_MAX_SCAN_STARTS = 8
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _parse_error() -> CoreError:
+    return CoreError("MODEL_PARSE_ERROR", "Model response could not be parsed.")
+
+
+def _scan_object(text: str) -> Optional[Dict[str, Any]]:
+    start = text.find("{")
+    for _ in range(_MAX_SCAN_STARTS):
+        if start < 0:
+            return None
+        try:
+            data, _ = _JSON_DECODER.raw_decode(text, start)
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(data, dict):
+                return data
+        start = text.find("{", start + 1)
+    return None
+
+
+def _repair_object(text: str) -> Optional[Dict[str, Any]]:
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        return None
+    candidate = text[start : end + 1].translate(_SMART_QUOTES)
+    candidate = _TRAILING_COMMA.sub(r"\1", candidate)
     try:
-        data = json.loads(model_output)
-    except json.JSONDecodeError as exc:
-        raise CoreError("MODEL_PARSE_ERROR", "Model response could not be parsed.") from exc
+        data = json.loads(candidate)
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _extract_object(text: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    """Find the JSON object in prose or fenced model output: (object, method)."""
+    fenced = _FENCED_BLOCK.search(text)
+    if fenced is not None:
+        try:
+            data = json.loads(fenced.group(1))
+        except json.JSONDecodeError:
+            pass
+        else:
+            if isinstance(data, dict):
+                return data, "fence"
+    data = _scan_object(text)
+    if data is not None:
+        return data, "scan"
+    return _repair_object(text), "repair"
 
+
+def load_json_object(model_output: str, kind: str) -> Dict[str, Any]:
+    """Parse a model's JSON object, tolerating fences, prose and trailing commas.
+
+    Strict JSON (what schema-constrained output returns) takes the fast path.
+    Outputs, repairs and failures are counted so the failure rate with and
+    without tolerant extraction can be compared.
+    """
+    MODEL_OUTPUTS.inc(kind)
+    try:
+        data = json.loads(model_output)
+    except json.JSONDecodeError:
+        data, method = _extract_object(model_output)
+        if data is None:
+            PARSE_FAILURES.inc(kind)
+            raise _parse_error()
+        PARSE_REPAIRS.inc(method)
     if not isinstance(data, dict):
-        raise CoreError("MODEL_PARSE_ERROR", "Model response could not be parsed.")
+        PARSE_FAILURES.inc(kind)
+        raise _parse_error()
+    return data
+
 
+def _routing_decision(data: Dict[str, Any]) -> RoutingDecision:
     next_question_id = data.get("next_question_id")
     accepted_answer = data.get("accepted_answer")
     assistant_message = data.get("assistant_message")
@@ -44,13 +121,13 @@ def parse_routing_output(model_output: str) -> RoutingDecision:
         or not isinstance(accepted_answer, bool)
         or not isinstance(assistant_message, str)
     ):
-        raise CoreError("MODEL_PARSE_ERROR", "Model response could not be parsed.")
+        raise _parse_error()
 
     normalized_value: Optional[str] = None
     if isinstance(normalized_answer, str):
         normalized_value = normalized_answer.strip()
     elif normalized_answer is not None:
-        raise CoreError("MODEL_PARSE_ERROR", "Model response could not be parsed.")
+        raise _parse_error()
 
     return RoutingDecision(
         next_question_id=next_question_id.strip(),
@@ -60,18 +137,152 @@ def parse_routing_output(model_output: str) -> RoutingDecision:
     )
 
 
-def parse_final_model_output(model_output: str) -> Tuple[str, str]:
+@traced("survey.parse_routing_output")
+def parse_routing_output(model_output: str) -> RoutingDecision:
+    data = load_json_object(model_output, "routing")
     try:
-        data = json.loads(model_output)
-    except json.JSONDecodeError as exc:
-        raise CoreError("MODEL_PARSE_ERROR", "Model response could not be parsed.") from exc
+        return _routing_decision(data)
+    except CoreError:
+        PARSE_FAILURES.inc("routing")
+        raise
 
-    if not isinstance(data, dict):
-        raise CoreError("MODEL_PARSE_ERROR", "Model response could not be parsed.")
 
+def parse_extraction_output(
+    model_output: str, question_ids: Sequence[str]
+) -> List[ExtractedAnswer]:
+    """Answers the model extracted for ``question_ids``, one per question.
+
+    Items for other questions, blank answers and malformed items are dropped;
+    confidence is clamped to [0, 1].
+    """
+    items = load_json_object(model_output, "extraction").get("answers")
+    if not isinstance(items, list):
+        PARSE_FAILURES.inc("extraction")
+        raise _parse_error()
+
+    wanted = set(question_ids)
+    extracted: Dict[str, ExtractedAnswer] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        question_id = item.get("question_id")
+        answer = item.get("answer")
+        confidence = item.get("confidence")
+        if (
+            question_id not in wanted
+            or question_id in extracted
+            or not isinstance(answer, str)
+            or not answer.strip()
+            or not isinstance(confidence, (int, float))
+            or isinstance(confidence, bool)
+        ):
+            continue
+        extracted[question_id] = ExtractedAnswer(
+            question_id=question_id,
+            answer=answer.strip(),
+            confidence=min(max(float(confidence), 0.0), 1.0),
+        )
+    return list(extracted.values())
+
+
+@traced("survey.split_batch_routing_output")
+def split_batch_routing_output(model_output: str, count: int) -> List[Optional[str]]:
+    """Split a batched routing answer into one JSON routing output per request.
+
+    Items that are missing or do not parse as a routing decision are None.
+    """
+    results = load_json_object(model_output, "routing_batch").get("results")
+    if not isinstance(results, list):
+        PARSE_FAILURES.inc("routing_batch")
+        raise _parse_error()
+
+    outputs: List[Optional[str]] = [None] * count
+    for position, item in enumerate(results):
+        if not isinstance(item, dict):
+            continue
+        index = item.get("index", position)
+        if not isinstance(index, int) or not 0 <= index < count:
+            continue
+        fields = {k: v for k, v in item.items() if k != "index"}
+        try:
+            _routing_decision(fields)
+        except CoreError:
+            continue
+        outputs[index] = json.dumps(fields)
+    return outputs
+
+
+@traced("survey.parse_final_model_output")
+def parse_final_model_output(model_output: str) -> Tuple[str, str]:
+    data = load_json_object(model_output, "final")
     summary = data.get("summary")
     agent_message = data.get("agent_message")
     if not isinstance(summary, str) or not isinstance(agent_message, str):
-        raise CoreError("MODEL_PARSE_ERROR", "Model response could not be parsed.")
+        PARSE_FAILURES.inc("final")
+        raise _parse_error()
 
     return summary.strip(), agent_message.strip()
+
+
+class FinalStreamParser:
+    """Incrementally splits a streamed final answer into message and summary.
+
+    ``feed`` returns the part of the agent_message that is safe to forward;
+    text that might be the start of the summary delimiter is held back.
+    """
+
+    def __init__(self) -> None:
+        self._pending = ""
+        self._message_parts: List[str] = []
+        self._summary_parts: List[str] = []
+        self._in_summary = False
+
+    def feed(self, chunk: str) -> str:
+        if self._in_summary:
+            self._summary_parts.append(chunk)
+            return ""
+        self._pending += chunk
+        index = self._pending.find(FINAL_SUMMARY_DELIMITER)
+        if index >= 0:
+            ready = self._pending[:index]
+            self._summary_parts.append(
+                self._pending[index + len(FINAL_SUMMARY_DELIMITER) :]
+            )
+            self._pending = ""
+            self._in_summary = True
+        else:
+            keep = len(FINAL_SUMMARY_DELIMITER) - 1
+            ready = self._pending[: max(len(self._pending) - keep, 0)]
+            self._pending = self._pending[len(ready) :]
+        self._message_parts.append(ready)
+        return ready
+
+    @traced("survey.parse_final_stream")
+    def finish(self) -> Tuple[str, str]:
+        """Return (summary, agent_message) once the stream has ended."""
+        MODEL_OUTPUTS.inc("final_stream")
+        summary = "".join(self._summary_parts).strip()
+        agent_message = "".join(self._message_parts).strip()
+        if not self._in_summary or not summary or not agent_message:
+            PARSE_FAILURES.inc("final_stream")
+            raise _parse_error()
+        return summary, agent_message
+
+
+def _parsing_stats() -> Dict[str, Any]:
+    outputs = MODEL_OUTPUTS.total()
+    failures = PARSE_FAILURES.total()
+    repaired = PARSE_REPAIRS.total()
+    return {
+        "outputs": int(outputs),
+        "repaired": int(repaired),
+        "failures": int(failures),
+        "failure_rate": round(failures / outputs, 4) if outputs else 0.0,
+        # What the rate would be if only strict JSON were accepted.
+        "strict_failure_rate": (
+            round((failures + repaired) / outputs, 4) if outputs else 0.0
+        ),
+    }
+
+
+register_stats_source("survey_parsing", _parsing_stats)
@@ -15,6 +15,8 @@ class SurveyState:
     current_question_id: Optional[str]
     awaiting_question_id: Optional[str]
     answers: List[StateAnswer]
+    # Turns answered so far in this survey, for the turns-per-survey metric.
+    turns: int = 0
 
 
 @dataclass(frozen=True)
@@ -25,7 +27,16 @@ class RoutingDecision:
     normalized_answer: Optional[str] = None
 
 
-def survey_state_from_dict(data: Optional[Dict[str, Any]]) -> Optional[SurveyState]:
+@dataclass(frozen=True)
+class ExtractedAnswer:
+    question_id: str
+    answer: str
+    confidence: float
+
+
+def survey_state_from_dict(data: Optional[Any]) -> Optional[SurveyState]:
+    if isinstance(data, SurveyState):
+        return data
     if not isinstance(data, dict):
         return None
     answers_in = data.get("answers")
@@ -48,12 +59,16 @@ def survey_state_from_dict(data: Optional[Dict[str, Any]]) -> Optional[SurveySta
         current_question_id = None
     if awaiting_question_id is not None and not isinstance(awaiting_question_id, str):
         awaiting_question_id = None
+    turns = data.get("turns", 0)
+    if not isinstance(turns, int) or isinstance(turns, bool) or turns < 0:
+        turns = 0
     return SurveyState(
         status=status,
         initial_message=initial_message,
         current_question_id=current_question_id,
         awaiting_question_id=awaiting_question_id,
         answers=answers,
+        turns=turns,
     )
 
 
@@ -72,5 +87,6 @@ def survey_state_to_dict(state: Optional[SurveyState]) -> Optional[Dict[str, Any
             }
             for answer in state.answers
         ],
+        "turns": state.turns,
     }
 
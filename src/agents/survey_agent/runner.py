@@ -1,8 +1,15 @@
 import time
+from dataclasses import dataclass, replace
+from typing import Any, AsyncIterator
 
-from src.agents.survey_agent.catalog import SURVEY_QUESTION_CATALOG
+from src.agents.survey_agent.budget import PromptBudget, get_prompt_budget
+from src.agents.survey_agent.cache import get_routing_cache, routing_cache_key
+from src.agents.survey_agent.catalog import CompiledCatalog, get_catalog
+from src.agents.survey_agent.fast_path import match_answer
 from src.agents.survey_agent.formatter import (
+    FinalStreamParser,
     build_answers,
+    parse_extraction_output,
     parse_final_model_output,
     parse_routing_output,
 )
@@ -13,32 +20,64 @@ from src.agents.survey_agent.models import (
     survey_state_from_dict,
     survey_state_to_dict,
 )
-from src.agents.survey_agent.prompts import build_final_prompt, build_routing_prompt
+from src.agents.survey_agent.prompts import (
+    build_extraction_prompt,
+    build_final_prompt,
+    build_final_stream_prompt,
+    build_routing_prompt,
+)
+from src.agents.survey_agent.upstream import (
+    generate_extraction_output,
+    generate_final_output,
+    generate_routing_output,
+    stream_final_output,
+)
+from src.config.settings import get_extraction_settings, get_fast_path_settings
 from src.core.errors import CoreError
-from src.core.models import AgentResult, CoreRequest
+from src.core.metrics import (
+    EXTRACTED_ANSWERS,
+    EXTRACTION_ERRORS,
+    PARSE_FALLBACKS,
+    PROMPT_TOKENS,
+    PROVIDER_CALL_SECONDS,
+    STAGE_SECONDS,
+    SURVEY_TURNS,
+)
+from src.core.models import AgentResult, Answer, CoreRequest, MessageChunk
+from src.providers.base import DeadlineExceeded
+from src.providers.retry import RetryCounter
 from src.providers.vertex_ai import VertexAIProvider
 
 
-def _first_unanswered_question_id(answers_by_id: dict[str, str]) -> str | None:
-    for question in SURVEY_QUESTION_CATALOG:
-        question_id = question["question_id"]
-        if not answers_by_id.get(question_id, "").strip():
-            return question_id
-    return None
+def _upstream_error(exc: Exception) -> CoreError:
+    if isinstance(exc, DeadlineExceeded):
+        return CoreError("DEADLINE_EXCEEDED", "Request deadline exceeded.")
+    return CoreError("VERTEX_UNAVAILABLE", "Upstream model call failed.")
+
+
+@dataclass(frozen=True)
+class _PendingCompletion:
+    initial_message: str
+    sender_name: str
+    answers: list[Answer]
+    latency_start: float
+    deadline: float | None
+    retries: RetryCounter
+    # Turns including this one; "extraction" or "sequential" for SURVEY_TURNS.
+    turns: int
+    mode: str
 
 
 def _build_state(
+    catalog: CompiledCatalog,
     initial_message: str,
     current_question_id: str | None,
     answers_by_id: dict[str, str],
+    turns: int,
 ) -> SurveyState:
     state_answers = [
-        StateAnswer(
-            question_id=question["question_id"],
-            answer=answers_by_id[question["question_id"]],
-        )
-        for question in SURVEY_QUESTION_CATALOG
-        if answers_by_id.get(question["question_id"], "").strip()
+        StateAnswer(question_id=question_id, answer=answers_by_id[question_id])
+        for question_id in catalog.answered_ids(catalog.answered_mask(answers_by_id))
     ]
     return SurveyState(
         status="in_progress",
@@ -46,57 +85,168 @@ def _build_state(
         current_question_id=current_question_id,
         awaiting_question_id=current_question_id,
         answers=state_answers,
+        turns=turns,
     )
 
 
 def _safe_fallback_next_question_id(
+    catalog: CompiledCatalog,
     current_question_id: str | None,
     answers_by_id: dict[str, str],
 ) -> str | None:
     if current_question_id and not answers_by_id.get(current_question_id, "").strip():
         return current_question_id
-    return _first_unanswered_question_id(answers_by_id)
+    return catalog.first_unanswered(catalog.answered_mask(answers_by_id))
+
+
+def _fast_path_routing(
+    current_question: dict[str, Any],
+    current_user_message: str,
+    remaining_ids: list[str],
+) -> RoutingDecision | None:
+    settings = get_fast_path_settings()
+    if not settings.enabled:
+        return None
+    match = match_answer(
+        current_question, current_user_message, settings.min_confidence
+    )
+    if match is None:
+        return None
+    next_ids = [qid for qid in remaining_ids if qid != current_question["question_id"]]
+    return RoutingDecision(
+        next_question_id=next_ids[0] if next_ids else "END",
+        accepted_answer=True,
+        assistant_message="",
+        normalized_answer=match.normalized_answer,
+    )
 
 
-def _call_routing_model(
+async def _call_routing_model(
+    catalog: CompiledCatalog,
     provider: VertexAIProvider,
     initial_message: str,
     sender_name: str,
-    current_question: dict[str, str],
+    current_question: dict[str, Any],
     current_user_message: str,
     answers_by_id: dict[str, str],
     allowed_next_ids: list[str],
+    deadline: float | None = None,
+    retries: RetryCounter | None = None,
+    tenant_id: str | None = None,
 ) -> RoutingDecision:
-    prompt = build_routing_prompt(
-        initial_message=initial_message,
-        sender_name=sender_name,
-        current_question=current_question["question"],
-        current_question_id=current_question["question_id"],
-        current_user_message=current_user_message,
-        answers=[
-            {"question_id": qid, "answer": answer}
-            for qid, answer in answers_by_id.items()
-            if answer.strip()
-        ],
-        allowed_next_ids=allowed_next_ids,
-    )
+    cache = get_routing_cache()
+    cache_key = ""
+    if cache is not None:
+        cache_key = routing_cache_key(
+            catalog_fingerprint=catalog.fingerprint,
+            current_question_id=current_question["question_id"],
+            current_user_message=current_user_message,
+            answered_ids=catalog.answered_ids(catalog.answered_mask(answers_by_id)),
+            allowed_next_ids=allowed_next_ids,
+        )
+        cached_decision = cache.get(cache_key)
+        if cached_decision is not None:
+            return cached_decision
+
+    with STAGE_SECONDS.time("prompt_build"):
+        budget = get_prompt_budget()
+        prompt = build_routing_prompt(
+            initial_message=budget.initial_message(initial_message),
+            sender_name=sender_name,
+            current_question=current_question["question"],
+            current_question_id=current_question["question_id"],
+            current_user_message=budget.user_message(current_user_message),
+            answers=budget.answers(
+                [
+                    {"question_id": qid, "answer": answer}
+                    for qid, answer in answers_by_id.items()
+                    if answer.strip()
+                ]
+            ),
+            allowed_next_ids=allowed_next_ids,
+            catalog_block=catalog.prompt_block,
+        )
+    PROMPT_TOKENS.observe("routing", budget.tokens(prompt))
     try:
-        model_output = provider.generate(prompt)
+        with PROVIDER_CALL_SECONDS.time("routing"):
+            model_output = await generate_routing_output(
+                provider, prompt, deadline, retries, tenant=tenant_id
+            )
     except Exception as exc:
-        raise CoreError("VERTEX_UNAVAILABLE", "Upstream model call failed.") from exc
+        raise _upstream_error(exc) from exc
+
+    with STAGE_SECONDS.time("response_parse"):
+        routing = parse_routing_output(model_output)
+    # Clarifications are worded for the user who got them, so only accepted
+    # decisions are shared; their assistant_message is never shown.
+    if cache is not None and routing.accepted_answer:
+        cache.set(cache_key, replace(routing, assistant_message=""))
+    return routing
 
-    return parse_routing_output(model_output)
 
+async def _extract_answers(
+    catalog: CompiledCatalog,
+    provider: VertexAIProvider,
+    request: CoreRequest,
+    answers_by_id: dict[str, str],
+    retries: RetryCounter,
+) -> dict[str, str]:
+    """Answers the message gives to unanswered questions, in one model call.
+
+    Only answers at or above the configured confidence are returned. The
+    extraction is an optimization: when it fails the survey simply asks
+    every question in turn.
+    """
+    settings = get_extraction_settings()
+    unanswered = catalog.unanswered_ids(catalog.answered_mask(answers_by_id))
+    if not settings.enabled or not unanswered:
+        return {}
 
-def run_survey_agent(request: CoreRequest, provider: VertexAIProvider) -> AgentResult:
-    question_map = {
-        question["question_id"]: question for question in SURVEY_QUESTION_CATALOG
-    }
-    question_ids = set(question_map.keys())
+    with STAGE_SECONDS.time("prompt_build"):
+        budget = get_prompt_budget()
+        prompt = build_extraction_prompt(
+            budget.user_message(request.message_content),
+            request.sender_name,
+            unanswered,
+            catalog.prompt_block,
+        )
+    PROMPT_TOKENS.observe("extraction", budget.tokens(prompt))
+    try:
+        with PROVIDER_CALL_SECONDS.time("extraction"):
+            model_output = await generate_extraction_output(
+                provider, prompt, request.deadline, retries
+            )
+        with STAGE_SECONDS.time("response_parse"):
+            extracted = parse_extraction_output(model_output, unanswered)
+    except CoreError:
+        PARSE_FALLBACKS.inc("extraction")
+        return {}
+    except Exception as exc:
+        EXTRACTION_ERRORS.inc(type(exc).__name__)
+        return {}
+
+    accepted: dict[str, str] = {}
+    for item in extracted:
+        if item.confidence >= settings.min_confidence:
+            accepted[item.question_id] = item.answer
+            EXTRACTED_ANSWERS.inc("accepted")
+        else:
+            EXTRACTED_ANSWERS.inc("low_confidence")
+    return accepted
+
+
+async def _run_turn(
+    request: CoreRequest, provider: VertexAIProvider, retries: RetryCounter
+) -> AgentResult | _PendingCompletion:
+    # One catalog per turn, so a hot reload never changes it mid-turn.
+    catalog = get_catalog(request.catalog_path)
     answers_by_id: dict[str, str] = {}
     initial_message = request.message_content
     current_question_id = None
     state = survey_state_from_dict(request.agent_state)
+    turns = (state.turns if state is not None else 0) + 1
+    mode = "extraction" if get_extraction_settings().enabled else "sequential"
+    latency_start = time.monotonic()
 
     if state is not None:
         initial_message = state.initial_message
@@ -104,38 +254,45 @@ def run_survey_agent(request: CoreRequest, provider: VertexAIProvider) -> AgentR
         if not current_question_id:
             current_question_id = state.awaiting_question_id
         for item in state.answers:
-            if item.question_id in question_ids:
+            if item.question_id in catalog:
                 answers_by_id[item.question_id] = item.answer
 
-    if current_question_id not in question_ids:
-        current_question_id = _first_unanswered_question_id(answers_by_id)
+    if state is None:
+        answers_by_id.update(
+            await _extract_answers(catalog, provider, request, answers_by_id, retries)
+        )
+
+    if current_question_id not in catalog:
+        current_question_id = catalog.first_unanswered(
+            catalog.answered_mask(answers_by_id)
+        )
 
     if current_question_id is not None and state is None:
-        answers = build_answers(answers_by_id, SURVEY_QUESTION_CATALOG)
-        survey_state = _build_state(initial_message, current_question_id, answers_by_id)
+        answers = build_answers(answers_by_id, catalog.questions)
+        survey_state = _build_state(
+            catalog, initial_message, current_question_id, answers_by_id, turns
+        )
         return AgentResult(
             summary="Survey in progress.",
             answers=answers,
             model=provider.model_name,
-            latency_ms=0,
+            latency_ms=int((time.monotonic() - latency_start) * 1000),
             status="in_progress",
-            agent_message=question_map[current_question_id]["question"],
+            agent_message=catalog.question(current_question_id)["question"],
             agent_state=survey_state_to_dict(survey_state),
         )
 
-    latency_start = time.time()
     if current_question_id is not None:
-        current_question = question_map[current_question_id]
-        remaining_ids = [
-            question["question_id"]
-            for question in SURVEY_QUESTION_CATALOG
-            if not answers_by_id.get(question["question_id"], "").strip()
-        ]
+        current_question = catalog.question(current_question_id)
+        remaining_ids = catalog.unanswered_ids(catalog.answered_mask(answers_by_id))
         allowed_next_ids = [*remaining_ids, "END"]
         raw_user_answer = request.message_content.strip()
 
         try:
-            routing = _call_routing_model(
+            routing = _fast_path_routing(
+                current_question, raw_user_answer, remaining_ids
+            ) or await _call_routing_model(
+                catalog=catalog,
                 provider=provider,
                 initial_message=initial_message,
                 sender_name=request.sender_name,
@@ -143,24 +300,28 @@ def run_survey_agent(request: CoreRequest, provider: VertexAIProvider) -> AgentR
                 current_user_message=request.message_content,
                 answers_by_id=answers_by_id,
                 allowed_next_ids=allowed_next_ids,
+                deadline=request.deadline,
+                retries=retries,
+                tenant_id=request.tenant_id,
             )
         except CoreError as exc:
             if exc.code == "MODEL_PARSE_ERROR":
+                PARSE_FALLBACKS.inc("routing")
                 fallback_question_id = _safe_fallback_next_question_id(
-                    current_question_id, answers_by_id
+                    catalog, current_question_id, answers_by_id
                 )
-                answers = build_answers(answers_by_id, SURVEY_QUESTION_CATALOG)
+                answers = build_answers(answers_by_id, catalog.questions)
                 survey_state = _build_state(
-                    initial_message, fallback_question_id, answers_by_id
+                    catalog, initial_message, fallback_question_id, answers_by_id, turns
                 )
                 return AgentResult(
                     summary="Survey in progress.",
                     answers=answers,
                     model=provider.model_name,
-                    latency_ms=int((time.time() - latency_start) * 1000),
+                    latency_ms=int((time.monotonic() - latency_start) * 1000),
                     status="in_progress",
                     agent_message=(
-                        question_map[fallback_question_id]["question"]
+                        catalog.question(fallback_question_id)["question"]
                         if fallback_question_id
                         else "Please continue the survey."
                     ),
@@ -169,9 +330,9 @@ def run_survey_agent(request: CoreRequest, provider: VertexAIProvider) -> AgentR
             raise
 
         if not routing.accepted_answer:
-            answers = build_answers(answers_by_id, SURVEY_QUESTION_CATALOG)
+            answers = build_answers(answers_by_id, catalog.questions)
             survey_state = _build_state(
-                initial_message, current_question_id, answers_by_id
+                catalog, initial_message, current_question_id, answers_by_id, turns
             )
             clarification = routing.assistant_message or (
                 f"Please answer this question: {current_question['question']}"
@@ -180,7 +341,7 @@ def run_survey_agent(request: CoreRequest, provider: VertexAIProvider) -> AgentR
                 summary="Survey in progress.",
                 answers=answers,
                 model=provider.model_name,
-                latency_ms=int((time.time() - latency_start) * 1000),
+                latency_ms=int((time.monotonic() - latency_start) * 1000),
                 status="in_progress",
                 agent_message=clarification,
                 agent_state=survey_state_to_dict(survey_state),
@@ -193,15 +354,15 @@ def run_survey_agent(request: CoreRequest, provider: VertexAIProvider) -> AgentR
         )
         candidate_answer = normalized or raw_user_answer
         if not candidate_answer:
-            answers = build_answers(answers_by_id, SURVEY_QUESTION_CATALOG)
+            answers = build_answers(answers_by_id, catalog.questions)
             survey_state = _build_state(
-                initial_message, current_question_id, answers_by_id
+                catalog, initial_message, current_question_id, answers_by_id, turns
             )
             return AgentResult(
                 summary="Survey in progress.",
                 answers=answers,
                 model=provider.model_name,
-                latency_ms=int((time.time() - latency_start) * 1000),
+                latency_ms=int((time.monotonic() - latency_start) * 1000),
                 status="in_progress",
                 agent_message=f"Please answer this question: {current_question['question']}",
                 agent_state=survey_state_to_dict(survey_state),
@@ -209,70 +370,169 @@ def run_survey_agent(request: CoreRequest, provider: VertexAIProvider) -> AgentR
 
         answers_by_id[current_question_id] = candidate_answer
 
-        remaining_after_save = [
-            question["question_id"]
-            for question in SURVEY_QUESTION_CATALOG
-            if not answers_by_id.get(question["question_id"], "").strip()
-        ]
+        remaining_after_save = catalog.unanswered_ids(
+            catalog.answered_mask(answers_by_id)
+        )
         allowed_after_save = set([*remaining_after_save, "END"])
         next_question_id = routing.next_question_id
         if next_question_id not in allowed_after_save:
             next_question_id = _safe_fallback_next_question_id(
+                catalog,
                 current_question_id=None,
                 answers_by_id=answers_by_id,
             ) or "END"
 
         if next_question_id != "END":
-            answers = build_answers(answers_by_id, SURVEY_QUESTION_CATALOG)
-            survey_state = _build_state(initial_message, next_question_id, answers_by_id)
+            answers = build_answers(answers_by_id, catalog.questions)
+            survey_state = _build_state(
+                catalog, initial_message, next_question_id, answers_by_id, turns
+            )
             return AgentResult(
                 summary="Survey in progress.",
                 answers=answers,
                 model=provider.model_name,
-                latency_ms=int((time.time() - latency_start) * 1000),
+                latency_ms=int((time.monotonic() - latency_start) * 1000),
                 status="in_progress",
-                agent_message=question_map[next_question_id]["question"],
+                agent_message=catalog.question(next_question_id)["question"],
                 agent_state=survey_state_to_dict(survey_state),
             )
 
         if remaining_after_save:
             forced_next = remaining_after_save[0]
-            answers = build_answers(answers_by_id, SURVEY_QUESTION_CATALOG)
-            survey_state = _build_state(initial_message, forced_next, answers_by_id)
+            answers = build_answers(answers_by_id, catalog.questions)
+            survey_state = _build_state(
+                catalog, initial_message, forced_next, answers_by_id, turns
+            )
             return AgentResult(
                 summary="Survey in progress.",
                 answers=answers,
                 model=provider.model_name,
-                latency_ms=int((time.time() - latency_start) * 1000),
+                latency_ms=int((time.monotonic() - latency_start) * 1000),
                 status="in_progress",
-                agent_message=question_map[forced_next]["question"],
+                agent_message=catalog.question(forced_next)["question"],
                 agent_state=survey_state_to_dict(survey_state),
             )
 
-    answers = build_answers(answers_by_id, SURVEY_QUESTION_CATALOG)
-    prompt = build_final_prompt(
-        initial_message,
-        request.sender_name,
+    return _PendingCompletion(
+        initial_message=initial_message,
+        sender_name=request.sender_name,
+        answers=build_answers(answers_by_id, catalog.questions),
+        latency_start=latency_start,
+        deadline=request.deadline,
+        retries=retries,
+        turns=turns,
+        mode=mode,
+    )
+
+
+def _answer_items(
+    answers: list[Answer], budget: PromptBudget
+) -> list[dict[str, str]]:
+    return budget.answers(
         [
             {"question_id": answer.question_id, "answer": answer.answer}
             for answer in answers
-        ],
+        ]
     )
+
+
+async def _complete_survey(
+    pending: _PendingCompletion, provider: VertexAIProvider
+) -> AgentResult:
+    with STAGE_SECONDS.time("prompt_build"):
+        budget = get_prompt_budget()
+        prompt = build_final_prompt(
+            budget.initial_message(pending.initial_message),
+            pending.sender_name,
+            _answer_items(pending.answers, budget),
+        )
+    PROMPT_TOKENS.observe("final", budget.tokens(prompt))
     try:
-        model_output = provider.generate(prompt)
+        with PROVIDER_CALL_SECONDS.time("final"):
+            model_output = await generate_final_output(
+                provider, prompt, pending.deadline, pending.retries
+            )
     except Exception as exc:
-        raise CoreError("VERTEX_UNAVAILABLE", "Upstream model call failed.") from exc
+        raise _upstream_error(exc) from exc
 
-    latency_ms = int((time.time() - latency_start) * 1000)
-    summary, agent_message = parse_final_model_output(model_output)
+    latency_ms = int((time.monotonic() - pending.latency_start) * 1000)
+    with STAGE_SECONDS.time("response_parse"):
+        summary, agent_message = parse_final_model_output(model_output)
+    SURVEY_TURNS.observe(pending.mode, pending.turns)
 
     return AgentResult(
         summary=summary,
-        answers=answers,
+        answers=pending.answers,
         model=provider.model_name,
         latency_ms=latency_ms,
         status="completed",
         agent_message=agent_message,
         agent_state=None,
+        retries=pending.retries.retries,
     )
 
+
+async def run_survey_agent(
+    request: CoreRequest, provider: VertexAIProvider
+) -> AgentResult:
+    retries = RetryCounter()
+    turn = await _run_turn(request, provider, retries)
+    if isinstance(turn, AgentResult):
+        return replace(turn, retries=retries.retries)
+    return await _complete_survey(turn, provider)
+
+
+async def stream_survey_agent(
+    request: CoreRequest, provider: VertexAIProvider
+) -> AsyncIterator[MessageChunk | AgentResult]:
+    """Like run_survey_agent, but streams the final agent_message as it is generated.
+
+    In-progress turns yield only their AgentResult; the completion turn yields
+    MessageChunk items followed by the AgentResult.
+    """
+    retries = RetryCounter()
+    turn = await _run_turn(request, provider, retries)
+    if isinstance(turn, AgentResult):
+        yield replace(turn, retries=retries.retries)
+        return
+
+    with STAGE_SECONDS.time("prompt_build"):
+        budget = get_prompt_budget()
+        prompt = build_final_stream_prompt(
+            budget.initial_message(turn.initial_message),
+            turn.sender_name,
+            _answer_items(turn.answers, budget),
+        )
+    PROMPT_TOKENS.observe("final", budget.tokens(prompt))
+    parser = FinalStreamParser()
+    ttfb_ms = None
+    provider_start = time.monotonic()
+    chunks = stream_final_output(provider, prompt, turn.deadline, retries)
+    while True:
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            break
+        except Exception as exc:
+            raise _upstream_error(exc) from exc
+        if ttfb_ms is None:
+            ttfb_ms = int((time.monotonic() - turn.latency_start) * 1000)
+        text = parser.feed(chunk)
+        if text:
+            yield MessageChunk(text=text)
+
+    PROVIDER_CALL_SECONDS.observe("final", time.monotonic() - provider_start)
+    with STAGE_SECONDS.time("response_parse"):
+        summary, agent_message = parser.finish()
+    SURVEY_TURNS.observe(turn.mode, turn.turns)
+    yield AgentResult(
+        summary=summary,
+        answers=turn.answers,
+        model=provider.model_name,
+        latency_ms=int((time.monotonic() - turn.latency_start) * 1000),
+        status="completed",
+        agent_message=agent_message,
+        agent_state=None,
+        ttfb_ms=ttfb_ms,
+        retries=retries.retries,
+    )
@@ -0,0 +1,64 @@
+from typing import Any, Dict, Optional, Tuple
+
+from src.agents.survey_agent.models import (
+    StateAnswer,
+    SurveyState,
+    survey_state_from_dict,
+)
+from src.agents.survey_agent.state_token import decode_state_token, encode_state_token
+from src.config.settings import StateTokenSettings, get_state_token_settings
+
+
+def _state_token_secret(settings: StateTokenSettings) -> bytes:
+    if not settings.secret:
+        raise ValueError("Missing required configuration.")
+    return settings.secret.encode("utf-8")
+
+
+def decode_survey_state(
+    survey_state: Optional[Any],
+    state_token: Optional[str],
+    catalog_path: Optional[str] = None,
+) -> Optional[SurveyState]:
+    """The survey state a request carries, as a token or a validated model.
+
+    ``survey_state`` has already been checked against the request schema, so it
+    is read field by field instead of being dumped to a dict and parsed again.
+    """
+    if state_token is not None:
+        settings = get_state_token_settings()
+        return decode_state_token(
+            state_token,
+            _state_token_secret(settings),
+            max_age_seconds=settings.max_age_seconds,
+            catalog_path=catalog_path,
+        )
+    if survey_state is None:
+        return None
+    return SurveyState(
+        status=survey_state.status,
+        initial_message=survey_state.initial_message,
+        current_question_id=survey_state.current_question_id,
+        awaiting_question_id=survey_state.awaiting_question_id,
+        answers=[
+            StateAnswer(question_id=item.question_id, answer=item.answer)
+            for item in survey_state.answers
+        ],
+        turns=survey_state.turns,
+    )
+
+
+def encode_survey_state(
+    agent_state: Optional[Dict[str, Any]], catalog_path: Optional[str] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """``(survey_state, state_token)`` for a response, per SURVEY_STATE_FORMAT."""
+    settings = get_state_token_settings()
+    # The runner builds a fresh dict every turn, so it is returned without a copy.
+    if agent_state is None or settings.response_format != "token":
+        return agent_state, None
+    state = survey_state_from_dict(agent_state)
+    if state is None:
+        return None, None
+    return None, encode_state_token(
+        state, _state_token_secret(settings), catalog_path=catalog_path
+    )
@@ -0,0 +1,145 @@
+import base64
+import hashlib
+import hmac
+import struct
+import time
+import zlib
+from typing import List, Optional
+
+from src.agents.survey_agent.catalog import CompiledCatalog, get_catalog
+from src.agents.survey_agent.models import StateAnswer, SurveyState
+from src.core.errors import CoreError
+
+# Token layout (before base64url):
+#   header: version (B), catalog fingerprint (4s), issued at (I, unix seconds),
+#           current index (H), awaiting index (H)
+#   body:   zlib(initial message, answer count, [question index, answer]..., turns (H))
+#   mac:    first 16 bytes of HMAC-SHA256(secret, header + body)
+# Version 1 tokens carried no issue time and are no longer accepted.
+TOKEN_VERSION = 2
+_HEADER = struct.Struct(">B4sIHH")
+_NO_QUESTION = 0xFFFF
+_MAC_SIZE = 16
+DEFAULT_MAX_AGE_SECONDS = 86400.0
+# Tolerated clock difference between workers for tokens "issued in the future".
+_CLOCK_SKEW_SECONDS = 300
+
+
+def _invalid_token() -> CoreError:
+    return CoreError("INVALID_STATE_TOKEN", "Survey state token is invalid.")
+
+
+def _pack_text(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return struct.pack(">I", len(data)) + data
+
+
+def _unpack_text(body: bytes, offset: int) -> tuple[str, int]:
+    (size,) = struct.unpack_from(">I", body, offset)
+    offset += 4
+    if offset + size > len(body):
+        raise ValueError("truncated text")
+    return body[offset : offset + size].decode("utf-8"), offset + size
+
+
+def _question_index(catalog: CompiledCatalog, question_id: str | None) -> int:
+    if question_id is None:
+        return _NO_QUESTION
+    return catalog.index.get(question_id, _NO_QUESTION)
+
+
+def _question_id(catalog: CompiledCatalog, index: int) -> str | None:
+    if index == _NO_QUESTION:
+        return None
+    if index >= len(catalog.question_ids):
+        raise ValueError("unknown question index")
+    return catalog.question_ids[index]
+
+
+def encode_state_token(
+    state: SurveyState,
+    secret: bytes,
+    issued_at: Optional[float] = None,
+    catalog_path: Optional[str] = None,
+) -> str:
+    # Tokens are bound to the catalog they were issued under; a reloaded
+    # catalog with different ids invalidates outstanding tokens.
+    catalog = get_catalog(catalog_path)
+    if issued_at is None:
+        issued_at = time.time()
+    answers = [answer for answer in state.answers if answer.question_id in catalog]
+    body = bytearray(_pack_text(state.initial_message))
+    body += struct.pack(">H", len(answers))
+    for answer in answers:
+        body += struct.pack(">H", catalog.index[answer.question_id])
+        body += _pack_text(answer.answer)
+    body += struct.pack(">H", min(state.turns, 0xFFFF))
+    payload = _HEADER.pack(
+        TOKEN_VERSION,
+        catalog.fingerprint[:4],
+        int(issued_at),
+        _question_index(catalog, state.current_question_id),
+        _question_index(catalog, state.awaiting_question_id),
+    ) + zlib.compress(bytes(body))
+    mac = hmac.new(secret, payload, hashlib.sha256).digest()[:_MAC_SIZE]
+    return base64.urlsafe_b64encode(payload + mac).rstrip(b"=").decode("ascii")
+
+
+def decode_state_token(
+    token: str,
+    secret: bytes,
+    max_age_seconds: float = DEFAULT_MAX_AGE_SECONDS,
+    now: Optional[float] = None,
+    catalog_path: Optional[str] = None,
+) -> SurveyState:
+    """Verify and unpack a token issued within the last ``max_age_seconds``.
+
+    The age limit bounds how far back a client can roll a survey by replaying
+    an older token it was once given.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except ValueError as exc:
+        raise _invalid_token() from exc
+    if len(raw) < _HEADER.size + _MAC_SIZE:
+        raise _invalid_token()
+
+    payload, mac = raw[:-_MAC_SIZE], raw[-_MAC_SIZE:]
+    expected = hmac.new(secret, payload, hashlib.sha256).digest()[:_MAC_SIZE]
+    if not hmac.compare_digest(mac, expected):
+        raise _invalid_token()
+
+    catalog = get_catalog(catalog_path)
+    version, fingerprint, issued_at, current_index, awaiting_index = (
+        _HEADER.unpack_from(payload)
+    )
+    if version != TOKEN_VERSION or fingerprint != catalog.fingerprint[:4]:
+        raise _invalid_token()
+    age = (time.time() if now is None else now) - issued_at
+    if age > max_age_seconds or age < -_CLOCK_SKEW_SECONDS:
+        raise _invalid_token()
+
+    try:
+        body = zlib.decompress(payload[_HEADER.size :])
+        initial_message, offset = _unpack_text(body, 0)
+        (answer_count,) = struct.unpack_from(">H", body, offset)
+        offset += 2
+        answers: List[StateAnswer] = []
+        for _ in range(answer_count):
+            (index,) = struct.unpack_from(">H", body, offset)
+            answer, offset = _unpack_text(body, offset + 2)
+            question_id = _question_id(catalog, index)
+            if question_id is None:
+                raise ValueError("missing question index")
+            answers.append(StateAnswer(question_id=question_id, answer=answer))
+        (turns,) = struct.unpack_from(">H", body, offset)
+        return SurveyState(
+            status="in_progress",
+            initial_message=initial_message,
+            current_question_id=_question_id(catalog, current_index),
+            awaiting_question_id=_question_id(catalog, awaiting_index),
+            answers=answers,
+            turns=turns,
+        )
+    except (zlib.error, struct.error, UnicodeDecodeError, ValueError) as exc:
+        raise _invalid_token() from exc
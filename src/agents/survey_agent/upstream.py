@@ -0,0 +1,180 @@
+import threading
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from src.agents.survey_agent.batching import get_routing_batcher
+from src.config.settings import HedgeSettings, get_hedge_settings, get_retry_settings
+from src.core.stats import register_stats_source
+from src.core.tracing import start_span
+from src.providers.base import ModelProvider, agenerate, astream, with_deadline
+from src.providers.hedging import Hedger
+from src.providers.retry import RetryCounter, RetryPolicy, call_with_retry
+
+_hedger_lock = threading.Lock()
+_hedge_settings: Optional[HedgeSettings] = None
+_hedgers: Dict[str, Hedger] = {}
+
+
+def _get_hedger(kind: str) -> Optional[Hedger]:
+    """Return the process-wide hedger for ``kind`` calls, or None when disabled."""
+    global _hedge_settings
+    with _hedger_lock:
+        if _hedge_settings is None:
+            _hedge_settings = get_hedge_settings()
+        if not _hedge_settings.enabled:
+            return None
+        hedger = _hedgers.get(kind)
+        if hedger is None:
+            hedger = Hedger(
+                percentile=_hedge_settings.percentile,
+                min_delay_seconds=_hedge_settings.min_delay_ms / 1000,
+                min_samples=_hedge_settings.min_samples,
+            )
+            _hedgers[kind] = hedger
+        return hedger
+
+
+def reset_hedgers() -> None:
+    """Drop hedgers and their latency history; configuration is re-read."""
+    global _hedge_settings
+    with _hedger_lock:
+        _hedge_settings = None
+        _hedgers.clear()
+
+
+def _retry_policy() -> RetryPolicy:
+    settings = get_retry_settings()
+    return RetryPolicy(
+        max_attempts=settings.max_attempts,
+        base_delay_seconds=settings.base_delay_ms / 1000,
+        max_delay_seconds=settings.max_delay_ms / 1000,
+    )
+
+
+async def _traced_agenerate(
+    provider: ModelProvider, prompt: str, kind: str, deadline: Optional[float] = None
+) -> str:
+    with start_span(
+        "vertex.generate",
+        kind=kind,
+        model=provider.model_name,
+        prompt_chars=len(prompt),
+    ):
+        return await agenerate(provider, prompt, deadline)
+
+
+async def _generate(
+    provider: ModelProvider, prompt: str, deadline: Optional[float], kind: str
+) -> str:
+    hedger = _get_hedger(kind)
+    if hedger is None:
+        return await _traced_agenerate(provider, prompt, kind, deadline)
+    return await with_deadline(
+        hedger.call(lambda: _traced_agenerate(provider, prompt, kind)), deadline
+    )
+
+
+async def generate_routing_output(
+    provider: ModelProvider,
+    prompt: str,
+    deadline: Optional[float] = None,
+    retries: Optional[RetryCounter] = None,
+    tenant: Optional[str] = None,
+) -> str:
+    # Batched calls are not hedged; a hedge would duplicate the whole batch.
+    # A failed batch is retried by each caller, so retries batch up again.
+    # Prompts are only batched with others from the same tenant and catalog
+    # (the batch states the shared prefix once); prompts without a known
+    # tenant are always sent on their own.
+    batcher = get_routing_batcher(provider) if tenant else None
+    partition = (tenant, getattr(prompt, "cacheable_prefix", ""))
+    if batcher is not None:
+
+        async def submit() -> str:
+            with start_span(
+                "vertex.generate",
+                kind="routing",
+                model=provider.model_name,
+                prompt_chars=len(prompt),
+                batched=True,
+            ):
+                return await batcher.submit(prompt, deadline, partition=partition)
+
+        return await call_with_retry(submit, _retry_policy(), deadline, retries)
+    return await call_with_retry(
+        lambda: _generate(provider, prompt, deadline, kind="routing"),
+        _retry_policy(),
+        deadline,
+        retries,
+    )
+
+
+async def generate_extraction_output(
+    provider: ModelProvider,
+    prompt: str,
+    deadline: Optional[float] = None,
+    retries: Optional[RetryCounter] = None,
+) -> str:
+    return await call_with_retry(
+        lambda: _generate(provider, prompt, deadline, kind="extraction"),
+        _retry_policy(),
+        deadline,
+        retries,
+    )
+
+
+async def generate_final_output(
+    provider: ModelProvider,
+    prompt: str,
+    deadline: Optional[float] = None,
+    retries: Optional[RetryCounter] = None,
+) -> str:
+    return await call_with_retry(
+        lambda: _generate(provider, prompt, deadline, kind="final"),
+        _retry_policy(),
+        deadline,
+        retries,
+    )
+
+
+async def stream_final_output(
+    provider: ModelProvider,
+    prompt: str,
+    deadline: Optional[float] = None,
+    retries: Optional[RetryCounter] = None,
+) -> AsyncIterator[str]:
+    """Stream the final output; only opening the stream is retried.
+
+    Once a chunk has been forwarded a failure is final, since the caller has
+    already relayed partial text.
+    """
+
+    async def open_stream() -> Tuple[Optional[str], AsyncIterator[str]]:
+        chunks = astream(provider, prompt, deadline)
+        with start_span(
+            "vertex.stream_open",
+            kind="final",
+            model=provider.model_name,
+            prompt_chars=len(prompt),
+        ):
+            try:
+                return await anext(chunks), chunks
+            except StopAsyncIteration:
+                return None, chunks
+
+    first_chunk, chunks = await call_with_retry(
+        open_stream, _retry_policy(), deadline, retries
+    )
+    if first_chunk is None:
+        return
+    yield first_chunk
+    async for chunk in chunks:
+        yield chunk
+
+
+def _hedging_stats() -> Dict[str, Any]:
+    with _hedger_lock:
+        hedgers = dict(_hedgers)
+    return {kind: hedger.stats() for kind, hedger in hedgers.items()}
+
+
+register_stats_source("survey_hedging", _hedging_stats)
@@ -1,21 +1,57 @@
-from fastapi import APIRouter
+import asyncio
+import hashlib
+import json
+import math
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from fastapi import APIRouter, Header, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
 
-from src.agents.survey_agent import run_survey_agent
 from src.api.schemas import (
-    AnswerItem,
     ErrorDetail,
     ErrorResponse,
-    Meta,
-    Result,
     SuccessResponse,
     SurveyRequest,
     SurveyResponse,
 )
-from src.config.settings import get_configured_path, get_settings
-from src.core.formatter import serialize_agent_state
-from src.core.agent import register_agent_runner, run_agent
+from src.config.settings import (
+    get_configured_path,
+    get_context_cache_settings,
+    get_deadline_settings,
+    get_failover_settings,
+    get_prompt_budget_settings,
+    get_settings,
+    get_structured_output_settings,
+    get_warmup_settings,
+)
+from src.core.agent import (
+    AgentEntryPoint,
+    configure_agents,
+    decode_agent_state,
+    encode_agent_state,
+    preload_agents,
+    run_agent_async,
+    run_agent_stream,
+)
+from src.core.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    get_admission_controller,
+)
 from src.core.errors import CoreError
-from src.core.models import CoreRequest
+from src.core.idempotency import get_idempotency_cache
+from src.core.metrics import CORE_ERRORS, STAGE_SECONDS, render_metrics
+from src.core.models import AgentResult, CoreRequest, MessageChunk
+from src.core.sessions import get_session_store
+from src.core.stats import collect_stats, register_stats_source
+from src.core.tracing import start_span
+from src.core.warmup import WarmupStep, get_warmup
+from src.providers.base import agenerate
+from src.providers.context_cache import ContextCachePolicy
+from src.providers.failover import BreakerPolicy
+from src.providers.pool import PROVIDER_POOL
 from src.providers.vertex_ai import VertexAIProvider
 
 router = APIRouter()
@@ -24,83 +60,419 @@ SURVEY_PATH = get_configured_path(
     default="/survey",
     legacy_env_key="SURVEY_PATH",
 )
-PATH_TO_AGENT_KEY = {
-    SURVEY_PATH: "survey",
-}
-register_agent_runner(PATH_TO_AGENT_KEY[SURVEY_PATH], run_survey_agent)
+# Agents are imported on their first request (or at startup when preloaded),
+# so adding agents does not slow down importing the app.
+SURVEY_AGENT = AgentEntryPoint(
+    key="survey",
+    path=SURVEY_PATH,
+    runner="src.agents.survey_agent:run_survey_agent",
+    stream_runner="src.agents.survey_agent:stream_survey_agent",
+    decode_state="src.agents.survey_agent:decode_survey_state",
+    encode_state="src.agents.survey_agent:encode_survey_state",
+)
+AGENTS = configure_agents(default=SURVEY_AGENT)
+register_stats_source("provider_pool", lambda: PROVIDER_POOL.stats().as_dict())
+register_stats_source("vertex_failover", PROVIDER_POOL.failover_stats)
+register_stats_source("vertex_context_cache", PROVIDER_POOL.context_cache_stats)
+
+
+def _context_cache_policy() -> Optional[ContextCachePolicy]:
+    settings = get_context_cache_settings()
+    if not settings.enabled:
+        return None
+    return ContextCachePolicy(
+        ttl_seconds=settings.ttl_seconds,
+        refresh_seconds=settings.refresh_seconds,
+        min_prefix_chars=int(
+            settings.min_prefix_tokens * get_prompt_budget_settings().chars_per_token
+        ),
+    )
 
 
 def get_vertex_provider() -> VertexAIProvider:
     settings = get_settings()
-    return VertexAIProvider(
+    cache_policy = _context_cache_policy()
+    structured_output = get_structured_output_settings().enabled
+    if len(settings.endpoints) > 1:
+        failover = get_failover_settings()
+        return PROVIDER_POOL.get_failover(
+            model_name=settings.vertex_model,
+            endpoints=[
+                (endpoint.project, endpoint.region) for endpoint in settings.endpoints
+            ],
+            policy=BreakerPolicy(
+                error_rate=failover.error_rate,
+                min_calls=failover.min_calls,
+                window=failover.window,
+                open_seconds=failover.open_seconds,
+                latency_threshold_ms=failover.latency_threshold_ms,
+            ),
+            base_url=settings.base_url,
+            access_token=settings.access_token,
+            cache_policy=cache_policy,
+            structured_output=structured_output,
+        )
+    return PROVIDER_POOL.get(
         model_name=settings.vertex_model,
         project=settings.gcp_project,
         location=settings.gcp_region,
+        base_url=settings.base_url,
+        access_token=settings.access_token,
+        cache_policy=cache_policy,
+        structured_output=structured_output,
     )
 
 
+WARMUP_PROMPT = "Reply with the single word OK."
+
+
+async def _warmup_generation() -> None:
+    await agenerate(get_vertex_provider(), WARMUP_PROMPT)
+
+
+async def run_warmup() -> bool:
+    """Preload hot agents and build the provider; /ready turns green after this.
+
+    Blocking imports and client construction run in worker threads so that
+    /health keeps answering during warm-up. The optional generation warms up
+    credentials and the connection; its failure does not block readiness.
+    Failed required steps are retried with backoff. Any other error, such as
+    invalid warm-up settings, marks the warm-up failed and shows in /stats.
+    """
+    warmup = get_warmup()
+    try:
+        settings = get_warmup_settings()
+        steps = [WarmupStep("agents", lambda: asyncio.to_thread(preload_agents))]
+        if settings.enabled:
+            steps.append(
+                WarmupStep("provider", lambda: asyncio.to_thread(get_vertex_provider))
+            )
+            if settings.generate:
+                steps.append(
+                    WarmupStep("generate", _warmup_generation, required=False)
+                )
+        return await warmup.run(
+            steps,
+            settings.timeout_ms / 1000,
+            retry_base_seconds=settings.retry_base_ms / 1000,
+            retry_max_seconds=settings.retry_max_ms / 1000,
+        )
+    except Exception as exc:
+        warmup.fail(exc)
+        return False
+
+
+def _idempotency_key(request: SurveyRequest, agent_key: str) -> str:
+    # Retries resend the same body; hashing it keeps reused ids from colliding.
+    body_hash = hashlib.sha256(request.model_dump_json().encode("utf-8")).hexdigest()
+    return f"{agent_key}:{request.message.id}:{request.correlation_id}:{body_hash}"
+
+
 @router.get("/health")
 def health() -> dict:
     return {"ok": True}
 
 
-@router.post(SURVEY_PATH, response_model=SurveyResponse)
-def survey(request: SurveyRequest) -> SurveyResponse:
-    try:
-        provider = get_vertex_provider()
-        core_request = CoreRequest(
-            source=request.source,
-            event_type=request.event_type,
-            message_content=request.message.content,
-            sender_name=request.sender.display_name,
-            mentions=[mention.model_dump() for mention in request.mentions],
-            correlation_id=request.correlation_id,
-            agent_state=(
-                request.survey_state.model_dump()
-                if request.survey_state is not None
-                else None
-            ),
+@router.get("/ready")
+def ready(response: Response) -> dict:
+    warmup = get_warmup()
+    if not warmup.ready:
+        response.status_code = 503
+    return {"ok": warmup.ready, "status": warmup.status}
+
+
+@router.get("/stats")
+def stats() -> dict:
+    return collect_stats()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _request_deadline(timeout_ms: Optional[int]) -> float:
+    settings = get_deadline_settings()
+    if timeout_ms is None or timeout_ms <= 0:
+        timeout_ms = settings.default_timeout_ms
+    return time.monotonic() + min(timeout_ms, settings.max_timeout_ms) / 1000
+
+
+def _admission_key(request: SurveyRequest) -> str:
+    if request.team is None:
+        return "-"
+    return f"{request.team.id}/{request.team.channel_id}"
+
+
+async def _admit(
+    request: SurveyRequest, deadline: float
+) -> Optional[AdmissionController]:
+    admission = get_admission_controller()
+    if admission is not None:
+        await admission.acquire(_admission_key(request), deadline)
+    return admission
+
+
+def _retry_after(exc: AdmissionRejected) -> str:
+    return str(max(1, math.ceil(exc.retry_after)))
+
+
+def _core_request(
+    request: SurveyRequest, agent_key: str, deadline: float
+) -> CoreRequest:
+    with STAGE_SECONDS.time("state_decode"):
+        agent_state = decode_agent_state(
+            agent_key, request.survey_state, request.state_token
         )
-        result = run_agent(core_request, provider, agent_key=PATH_TO_AGENT_KEY[SURVEY_PATH])
-        return SuccessResponse(
-            ok=True,
-            correlation_id=request.correlation_id,
-            result=Result(
-                summary=result.summary,
-                answers=[
-                    AnswerItem(
-                        question_id=answer.question_id,
-                        question=answer.question,
-                        answer=answer.answer,
-                        solution_id=answer.solution_id,
-                    )
+    return CoreRequest(
+        source=request.source,
+        event_type=request.event_type,
+        message_content=request.message.content,
+        sender_name=request.sender.display_name,
+        mentions=[mention.model_dump() for mention in request.mentions],
+        correlation_id=request.correlation_id,
+        agent_state=agent_state,
+        session_id=request.session_id,
+        deadline=deadline,
+        tenant_id=request.team.id if request.team is not None else None,
+    )
+
+
+def _success_response(
+    request: SurveyRequest, result: AgentResult, agent_key: str
+) -> SuccessResponse:
+    with STAGE_SECONDS.time("serialization"):
+        return _build_success_response(request, result, agent_key)
+
+
+def _build_success_response(
+    request: SurveyRequest, result: AgentResult, agent_key: str
+) -> SuccessResponse:
+    survey_state, state_token = encode_agent_state(agent_key, result.agent_state)
+    # Validated once, as a plain dict, rather than model by nested model.
+    return SuccessResponse.model_validate(
+        {
+            "ok": True,
+            "correlation_id": request.correlation_id,
+            "result": {
+                "summary": result.summary,
+                "answers": [
+                    {
+                        "question_id": answer.question_id,
+                        "question": answer.question,
+                        "answer": answer.answer,
+                        "solution_id": answer.solution_id,
+                    }
                     for answer in result.answers
                 ],
-                status=result.status,
-                agent_message=result.agent_message,
-                survey_state=serialize_agent_state(result.agent_state),
-            ),
-            meta=Meta(model=result.model, latency_ms=result.latency_ms),
-        )
-    except CoreError as exc:
-        return ErrorResponse(
-            ok=False,
-            correlation_id=request.correlation_id,
-            error=ErrorDetail(code=exc.code, message=exc.message),
+                "status": result.status,
+                "agent_message": result.agent_message,
+                "survey_state": survey_state,
+                "state_token": state_token,
+                "session_id": result.session_id,
+            },
+            "meta": {
+                "model": result.model,
+                "latency_ms": result.latency_ms,
+                "ttfb_ms": result.ttfb_ms,
+                "retries": result.retries,
+            },
+        }
+    )
+
+
+def _json_response(
+    body: BaseModel, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Serialize an already validated body straight to JSON bytes.
+
+    Returning a Response skips FastAPI's response_model pass, which would
+    validate the body against SurveyResponse again and re-encode it.
+    """
+    return Response(
+        content=type(body).__pydantic_serializer__.to_json(body),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def _error_response(request: SurveyRequest, exc: Exception) -> ErrorResponse:
+    if isinstance(exc, CoreError):
+        CORE_ERRORS.inc(exc.code)
+        error = ErrorDetail(code=exc.code, message=exc.message)
+    elif isinstance(exc, ValueError):
+        error = ErrorDetail(
+            code="CONFIG_ERROR", message="Missing required configuration."
         )
-    except ValueError:
-        return ErrorResponse(
-            ok=False,
-            correlation_id=request.correlation_id,
-            error=ErrorDetail(
-                code="CONFIG_ERROR", message="Missing required configuration."
-            ),
+    else:
+        error = ErrorDetail(code="INTERNAL_ERROR", message="Unexpected server error.")
+    return ErrorResponse(ok=False, correlation_id=request.correlation_id, error=error)
+
+
+def _sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+class _AdmittedStreamingResponse(StreamingResponse):
+    """Streaming response that frees its admission slot however sending ends.
+
+    The generator's own ``finally`` does not run when the client disconnects
+    before the stream is exhausted, so the slot is released here instead.
+    """
+
+    def __init__(
+        self, content: AsyncIterator[str], admission: Optional[AdmissionController]
+    ) -> None:
+        super().__init__(content, media_type="text/event-stream")
+        self._admission = admission
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            admission, self._admission = self._admission, None
+            if admission is not None:
+                admission.release()
+
+
+def _agent_endpoint(path: str, agent_key: str) -> Callable[..., Any]:
+    async def agent_turn(
+        request: SurveyRequest,
+        timeout_ms: Optional[int] = Header(default=None, alias="X-Request-Timeout-Ms"),
+    ) -> Response:
+        return await _agent_turn(request, timeout_ms, path, agent_key)
+
+    return agent_turn
+
+
+async def _agent_turn(
+    request: SurveyRequest,
+    timeout_ms: Optional[int],
+    path: str,
+    agent_key: str,
+) -> Response:
+    with start_span("survey.request", correlation_id=request.correlation_id, path=path):
+        admission = None
+        try:
+            deadline = _request_deadline(timeout_ms)
+            admission = await _admit(request, deadline)
+            provider = get_vertex_provider()
+            core_request = _core_request(request, agent_key, deadline)
+            session_store = get_session_store()
+            idempotency = get_idempotency_cache()
+            if idempotency is None:
+                result = await run_agent_async(
+                    core_request, provider, agent_key, session_store=session_store
+                )
+            else:
+                result = await idempotency.run(
+                    _idempotency_key(request, agent_key),
+                    lambda: run_agent_async(
+                        core_request,
+                        provider,
+                        agent_key,
+                        session_store=session_store,
+                    ),
+                )
+            with STAGE_SECONDS.time("serialization"):
+                return _json_response(
+                    _build_success_response(request, result, agent_key)
+                )
+        except AdmissionRejected as exc:
+            return _json_response(
+                _error_response(request, exc),
+                status_code=429,
+                headers={"Retry-After": _retry_after(exc)},
+            )
+        except Exception as exc:
+            return _json_response(_error_response(request, exc))
+        finally:
+            if admission is not None:
+                admission.release()
+
+
+def _agent_stream_endpoint(path: str, agent_key: str) -> Callable[..., Any]:
+    async def agent_stream(
+        request: SurveyRequest,
+        timeout_ms: Optional[int] = Header(default=None, alias="X-Request-Timeout-Ms"),
+    ) -> Response:
+        return await _agent_stream(request, timeout_ms, path, agent_key)
+
+    return agent_stream
+
+
+async def _agent_stream(
+    request: SurveyRequest,
+    timeout_ms: Optional[int],
+    path: str,
+    agent_key: str,
+) -> Response:
+    """Server-Sent Events variant of the agent endpoint.
+
+    Emits ``message_chunk`` events with ``{"text": ...}`` while the final
+    agent_message is generated, then one ``result`` event carrying the regular
+    success body, or an ``error`` event carrying the regular error body.
+    Requests rejected by admission control get a plain 429 error body instead.
+    """
+    admission = None
+    setup_error: Optional[Exception] = None
+    try:
+        deadline = _request_deadline(timeout_ms)
+        admission = await _admit(request, deadline)
+    except AdmissionRejected as exc:
+        return JSONResponse(
+            status_code=429,
+            content=_error_response(request, exc).model_dump(),
+            headers={"Retry-After": _retry_after(exc)},
         )
-    except Exception:
-        return ErrorResponse(
-            ok=False,
+    except Exception as exc:
+        setup_error = exc
+
+    async def events() -> AsyncIterator[str]:
+        with start_span(
+            "survey.stream",
             correlation_id=request.correlation_id,
-            error=ErrorDetail(
-                code="INTERNAL_ERROR", message="Unexpected server error."
-            ),
-        )
+            path=path,
+        ):
+            try:
+                if setup_error is not None:
+                    raise setup_error
+                provider = get_vertex_provider()
+                async for event in run_agent_stream(
+                    _core_request(request, agent_key, deadline),
+                    provider,
+                    agent_key,
+                    session_store=get_session_store(),
+                ):
+                    if isinstance(event, MessageChunk):
+                        yield _sse_event(
+                            "message_chunk", json.dumps({"text": event.text})
+                        )
+                    else:
+                        response = _success_response(request, event, agent_key)
+                        yield _sse_event("result", response.model_dump_json())
+            except Exception as exc:
+                yield _sse_event(
+                    "error", _error_response(request, exc).model_dump_json()
+                )
+
+    return _AdmittedStreamingResponse(events(), admission)
+
+
+for _entry in AGENTS:
+    router.add_api_route(
+        _entry.path,
+        _agent_endpoint(_entry.path, _entry.key),
+        methods=["POST"],
+        response_model=SurveyResponse,
+        name=_entry.key,
+    )
+    router.add_api_route(
+        f"{_entry.path.rstrip('/')}/stream",
+        _agent_stream_endpoint(_entry.path, _entry.key),
+        methods=["POST"],
+        name=f"{_entry.key}_stream",
+    )
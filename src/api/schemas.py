@@ -1,6 +1,8 @@
-from typing import List, Literal, Optional, Union
+from typing import Any, List, Literal, Optional, Union
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from src.core.metrics import STAGE_SECONDS
 
 
 class Team(BaseModel):
@@ -43,6 +45,7 @@ class SurveyState(BaseModel):
     current_question_id: Optional[str] = None
     awaiting_question_id: Optional[str] = None
     answers: List[StateAnswerItem] = Field(default_factory=list)
+    turns: int = Field(default=0, ge=0)
     model_config = ConfigDict(extra="forbid")
 
 
@@ -55,8 +58,16 @@ class SurveyRequest(BaseModel):
     mentions: List[Mention]
     correlation_id: str
     survey_state: Optional[SurveyState] = None
+    state_token: Optional[str] = Field(default=None, max_length=65536)
+    session_id: Optional[str] = Field(default=None, max_length=64)
     model_config = ConfigDict(extra="forbid")
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def _timed_validation(cls, data: Any, handler: Any) -> "SurveyRequest":
+        with STAGE_SECONDS.time("validation"):
+            return handler(data)
+
 
 class AnswerItem(BaseModel):
     question_id: str
@@ -72,12 +83,16 @@ class Result(BaseModel):
     status: Optional[Literal["in_progress", "completed"]] = None
     agent_message: Optional[str] = None
     survey_state: Optional[SurveyState] = None
+    state_token: Optional[str] = None
+    session_id: Optional[str] = None
     model_config = ConfigDict(extra="forbid")
 
 
 class Meta(BaseModel):
     model: str
     latency_ms: int
+    ttfb_ms: Optional[int] = None
+    retries: int = 0
     model_config = ConfigDict(extra="forbid")
 
 
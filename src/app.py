@@ -1,6 +1,24 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 
 from src.api.routes import router as api_router
+from src.api.routes import run_warmup
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Warm-up runs in the background: /health answers at once, /ready once warm.
+    warmup = asyncio.create_task(run_warmup())
+    try:
+        yield
+    finally:
+        warmup.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup
+
 
-app = FastAPI(title="MSTeams Vertex Connector", version="1.0.0")
+app = FastAPI(title="MSTeams Vertex Connector", version="1.0.0", lifespan=lifespan)
 app.include_router(api_router)
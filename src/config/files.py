@@ -0,0 +1,17 @@
+import json
+from typing import Any
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - YAML files need PyYAML
+    yaml = None
+
+
+def load_data_file(path: str) -> Any:
+    """Parse a JSON file, or a YAML file (.yaml/.yml) when PyYAML is installed."""
+    with open(path, encoding="utf-8") as handle:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ValueError(f"PyYAML is required to read {path}")
+            return yaml.safe_load(handle)
+        return json.load(handle)
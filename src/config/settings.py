@@ -1,5 +1,12 @@
 import os
 from dataclasses import dataclass
+from typing import Tuple
+
+
+@dataclass(frozen=True)
+class VertexEndpoint:
+    project: str
+    region: str
 
 
 @dataclass(frozen=True)
@@ -7,20 +14,419 @@ class AppSettings:
     vertex_model: str
     gcp_project: str
     gcp_region: str
+    # Primary endpoint first; more than one enables regional failover.
+    endpoints: Tuple[VertexEndpoint, ...] = ()
+    # Overrides the Vertex API host, e.g. a local stand-in server.
+    base_url: str = ""
+    # Fixed bearer token used instead of Application Default Credentials.
+    access_token: str = ""
+
+
+def _parse_endpoints(value: str, default_project: str) -> Tuple[VertexEndpoint, ...]:
+    endpoints = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        project, _, region = item.rpartition("/")
+        project = project.strip() or default_project
+        region = region.strip()
+        if not project or not region:
+            raise ValueError("Invalid configuration: GCP_REGIONS")
+        endpoints.append(VertexEndpoint(project=project, region=region))
+    return tuple(endpoints)
 
 
 def get_settings() -> AppSettings:
     vertex_model = os.getenv("VERTEX_MODEL", "").strip()
     gcp_project = os.getenv("GCP_PROJECT", "").strip()
     gcp_region = os.getenv("GCP_REGION", "").strip()
+    endpoints = _parse_endpoints(os.getenv("GCP_REGIONS", ""), gcp_project)
+    if not endpoints and gcp_project and gcp_region:
+        endpoints = (VertexEndpoint(project=gcp_project, region=gcp_region),)
 
-    if not vertex_model or not gcp_project or not gcp_region:
+    if not vertex_model or not endpoints:
         raise ValueError("Missing required configuration.")
 
     return AppSettings(
         vertex_model=vertex_model,
-        gcp_project=gcp_project,
-        gcp_region=gcp_region,
+        gcp_project=endpoints[0].project,
+        gcp_region=endpoints[0].region,
+        endpoints=endpoints,
+        base_url=os.getenv("VERTEX_BASE_URL", "").strip(),
+        access_token=os.getenv("VERTEX_ACCESS_TOKEN", "").strip(),
+    )
+
+
+@dataclass(frozen=True)
+class RoutingCacheSettings:
+    enabled: bool
+    max_entries: int
+    ttl_seconds: float
+
+
+@dataclass(frozen=True)
+class FastPathSettings:
+    enabled: bool
+    min_confidence: float
+
+
+@dataclass(frozen=True)
+class ExtractionSettings:
+    enabled: bool
+    # Extracted answers below this confidence are asked about instead.
+    min_confidence: float
+
+
+@dataclass(frozen=True)
+class SessionSettings:
+    backend: str
+    max_entries: int
+    ttl_seconds: float
+    sqlite_path: str
+
+
+@dataclass(frozen=True)
+class StateTokenSettings:
+    secret: str
+    response_format: str
+    # Older tokens are rejected, bounding how far back a replay can roll a survey.
+    max_age_seconds: float
+
+
+@dataclass(frozen=True)
+class IdempotencySettings:
+    enabled: bool
+    max_entries: int
+    ttl_seconds: float
+
+
+@dataclass(frozen=True)
+class RoutingBatchSettings:
+    enabled: bool
+    max_batch_size: int
+    max_delay_ms: float
+
+
+@dataclass(frozen=True)
+class DeadlineSettings:
+    default_timeout_ms: int
+    max_timeout_ms: int
+
+
+@dataclass(frozen=True)
+class HedgeSettings:
+    enabled: bool
+    percentile: float
+    min_delay_ms: float
+    min_samples: int
+
+
+@dataclass(frozen=True)
+class FailoverSettings:
+    error_rate: float
+    min_calls: int
+    window: int
+    open_seconds: float
+    latency_threshold_ms: float
+
+
+@dataclass(frozen=True)
+class RetrySettings:
+    max_attempts: int
+    base_delay_ms: float
+    max_delay_ms: float
+
+
+@dataclass(frozen=True)
+class TracingSettings:
+    exporter: str
+    jsonl_path: str
+    otlp_endpoint: str
+    service_name: str
+
+
+@dataclass(frozen=True)
+class PromptBudgetSettings:
+    user_message_tokens: int
+    initial_message_tokens: int
+    answer_tokens: int
+    chars_per_token: float
+
+
+@dataclass(frozen=True)
+class ContextCacheSettings:
+    enabled: bool
+    ttl_seconds: float
+    refresh_seconds: float
+    min_prefix_tokens: int
+
+
+@dataclass(frozen=True)
+class StructuredOutputSettings:
+    enabled: bool
+
+
+@dataclass(frozen=True)
+class CatalogSettings:
+    # JSON or YAML question catalog; empty uses the built-in catalog.
+    path: str
+    # How often the file is checked for changes; 0 disables hot reload.
+    reload_seconds: float
+
+
+@dataclass(frozen=True)
+class AgentSettings:
+    # JSON or YAML file mapping paths to agent entry points; empty serves the survey agent.
+    config_path: str
+    # Agent keys imported at startup instead of on first use; "*" preloads every agent.
+    preload: Tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class WarmupSettings:
+    # Build the Vertex provider at startup, before /ready reports ready.
+    enabled: bool
+    # Also send one tiny generation to warm up auth and the connection.
+    generate: bool
+    timeout_ms: int
+    # Failed required steps are retried from this delay, doubling up to the max;
+    # 0 disables retries.
+    retry_base_ms: int
+    retry_max_ms: int
+
+
+@dataclass(frozen=True)
+class AdmissionSettings:
+    enabled: bool
+    rate_per_second: float
+    burst: float
+    max_concurrency: int
+    max_queue: int
+    max_wait_ms: float
+    max_keys: int
+
+
+def _env_bool(env_key: str, default: bool) -> bool:
+    value = os.getenv(env_key, "").strip().lower()
+    if not value:
+        return default
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"Invalid configuration: {env_key}")
+
+
+def _env_int(env_key: str, default: int) -> int:
+    value = os.getenv(env_key, "").strip()
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError as exc:
+        raise ValueError(f"Invalid configuration: {env_key}") from exc
+
+
+def _env_float(env_key: str, default: float) -> float:
+    value = os.getenv(env_key, "").strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError as exc:
+        raise ValueError(f"Invalid configuration: {env_key}") from exc
+
+
+def get_routing_cache_settings() -> RoutingCacheSettings:
+    return RoutingCacheSettings(
+        enabled=_env_bool("ROUTING_CACHE_ENABLED", False),
+        max_entries=_env_int("ROUTING_CACHE_MAX_ENTRIES", 1024),
+        ttl_seconds=_env_float("ROUTING_CACHE_TTL_SECONDS", 600.0),
+    )
+
+
+def get_fast_path_settings() -> FastPathSettings:
+    return FastPathSettings(
+        enabled=_env_bool("FAST_PATH_ENABLED", False),
+        min_confidence=_env_float("FAST_PATH_MIN_CONFIDENCE", 0.9),
+    )
+
+
+def get_extraction_settings() -> ExtractionSettings:
+    settings = ExtractionSettings(
+        enabled=_env_bool("EXTRACTION_ENABLED", False),
+        min_confidence=_env_float("EXTRACTION_MIN_CONFIDENCE", 0.8),
+    )
+    if not 0.0 <= settings.min_confidence <= 1.0:
+        raise ValueError("Invalid configuration: EXTRACTION_MIN_CONFIDENCE")
+    return settings
+
+
+def get_session_settings() -> SessionSettings:
+    backend = os.getenv("SESSION_STORE", "").strip().lower() or "none"
+    if backend not in ("none", "memory", "sqlite"):
+        raise ValueError("Invalid configuration: SESSION_STORE")
+    return SessionSettings(
+        backend=backend,
+        max_entries=_env_int("SESSION_MAX_ENTRIES", 10000),
+        ttl_seconds=_env_float("SESSION_TTL_SECONDS", 86400.0),
+        sqlite_path=os.getenv("SESSION_SQLITE_PATH", "").strip() or "sessions.db",
+    )
+
+
+def get_state_token_settings() -> StateTokenSettings:
+    response_format = os.getenv("SURVEY_STATE_FORMAT", "").strip().lower() or "json"
+    if response_format not in ("json", "token"):
+        raise ValueError("Invalid configuration: SURVEY_STATE_FORMAT")
+    settings = StateTokenSettings(
+        secret=os.getenv("STATE_TOKEN_SECRET", "").strip(),
+        response_format=response_format,
+        max_age_seconds=_env_float("STATE_TOKEN_MAX_AGE_SECONDS", 86400.0),
+    )
+    if settings.max_age_seconds <= 0:
+        raise ValueError("Invalid configuration: STATE_TOKEN_MAX_AGE_SECONDS")
+    return settings
+
+
+def get_idempotency_settings() -> IdempotencySettings:
+    return IdempotencySettings(
+        enabled=_env_bool("IDEMPOTENCY_ENABLED", False),
+        max_entries=_env_int("IDEMPOTENCY_MAX_ENTRIES", 4096),
+        ttl_seconds=_env_float("IDEMPOTENCY_TTL_SECONDS", 300.0),
+    )
+
+
+def get_routing_batch_settings() -> RoutingBatchSettings:
+    return RoutingBatchSettings(
+        enabled=_env_bool("ROUTING_BATCH_ENABLED", False),
+        max_batch_size=_env_int("ROUTING_BATCH_MAX_SIZE", 16),
+        max_delay_ms=_env_float("ROUTING_BATCH_MAX_DELAY_MS", 50.0),
+    )
+
+
+def get_deadline_settings() -> DeadlineSettings:
+    return DeadlineSettings(
+        default_timeout_ms=_env_int("REQUEST_TIMEOUT_MS", 25000),
+        max_timeout_ms=_env_int("REQUEST_TIMEOUT_MAX_MS", 120000),
+    )
+
+
+def get_hedge_settings() -> HedgeSettings:
+    return HedgeSettings(
+        enabled=_env_bool("HEDGE_ENABLED", False),
+        percentile=_env_float("HEDGE_PERCENTILE", 95.0),
+        min_delay_ms=_env_float("HEDGE_MIN_DELAY_MS", 250.0),
+        min_samples=_env_int("HEDGE_MIN_SAMPLES", 20),
+    )
+
+
+def get_failover_settings() -> FailoverSettings:
+    return FailoverSettings(
+        error_rate=_env_float("FAILOVER_ERROR_RATE", 0.5),
+        min_calls=_env_int("FAILOVER_MIN_CALLS", 5),
+        window=_env_int("FAILOVER_WINDOW", 20),
+        open_seconds=_env_float("FAILOVER_OPEN_SECONDS", 30.0),
+        latency_threshold_ms=_env_float("FAILOVER_LATENCY_THRESHOLD_MS", 0.0),
+    )
+
+
+def get_retry_settings() -> RetrySettings:
+    return RetrySettings(
+        max_attempts=max(_env_int("RETRY_MAX_ATTEMPTS", 3), 1),
+        base_delay_ms=_env_float("RETRY_BASE_DELAY_MS", 200.0),
+        max_delay_ms=_env_float("RETRY_MAX_DELAY_MS", 5000.0),
+    )
+
+
+def get_prompt_budget_settings() -> PromptBudgetSettings:
+    chars_per_token = _env_float("PROMPT_CHARS_PER_TOKEN", 4.0)
+    if chars_per_token <= 0:
+        raise ValueError("Invalid configuration: PROMPT_CHARS_PER_TOKEN")
+    return PromptBudgetSettings(
+        user_message_tokens=_env_int("PROMPT_USER_MESSAGE_MAX_TOKENS", 1000),
+        initial_message_tokens=_env_int("PROMPT_INITIAL_MESSAGE_MAX_TOKENS", 500),
+        answer_tokens=_env_int("PROMPT_ANSWER_MAX_TOKENS", 250),
+        chars_per_token=chars_per_token,
+    )
+
+
+def get_context_cache_settings() -> ContextCacheSettings:
+    settings = ContextCacheSettings(
+        enabled=_env_bool("CONTEXT_CACHE_ENABLED", False),
+        ttl_seconds=_env_float("CONTEXT_CACHE_TTL_SECONDS", 3600.0),
+        refresh_seconds=_env_float("CONTEXT_CACHE_REFRESH_SECONDS", 300.0),
+        min_prefix_tokens=_env_int("CONTEXT_CACHE_MIN_PREFIX_TOKENS", 1024),
+    )
+    if settings.refresh_seconds >= settings.ttl_seconds:
+        raise ValueError("Invalid configuration: CONTEXT_CACHE_REFRESH_SECONDS")
+    return settings
+
+
+def get_structured_output_settings() -> StructuredOutputSettings:
+    return StructuredOutputSettings(
+        enabled=_env_bool("STRUCTURED_OUTPUT_ENABLED", True),
+    )
+
+
+def get_catalog_settings() -> CatalogSettings:
+    return CatalogSettings(
+        path=os.getenv("SURVEY_CATALOG_PATH", "").strip(),
+        reload_seconds=_env_float("SURVEY_CATALOG_RELOAD_SECONDS", 2.0),
+    )
+
+
+def get_agent_settings() -> AgentSettings:
+    return AgentSettings(
+        config_path=os.getenv("AGENTS_CONFIG_PATH", "").strip(),
+        preload=tuple(
+            key.strip()
+            for key in os.getenv("AGENTS_PRELOAD", "").split(",")
+            if key.strip()
+        ),
+    )
+
+
+def get_warmup_settings() -> WarmupSettings:
+    settings = WarmupSettings(
+        enabled=_env_bool("WARMUP_ENABLED", True),
+        generate=_env_bool("WARMUP_GENERATE", False),
+        timeout_ms=_env_int("WARMUP_TIMEOUT_MS", 10000),
+        retry_base_ms=_env_int("WARMUP_RETRY_BASE_MS", 1000),
+        retry_max_ms=_env_int("WARMUP_RETRY_MAX_MS", 30000),
+    )
+    if settings.timeout_ms <= 0:
+        raise ValueError("Invalid configuration: WARMUP_TIMEOUT_MS")
+    if settings.retry_base_ms < 0:
+        raise ValueError("Invalid configuration: WARMUP_RETRY_BASE_MS")
+    if settings.retry_max_ms < settings.retry_base_ms:
+        raise ValueError("Invalid configuration: WARMUP_RETRY_MAX_MS")
+    return settings
+
+
+def get_admission_settings() -> AdmissionSettings:
+    return AdmissionSettings(
+        enabled=_env_bool("ADMISSION_ENABLED", False),
+        rate_per_second=_env_float("ADMISSION_RATE_PER_SECOND", 2.0),
+        burst=_env_float("ADMISSION_BURST", 10.0),
+        max_concurrency=_env_int("ADMISSION_MAX_CONCURRENCY", 32),
+        max_queue=_env_int("ADMISSION_MAX_QUEUE", 64),
+        max_wait_ms=_env_float("ADMISSION_MAX_WAIT_MS", 2000.0),
+        max_keys=_env_int("ADMISSION_MAX_KEYS", 10000),
+    )
+
+
+def get_tracing_settings() -> TracingSettings:
+    exporter = os.getenv("TRACING_EXPORTER", "").strip().lower() or "none"
+    if exporter not in ("none", "jsonl", "otlp"):
+        raise ValueError("Invalid configuration: TRACING_EXPORTER")
+    return TracingSettings(
+        exporter=exporter,
+        jsonl_path=os.getenv("TRACING_JSONL_PATH", "").strip() or "traces.jsonl",
+        otlp_endpoint=os.getenv("TRACING_OTLP_ENDPOINT", "").strip()
+        or "http://localhost:4318",
+        service_name=os.getenv("TRACING_SERVICE_NAME", "").strip()
+        or "msteams-vertexai-connector",
     )
 
 
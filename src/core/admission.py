@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Optional
+
+from src.config.settings import get_admission_settings
+from src.core.errors import CoreError
+from src.core.stats import register_stats_source
+
+
+class AdmissionRejected(CoreError):
+    """Raised when a request is over budget; ``retry_after`` is in seconds."""
+
+    def __init__(self, code: str, message: str, retry_after: float) -> None:
+        super().__init__(code, message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._rate = rate_per_second
+        self._burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated_at = clock()
+
+    def take(self) -> float:
+        """Take one token; return 0 on success, else seconds until one is available."""
+        now = self._clock()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self._rate
+
+
+class AdmissionController:
+    """Per-key token buckets in front of a global concurrency cap.
+
+    Requests over their key's rate are rejected immediately. Admitted requests
+    beyond ``max_concurrency`` wait in a bounded FIFO queue for at most
+    ``max_wait_seconds`` (or their deadline); a full queue rejects immediately.
+    """
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        burst: float,
+        max_concurrency: int,
+        max_queue: int,
+        max_wait_seconds: float,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("Admission concurrency must be at least 1.")
+        if rate_per_second <= 0 or burst < 1:
+            raise ValueError("Admission rate and burst must be positive.")
+        self._rate_per_second = rate_per_second
+        self._burst = burst
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._max_wait_seconds = max_wait_seconds
+        self._max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self._active = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rate_limited = 0
+        self.overloaded = 0
+
+    def _take_token(self, key: str) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self._rate_per_second, self._burst, self._clock)
+                self._buckets[key] = bucket
+                while len(self._buckets) > self._max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take()
+
+    async def acquire(self, key: str, deadline: Optional[float] = None) -> None:
+        wait = self._take_token(key)
+        if wait > 0:
+            self.rate_limited += 1
+            raise AdmissionRejected(
+                "RATE_LIMITED", "Too many requests for this channel.", wait
+            )
+
+        if self._active < self._max_concurrency and not self._waiters:
+            self._active += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self._max_queue:
+            self.overloaded += 1
+            raise _overloaded(self._max_wait_seconds)
+
+        max_wait = self._max_wait_seconds
+        if deadline is not None:
+            max_wait = min(max_wait, deadline - time.monotonic())
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            # The slot is handed over by release(), so _active is not bumped here.
+            await asyncio.wait_for(asyncio.shield(waiter), max(max_wait, 0))
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                self.admitted += 1
+                return
+            self.overloaded += 1
+            raise _overloaded(self._max_wait_seconds) from None
+        except asyncio.CancelledError:
+            if not self._abandon(waiter):
+                self.release()
+            raise
+        self.admitted += 1
+
+    def _abandon(self, waiter: "asyncio.Future[None]") -> bool:
+        """Drop a waiter; return False if it had already been handed a slot."""
+        if waiter.done():
+            return False
+        self._waiters.remove(waiter)
+        waiter.cancel()
+        return True
+
+    def release(self) -> None:
+        """Free a slot taken by acquire(), handing it to the oldest waiter."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "keys": len(self._buckets),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rate_limited": self.rate_limited,
+            "overloaded": self.overloaded,
+        }
+
+
+def _overloaded(retry_after: float) -> AdmissionRejected:
+    return AdmissionRejected("OVERLOADED", "Server is busy, retry later.", retry_after)
+
+
+_controller_lock = threading.Lock()
+_admission_controller: Optional[AdmissionController] = None
+_admission_controller_loaded = False
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Return the process-wide admission controller, or None when disabled."""
+    global _admission_controller, _admission_controller_loaded
+    if _admission_controller_loaded:
+        return _admission_controller
+    with _controller_lock:
+        if not _admission_controller_loaded:
+            settings = get_admission_settings()
+            if settings.enabled:
+                _admission_controller = AdmissionController(
+                    rate_per_second=settings.rate_per_second,
+                    burst=settings.burst,
+                    max_concurrency=settings.max_concurrency,
+                    max_queue=settings.max_queue,
+                    max_wait_seconds=settings.max_wait_ms / 1000,
+                    max_keys=settings.max_keys,
+                )
+            _admission_controller_loaded = True
+    return _admission_controller
+
+
+def reset_admission_controller() -> None:
+    """Drop the controller so the next request re-reads its configuration."""
+    global _admission_controller, _admission_controller_loaded
+    with _controller_lock:
+        _admission_controller = None
+        _admission_controller_loaded = False
+
+
+def _admission_stats() -> Dict[str, Any]:
+    controller = _admission_controller
+    if controller is None:
+        return {"enabled": False}
+    return {"enabled": True, **controller.stats()}
+
+
+register_stats_source("admission", _admission_stats)
@@ -1,27 +1,395 @@
-from typing import Callable, Dict
+import asyncio
+import importlib
+import inspect
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
+from src.config.files import load_data_file
+from src.config.settings import get_agent_settings
 from src.core.errors import CoreError
-from src.core.models import AgentResult, CoreRequest
+from src.core.metrics import AGENT_LOAD_SECONDS, AGENT_REQUESTS
+from src.core.models import AgentResult, CoreRequest, MessageChunk
+from src.core.sessions import SESSION_LOCKS, SessionStore, new_session_id
+from src.core.stats import register_stats_source
+from src.core.tracing import start_span
 from src.providers.vertex_ai import VertexAIProvider
 
 AgentRunner = Callable[[CoreRequest, VertexAIProvider], AgentResult]
+AsyncAgentRunner = Callable[[CoreRequest, VertexAIProvider], Awaitable[AgentResult]]
 
-AGENT_RUNNERS: Dict[str, AgentRunner] = {}
+StreamAgentRunner = Callable[
+    [CoreRequest, VertexAIProvider], AsyncIterator[Union[MessageChunk, AgentResult]]
+]
 
+# (validated survey_state model or None, state_token or None, catalog path or None)
+# -> agent_state
+StateDecoder = Callable[[Optional[Any], Optional[str], Optional[str]], Optional[Any]]
+# (agent_state, catalog path or None) -> (survey_state, state_token) for the response
+StateEncoder = Callable[
+    [Optional[Dict[str, Any]], Optional[str]],
+    Tuple[Optional[Dict[str, Any]], Optional[str]],
+]
 
-def register_agent_runner(agent_key: str, runner: AgentRunner) -> None:
+AGENT_RUNNERS: Dict[str, Union[AgentRunner, AsyncAgentRunner]] = {}
+AGENT_STREAM_RUNNERS: Dict[str, StreamAgentRunner] = {}
+AGENT_STATE_DECODERS: Dict[str, StateDecoder] = {}
+AGENT_STATE_ENCODERS: Dict[str, StateEncoder] = {}
+
+
+@dataclass(frozen=True)
+class AgentEntryPoint:
+    """An agent served at ``path``; runners are ``package.module:attribute`` refs.
+
+    ``decode_state`` and ``encode_state`` optionally convert request state into
+    the agent's own state object and back; agents without them get and return
+    plain dicts and do not accept state tokens. ``catalog`` is a question
+    catalog file handed to the agent as ``CoreRequest.catalog_path``; empty
+    means the agent's default.
+    """
+
+    key: str
+    path: str
+    runner: str
+    stream_runner: str = ""
+    preload: bool = False
+    decode_state: str = ""
+    encode_state: str = ""
+    catalog: str = ""
+
+
+PATH_TO_AGENT_KEY: Dict[str, str] = {}
+AGENT_ENTRY_POINTS: Dict[str, AgentEntryPoint] = {}
+_load_lock = threading.Lock()
+# agent key -> seconds spent importing its module and resolving its runners
+_load_seconds: Dict[str, float] = {}
+
+
+def register_agent_runner(
+    agent_key: str, runner: Union[AgentRunner, AsyncAgentRunner]
+) -> None:
     AGENT_RUNNERS[agent_key] = runner
 
 
-def get_agent_runner(agent_key: str) -> AgentRunner:
+def register_agent_stream_runner(agent_key: str, runner: StreamAgentRunner) -> None:
+    AGENT_STREAM_RUNNERS[agent_key] = runner
+
+
+def register_agent_entry_point(entry: AgentEntryPoint) -> None:
+    """Serve ``entry.key`` at ``entry.path``; its module is imported on first use."""
+    AGENT_ENTRY_POINTS[entry.key] = entry
+    PATH_TO_AGENT_KEY[entry.path] = entry.key
+
+
+def _invalid_agent_config() -> ValueError:
+    return ValueError("Invalid configuration: AGENTS_CONFIG_PATH")
+
+
+def _normalize_path(path: str) -> str:
+    path = path.strip()
+    return path if path.startswith("/") else f"/{path}"
+
+
+def _parse_agent_config(data: Any) -> List[AgentEntryPoint]:
+    agents = data.get("agents") if isinstance(data, dict) else None
+    if not isinstance(agents, dict) or not agents:
+        raise _invalid_agent_config()
+    entries: List[AgentEntryPoint] = []
+    for path, spec in agents.items():
+        if not isinstance(path, str) or not path.strip() or not isinstance(spec, dict):
+            raise _invalid_agent_config()
+        path = _normalize_path(path)
+        key = spec.get("key") or path.strip("/")
+        runner = spec.get("runner")
+        stream_runner = spec.get("stream_runner") or ""
+        decode_state = spec.get("decode_state") or ""
+        encode_state = spec.get("encode_state") or ""
+        catalog = spec.get("catalog") or ""
+        references = (key, runner, stream_runner, decode_state, encode_state, catalog)
+        if not all(isinstance(value, str) for value in references) or ":" not in runner:
+            raise _invalid_agent_config()
+        entries.append(
+            AgentEntryPoint(
+                key=key,
+                path=path,
+                runner=runner,
+                stream_runner=stream_runner,
+                preload=spec.get("preload") is True,
+                decode_state=decode_state,
+                encode_state=encode_state,
+                catalog=catalog,
+            )
+        )
+    if len({entry.key for entry in entries}) != len(entries):
+        raise _invalid_agent_config()
+    return entries
+
+
+def configure_agents(default: AgentEntryPoint) -> List[AgentEntryPoint]:
+    """Register the agents from AGENTS_CONFIG_PATH, or ``default`` without one.
+
+    Read once, when the routes are built. Keys listed in AGENTS_PRELOAD are
+    marked for preloading in addition to entries with ``preload: true``.
+    """
+    settings = get_agent_settings()
+    if settings.config_path:
+        entries = _parse_agent_config(load_data_file(settings.config_path))
+    else:
+        entries = [default]
+    hot = set(settings.preload)
+    entries = [
+        replace(entry, preload=True) if "*" in hot or entry.key in hot else entry
+        for entry in entries
+    ]
+    for entry in entries:
+        register_agent_entry_point(entry)
+    return entries
+
+
+def _resolve(reference: str) -> Any:
+    module_name, _, attribute = reference.partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), attribute)
+    except (ImportError, AttributeError) as exc:
+        raise ValueError(f"Invalid agent entry point: {reference}") from exc
+
+
+def load_agent(agent_key: str) -> None:
+    """Import the agent's module and register its runners, once."""
+    if agent_key in AGENT_RUNNERS:
+        return
+    entry = AGENT_ENTRY_POINTS.get(agent_key)
+    if entry is None:
+        return
+    with _load_lock:
+        if agent_key in AGENT_RUNNERS:
+            return
+        started = time.perf_counter()
+        runner = _resolve(entry.runner)
+        stream_runner = _resolve(entry.stream_runner) if entry.stream_runner else None
+        decode_state = _resolve(entry.decode_state) if entry.decode_state else None
+        encode_state = _resolve(entry.encode_state) if entry.encode_state else None
+        elapsed = time.perf_counter() - started
+        if stream_runner is not None:
+            register_agent_stream_runner(agent_key, stream_runner)
+        if decode_state is not None:
+            AGENT_STATE_DECODERS[agent_key] = decode_state
+        if encode_state is not None:
+            AGENT_STATE_ENCODERS[agent_key] = encode_state
+        # Registered last: a present runner means the agent is fully loaded.
+        register_agent_runner(agent_key, runner)
+        _load_seconds[agent_key] = elapsed
+    AGENT_LOAD_SECONDS.observe(agent_key, elapsed)
+
+
+def preload_agents(agent_keys: Optional[Sequence[str]] = None) -> Dict[str, float]:
+    """Load ``agent_keys`` (default: the preload set); returns load seconds by key."""
+    if agent_keys is None:
+        agent_keys = [
+            entry.key for entry in AGENT_ENTRY_POINTS.values() if entry.preload
+        ]
+    for agent_key in agent_keys:
+        load_agent(agent_key)
+    return {key: _load_seconds.get(key, 0.0) for key in agent_keys}
+
+
+def _agent_stats() -> Dict[str, Any]:
+    return {
+        entry.key: {
+            "path": entry.path,
+            "loaded": entry.key in AGENT_RUNNERS,
+            "preload": entry.preload,
+            "load_ms": (
+                round(_load_seconds[entry.key] * 1000, 1)
+                if entry.key in _load_seconds
+                else None
+            ),
+        }
+        for entry in AGENT_ENTRY_POINTS.values()
+    }
+
+
+register_stats_source("agents", _agent_stats)
+
+
+def get_agent_runner(agent_key: str) -> Union[AgentRunner, AsyncAgentRunner]:
+    load_agent(agent_key)
     runner = AGENT_RUNNERS.get(agent_key)
     if runner is None:
         raise CoreError("AGENT_NOT_FOUND", f"Unknown agent: {agent_key}")
     return runner
 
 
+def decode_agent_state(
+    agent_key: str, survey_state: Optional[Any], state_token: Optional[str]
+) -> Optional[Any]:
+    """The ``agent_state`` for a turn, from a request's validated state fields.
+
+    Agents without a ``decode_state`` hook get ``survey_state`` as a dict.
+    """
+    load_agent(agent_key)
+    decoder = AGENT_STATE_DECODERS.get(agent_key)
+    if decoder is not None:
+        return decoder(survey_state, state_token, _agent_catalog(agent_key))
+    if state_token is not None:
+        raise CoreError(
+            "INVALID_STATE_TOKEN", "This agent does not accept state tokens."
+        )
+    return survey_state.model_dump() if survey_state is not None else None
+
+
+def encode_agent_state(
+    agent_key: str, agent_state: Optional[Dict[str, Any]]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """``(survey_state, state_token)`` for the response carrying ``agent_state``."""
+    load_agent(agent_key)
+    encoder = AGENT_STATE_ENCODERS.get(agent_key)
+    if encoder is None:
+        return agent_state, None
+    return encoder(agent_state, _agent_catalog(agent_key))
+
+
+def _agent_catalog(agent_key: str) -> Optional[str]:
+    entry = AGENT_ENTRY_POINTS.get(agent_key)
+    return entry.catalog if entry is not None and entry.catalog else None
+
+
+def _agent_request(request: CoreRequest, agent_key: str) -> CoreRequest:
+    catalog_path = _agent_catalog(agent_key)
+    if catalog_path is None or request.catalog_path is not None:
+        return request
+    return replace(request, catalog_path=catalog_path)
+
+
 def run_agent(
     request: CoreRequest, provider: VertexAIProvider, agent_key: str
 ) -> AgentResult:
     runner = get_agent_runner(agent_key)
-    return runner(request, provider)
+    request = _agent_request(request, agent_key)
+    AGENT_REQUESTS.inc(agent_key)
+    with start_span("agent.run", agent=agent_key):
+        if inspect.iscoroutinefunction(runner):
+            return asyncio.run(runner(request, provider))
+        return runner(request, provider)
+
+
+async def run_agent_async(
+    request: CoreRequest,
+    provider: VertexAIProvider,
+    agent_key: str,
+    session_store: Optional[SessionStore] = None,
+) -> AgentResult:
+    _check_session_store(request, session_store)
+    if session_store is not None and request.agent_state is None:
+        async with _session_turn(request):
+            session_request = await _load_session(request, session_store)
+            result = await _run_runner(session_request, provider, agent_key)
+            return await _save_session(result, session_request, session_store)
+    return await _run_runner(request, provider, agent_key)
+
+
+async def _run_runner(
+    request: CoreRequest, provider: VertexAIProvider, agent_key: str
+) -> AgentResult:
+    runner = get_agent_runner(agent_key)
+    request = _agent_request(request, agent_key)
+    AGENT_REQUESTS.inc(agent_key)
+    with start_span("agent.run", agent=agent_key):
+        if inspect.iscoroutinefunction(runner):
+            return await runner(request, provider)
+        # Sync runners keep working; they just occupy a worker thread per turn.
+        return await asyncio.to_thread(runner, request, provider)
+
+
+async def run_agent_stream(
+    request: CoreRequest,
+    provider: VertexAIProvider,
+    agent_key: str,
+    session_store: Optional[SessionStore] = None,
+) -> AsyncIterator[Union[MessageChunk, AgentResult]]:
+    """Yield message chunks, then the AgentResult, for one turn.
+
+    Agents without a stream runner yield only their AgentResult.
+    """
+    load_agent(agent_key)
+    stream_runner = AGENT_STREAM_RUNNERS.get(agent_key)
+    if stream_runner is None:
+        yield await run_agent_async(request, provider, agent_key, session_store)
+        return
+
+    _check_session_store(request, session_store)
+    uses_session = session_store is not None and request.agent_state is None
+    async with _session_turn(request) if uses_session else nullcontext():
+        session_request = _agent_request(request, agent_key)
+        if uses_session:
+            session_request = await _load_session(session_request, session_store)
+        AGENT_REQUESTS.inc(agent_key)
+        with start_span("agent.run", agent=agent_key, stream=True):
+            async for event in stream_runner(session_request, provider):
+                if isinstance(event, AgentResult) and uses_session:
+                    event = await _save_session(
+                        event, session_request, session_store
+                    )
+                yield event
+
+
+def _check_session_store(
+    request: CoreRequest, session_store: Optional[SessionStore]
+) -> None:
+    # Ignoring the id would silently restart the caller's survey.
+    if request.session_id and session_store is None:
+        raise CoreError(
+            "SESSIONS_DISABLED", "Server-side sessions are not enabled."
+        )
+
+
+def _session_turn(request: CoreRequest) -> AsyncContextManager[Any]:
+    """Hold the session's lock for a turn, so concurrent turns queue up."""
+    if not request.session_id:
+        return nullcontext()
+    return SESSION_LOCKS.get(request.session_id)
+
+
+# Store calls run in worker threads: a store may block on disk (SQLite commits
+# and fsyncs), which must not stall every other turn on the event loop.
+
+
+async def _load_session(
+    request: CoreRequest, session_store: SessionStore
+) -> CoreRequest:
+    if not request.session_id:
+        return replace(request, session_id=new_session_id())
+    agent_state = await asyncio.to_thread(session_store.load, request.session_id)
+    if agent_state is None:
+        raise CoreError("SESSION_NOT_FOUND", "Unknown or expired session.")
+    return replace(request, agent_state=agent_state)
+
+
+async def _save_session(
+    result: AgentResult, request: CoreRequest, session_store: SessionStore
+) -> AgentResult:
+    if result.agent_state is None:
+        await asyncio.to_thread(session_store.delete, request.session_id)
+    elif not await asyncio.to_thread(
+        session_store.save,
+        request.session_id,
+        result.agent_state,
+        expected=request.agent_state,
+    ):
+        # Another worker saved a turn on this session after it was loaded.
+        raise CoreError("SESSION_CONFLICT", "Session was updated by another turn.")
+    return replace(result, agent_state=None, session_id=request.session_id)
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+from src.config.settings import get_idempotency_settings
+from src.core.cache import TTLCache
+from src.core.stats import register_stats_source
+
+T = TypeVar("T")
+
+
+class IdempotencyCache(Generic[T]):
+    """Runs each idempotency key at most once per TTL window.
+
+    Concurrent duplicates await the same in-flight task; later duplicates get
+    the stored result. Failures are not stored, so a retry after an error
+    recomputes.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._results: TTLCache[T] = TTLCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds
+        )
+        self._in_flight: Dict[str, "asyncio.Task[T]"] = {}
+        self._replayed = 0
+        self._coalesced = 0
+        self._computed = 0
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+        stored = self._results.get(key)
+        if stored is not None:
+            self._replayed += 1
+            return stored
+
+        task = self._in_flight.get(key)
+        if task is None:
+            self._computed += 1
+            task = asyncio.ensure_future(self._compute_and_store(key, compute))
+            self._in_flight[key] = task
+        else:
+            self._coalesced += 1
+        # Shielded so a disconnecting caller does not cancel the shared work.
+        return await asyncio.shield(task)
+
+    async def _compute_and_store(
+        self, key: str, compute: Callable[[], Awaitable[T]]
+    ) -> T:
+        try:
+            result = await compute()
+            self._results.set(key, result)
+            return result
+        finally:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "computed": self._computed,
+            "replayed": self._replayed,
+            "coalesced": self._coalesced,
+            "in_flight": len(self._in_flight),
+            "stored": self._results.stats().size,
+        }
+
+
+_cache_lock = threading.Lock()
+_idempotency_cache: Optional[IdempotencyCache[Any]] = None
+_idempotency_cache_loaded = False
+
+
+def get_idempotency_cache() -> Optional[IdempotencyCache[Any]]:
+    """Return the process-wide idempotency cache, or None when disabled."""
+    global _idempotency_cache, _idempotency_cache_loaded
+    if _idempotency_cache_loaded:
+        return _idempotency_cache
+    with _cache_lock:
+        if not _idempotency_cache_loaded:
+            settings = get_idempotency_settings()
+            if settings.enabled:
+                _idempotency_cache = IdempotencyCache(
+                    max_entries=settings.max_entries,
+                    ttl_seconds=settings.ttl_seconds,
+                )
+            _idempotency_cache_loaded = True
+    return _idempotency_cache
+
+
+def reset_idempotency_cache() -> None:
+    """Drop the cache so the next request re-reads its configuration."""
+    global _idempotency_cache, _idempotency_cache_loaded
+    with _cache_lock:
+        _idempotency_cache = None
+        _idempotency_cache_loaded = False
+
+
+def _idempotency_stats() -> Dict[str, Any]:
+    cache = _idempotency_cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+register_stats_source("idempotency", _idempotency_stats)
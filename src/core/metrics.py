@@ -0,0 +1,237 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Seconds; spans in-process stages (sub-millisecond) up to slow model calls.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(label_name: str, label_value: str, extra: str = "") -> str:
+    pairs = [f'{label_name}="{_escape(label_value)}"']
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_float(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Counter:
+    """Monotonic counter with a single label."""
+
+    def __init__(self, name: str, help_text: str, label_name: str) -> None:
+        self.name = name
+        self._help = help_text
+        self._label_name = label_name
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = {}
+
+    def inc(self, label_value: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0.0) + amount
+
+    def value(self, label_value: str) -> float:
+        with self._lock:
+            return self._values.get(label_value, 0.0)
+
+    def total(self) -> float:
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self._help}", f"# TYPE {self.name} counter"]
+        for label_value, value in values:
+            lines.append(
+                f"{self.name}{_labels(self._label_name, label_value)} "
+                f"{_format_float(value)}"
+            )
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a single label, in the Prometheus layout."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_name: str,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self._help = help_text
+        self._label_name = label_name
+        self._buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label value -> (per-bucket counts with a final +Inf slot, sum)
+        self._series: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, label_value: str, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = ([0] * (len(self._buckets) + 1), [0.0])
+                self._series[label_value] = series
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, label_value: str) -> int:
+        with self._lock:
+            series = self._series.get(label_value)
+            return sum(series[0]) if series is not None else 0
+
+    @contextmanager
+    def time(self, label_value: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(label_value, time.perf_counter() - started)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted(
+                (label, (list(counts), total[0]))
+                for label, (counts, total) in self._series.items()
+            )
+        lines = [f"# HELP {self.name} {self._help}", f"# TYPE {self.name} histogram"]
+        bounds = [*self._buckets, float("inf")]
+        for label_value, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_float(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self._label_name, label_value, le)} "
+                    f"{cumulative}"
+                )
+            label = _labels(self._label_name, label_value)
+            lines.append(f"{self.name}_sum{label} {_format_float(total)}")
+            lines.append(f"{self.name}_count{label} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "survey_stage_duration_seconds",
+    "Time spent per request stage.",
+    label_name="stage",
+)
+PROVIDER_CALL_SECONDS = Histogram(
+    "survey_provider_call_duration_seconds",
+    "Upstream model call time, including retries.",
+    label_name="kind",
+)
+CORE_ERRORS = Counter(
+    "survey_core_errors_total",
+    "Requests that ended with a CoreError, by code.",
+    label_name="code",
+)
+PARSE_FALLBACKS = Counter(
+    "survey_parse_fallbacks_total",
+    "Unparsable model outputs answered with a fallback.",
+    label_name="kind",
+)
+MODEL_OUTPUTS = Counter(
+    "survey_model_outputs_total",
+    "Model outputs handed to a parser, by kind.",
+    label_name="kind",
+)
+PARSE_FAILURES = Counter(
+    "survey_parse_failures_total",
+    "Model outputs that could not be parsed even after repair, by kind.",
+    label_name="kind",
+)
+PARSE_REPAIRS = Counter(
+    "survey_parse_repairs_total",
+    "Model outputs that only parsed after tolerant extraction, by method.",
+    label_name="method",
+)
+AGENT_REQUESTS = Counter(
+    "survey_agent_requests_total",
+    "Turns dispatched per agent key.",
+    label_name="agent",
+)
+AGENT_LOAD_SECONDS = Histogram(
+    "survey_agent_load_seconds",
+    "Cold-start time to import an agent module and resolve its runners.",
+    label_name="agent",
+)
+SURVEY_TURNS = Histogram(
+    "survey_turns_per_completion",
+    "Turns a survey took from its first message to completion.",
+    label_name="mode",
+    buckets=(1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50),
+)
+EXTRACTED_ANSWERS = Counter(
+    "survey_extracted_answers_total",
+    "Answers extracted from a single message, by outcome.",
+    label_name="outcome",
+)
+EXTRACTION_ERRORS = Counter(
+    "survey_extraction_errors_total",
+    "Extraction calls that failed upstream and fell back to asking each question.",
+    label_name="error",
+)
+
+PROMPT_TOKENS = Histogram(
+    "survey_prompt_tokens",
+    "Estimated prompt size per model call.",
+    label_name="kind",
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+)
+PROMPT_TRUNCATIONS = Counter(
+    "survey_prompt_truncations_total",
+    "Prompt inputs trimmed to their token budget, by field.",
+    label_name="field",
+)
+
+METRICS = [
+    STAGE_SECONDS,
+    PROVIDER_CALL_SECONDS,
+    PROMPT_TOKENS,
+    PROMPT_TRUNCATIONS,
+    CORE_ERRORS,
+    PARSE_FALLBACKS,
+    MODEL_OUTPUTS,
+    PARSE_FAILURES,
+    PARSE_REPAIRS,
+    AGENT_REQUESTS,
+    AGENT_LOAD_SECONDS,
+    SURVEY_TURNS,
+    EXTRACTED_ANSWERS,
+    EXTRACTION_ERRORS,
+]
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
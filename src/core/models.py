@@ -10,7 +10,15 @@ class CoreRequest:
     sender_name: str
     mentions: List[Dict[str, str]]
     correlation_id: str
-    agent_state: Optional[Dict[str, Any]] = None
+    # A JSON dict, or the agent's own state object when decoded upstream.
+    agent_state: Optional[Any] = None
+    session_id: Optional[str] = None
+    # time.monotonic() by which the turn must finish; None means unbounded.
+    deadline: Optional[float] = None
+    # Tenant (Teams team id) the message came from; upstream calls never mix tenants.
+    tenant_id: Optional[str] = None
+    # Catalog file from the agent's config entry; None means the agent's default.
+    catalog_path: Optional[str] = None
 
 
 @dataclass(frozen=True)
@@ -30,3 +38,12 @@ class AgentResult:
     status: str
     agent_message: str
     agent_state: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
+    ttfb_ms: Optional[int] = None
+    # Upstream calls re-sent after transient failures during this turn.
+    retries: int = 0
+
+
+@dataclass(frozen=True)
+class MessageChunk:
+    text: str
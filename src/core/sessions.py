@@ -0,0 +1,219 @@
+import asyncio
+import json
+import secrets
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional, Protocol
+
+from src.config.settings import get_session_settings
+from src.core.cache import TTLCache
+from src.core.stats import register_stats_source
+
+
+class SessionStore(Protocol):
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]: ...
+
+    def save(
+        self,
+        session_id: str,
+        state: Dict[str, Any],
+        expected: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        """Store ``state``; with ``expected``, only if that is still the stored state.
+
+        Returns False when another turn saved the session first.
+        """
+        ...
+
+    def delete(self, session_id: str) -> None: ...
+
+    def stats(self) -> Dict[str, Any]: ...
+
+
+def new_session_id() -> str:
+    return secrets.token_urlsafe(12)
+
+
+class MemorySessionStore:
+    """Per-process LRU session store; only suitable for a single worker."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self._lock = threading.Lock()
+        self._cache: TTLCache[Dict[str, Any]] = TTLCache(
+            max_entries=max_entries, ttl_seconds=ttl_seconds
+        )
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(session_id)
+
+    def save(
+        self,
+        session_id: str,
+        state: Dict[str, Any],
+        expected: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        with self._lock:
+            if expected is not None and self._cache.get(session_id) != expected:
+                return False
+            self._cache.set(session_id, state)
+            return True
+
+    def delete(self, session_id: str) -> None:
+        self._cache.pop(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self._cache.stats().as_dict()}
+
+
+class SQLiteSessionStore:
+    """Session store in a SQLite file shared by all workers on one host."""
+
+    def __init__(
+        self, path: str, ttl_seconds: float, sweep_every_saves: int = 256
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._sweep_every_saves = sweep_every_saves
+        self._saves_since_sweep = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS survey_sessions ("
+                "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS survey_sessions_expires_at "
+                "ON survey_sessions (expires_at)"
+            )
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT state FROM survey_sessions "
+                "WHERE session_id = ? AND expires_at > ?",
+                (session_id, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0])
+
+    def save(
+        self,
+        session_id: str,
+        state: Dict[str, Any],
+        expected: Optional[Dict[str, Any]] = None,
+    ) -> bool:
+        now = time.time()
+        with self._lock, self._connection:
+            if expected is None:
+                saved = self._connection.execute(
+                    "INSERT OR REPLACE INTO survey_sessions "
+                    "(session_id, state, expires_at) VALUES (?, ?, ?)",
+                    (session_id, json.dumps(state), now + self._ttl_seconds),
+                ).rowcount
+            else:
+                # Compare-and-set, so a worker holding a stale state cannot
+                # overwrite a turn another worker saved in the meantime.
+                saved = self._connection.execute(
+                    "UPDATE survey_sessions SET state = ?, expires_at = ? "
+                    "WHERE session_id = ? AND state = ? AND expires_at > ?",
+                    (
+                        json.dumps(state),
+                        now + self._ttl_seconds,
+                        session_id,
+                        json.dumps(expected),
+                        now,
+                    ),
+                ).rowcount
+            # Expired rows are already invisible to load(), so they are swept
+            # in batches rather than on every save.
+            self._saves_since_sweep += 1
+            if self._saves_since_sweep >= self._sweep_every_saves:
+                self._saves_since_sweep = 0
+                self._connection.execute(
+                    "DELETE FROM survey_sessions WHERE expires_at <= ?", (now,)
+                )
+        return saved == 1
+
+    def delete(self, session_id: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM survey_sessions WHERE session_id = ?", (session_id,)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (size,) = self._connection.execute(
+                "SELECT COUNT(*) FROM survey_sessions"
+            ).fetchone()
+        return {"backend": "sqlite", "size": size}
+
+
+class SessionLocks:
+    """Per-session locks so that turns on one session run one at a time.
+
+    Locks live only while some turn holds or awaits them.
+    """
+
+    def __init__(self) -> None:
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    def get(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[session_id] = lock
+        return lock
+
+
+SESSION_LOCKS = SessionLocks()
+
+_store_lock = threading.Lock()
+_session_store: Optional[SessionStore] = None
+_session_store_loaded = False
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """Return the configured session store, or None in stateless mode."""
+    global _session_store, _session_store_loaded
+    if _session_store_loaded:
+        return _session_store
+    with _store_lock:
+        if not _session_store_loaded:
+            settings = get_session_settings()
+            if settings.backend == "memory":
+                _session_store = MemorySessionStore(
+                    max_entries=settings.max_entries,
+                    ttl_seconds=settings.ttl_seconds,
+                )
+            elif settings.backend == "sqlite":
+                _session_store = SQLiteSessionStore(
+                    path=settings.sqlite_path,
+                    ttl_seconds=settings.ttl_seconds,
+                )
+            _session_store_loaded = True
+    return _session_store
+
+
+def reset_session_store() -> None:
+    """Drop the store so the next request re-reads its configuration."""
+    global _session_store, _session_store_loaded
+    with _store_lock:
+        _session_store = None
+        _session_store_loaded = False
+
+
+def _session_store_stats() -> Dict[str, Any]:
+    store = _session_store
+    if store is None:
+        return {"backend": "none"}
+    return store.stats()
+
+
+register_stats_source("session_store", _session_store_stats)
@@ -0,0 +1,13 @@
+from typing import Any, Callable, Dict
+
+StatsSource = Callable[[], Dict[str, Any]]
+
+STATS_SOURCES: Dict[str, StatsSource] = {}
+
+
+def register_stats_source(name: str, source: StatsSource) -> None:
+    STATS_SOURCES[name] = source
+
+
+def collect_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: source() for name, source in STATS_SOURCES.items()}
@@ -0,0 +1,313 @@
+import contextvars
+import functools
+import hashlib
+import json
+import queue
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Protocol, TypeVar
+
+from src.config.settings import get_tracing_settings
+from src.core.stats import register_stats_source
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    name: str
+    start_time_unix_nano: int
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    end_time_unix_nano: int = 0
+    error: Optional[str] = None
+    _started: int = 0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_time_unix_nano,
+            "end_time_unix_nano": self.end_time_unix_nano,
+            "duration_ms": (self.end_time_unix_nano - self.start_time_unix_nano)
+            / 1_000_000,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: List[Span]) -> None: ...
+
+
+class JsonlSpanExporter:
+    """Appends one JSON object per finished span to a local file."""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self._path, "a", encoding="utf-8") as handle:
+            for span in spans:
+                handle.write(json.dumps(span.as_dict(), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)} for key, value in attributes.items()
+    ]
+
+
+class OtlpHttpSpanExporter:
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0) -> None:
+        self._url = endpoint.rstrip("/") + "/v1/traces"
+        self._service_name = service_name
+        self._timeout = timeout
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": _otlp_attributes(
+                            {"service.name": self._service_name}
+                        )
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    "parentSpanId": span.parent_span_id or "",
+                                    "name": span.name,
+                                    "kind": 1,
+                                    "startTimeUnixNano": str(
+                                        span.start_time_unix_nano
+                                    ),
+                                    "endTimeUnixNano": str(span.end_time_unix_nano),
+                                    "attributes": _otlp_attributes(span.attributes),
+                                    "status": (
+                                        {"code": 2, "message": span.error}
+                                        if span.error
+                                        else {"code": 1}
+                                    ),
+                                }
+                                for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, spans: List[Span]) -> None:
+        request = urllib.request.Request(
+            self._url,
+            data=json.dumps(self.payload(spans), default=str).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self._timeout):
+            pass
+
+
+class Tracer:
+    """Hands finished spans to an exporter on a background thread.
+
+    Export failures are counted and dropped; tracing never fails a request.
+    """
+
+    def __init__(self, exporter: SpanExporter, max_batch_size: int = 256) -> None:
+        self._exporter = exporter
+        self._max_batch_size = max_batch_size
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue()
+        self.exported = 0
+        self.export_errors = 0
+        threading.Thread(target=self._work, name="span-exporter", daemon=True).start()
+
+    def end(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def flush(self) -> None:
+        """Block until every span ended so far has been exported."""
+        self._queue.join()
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self.flush()
+
+    def _work(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._queue.task_done()
+                return
+            batch = [first]
+            stopping = False
+            while len(batch) < self._max_batch_size:
+                try:
+                    span = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            try:
+                self._exporter.export(batch)
+                self.exported += len(batch)
+            except Exception:
+                self.export_errors += len(batch)
+            finally:
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+            if stopping:
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "exported": self.exported,
+            "export_errors": self.export_errors,
+            "pending": self._queue.qsize(),
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def trace_id_for(correlation_id: str) -> str:
+    """Stable 128-bit trace id, so retries of one flow run share a trace."""
+    return hashlib.sha256(correlation_id.encode("utf-8")).hexdigest()[:32]
+
+
+@contextmanager
+def start_span(
+    name: str, correlation_id: Optional[str] = None, **attributes: Any
+) -> Iterator[Optional[Span]]:
+    """Open a child of the current span, or a root span keyed by ``correlation_id``.
+
+    Yields None (and records nothing) when tracing is disabled or when there
+    is neither a parent span nor a correlation id.
+    """
+    tracer = get_tracer()
+    parent = _current_span.get()
+    if tracer is None or (parent is None and correlation_id is None):
+        yield None
+        return
+
+    if correlation_id is not None:
+        attributes["correlation_id"] = correlation_id
+        trace_id, parent_span_id = trace_id_for(correlation_id), None
+    else:
+        trace_id, parent_span_id = parent.trace_id, parent.span_id
+    span = Span(
+        trace_id=trace_id,
+        span_id=secrets.token_hex(8),
+        parent_span_id=parent_span_id,
+        name=name,
+        start_time_unix_nano=time.time_ns(),
+        attributes=attributes,
+        _started=time.perf_counter_ns(),
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.error = type(exc).__name__
+        raise
+    finally:
+        span.end_time_unix_nano = span.start_time_unix_nano + (
+            time.perf_counter_ns() - span._started
+        )
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Async generators may be finalised from another context.
+            _current_span.set(parent)
+        tracer.end(span)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Run a sync function inside a child span named ``name``."""
+
+    def decorator(function: F) -> F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with start_span(name):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+_tracer_lock = threading.Lock()
+_tracer: Optional[Tracer] = None
+_tracer_loaded = False
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Return the process-wide tracer, or None when tracing is disabled."""
+    global _tracer, _tracer_loaded
+    if _tracer_loaded:
+        return _tracer
+    with _tracer_lock:
+        if not _tracer_loaded:
+            settings = get_tracing_settings()
+            if settings.exporter == "jsonl":
+                _tracer = Tracer(JsonlSpanExporter(settings.jsonl_path))
+            elif settings.exporter == "otlp":
+                _tracer = Tracer(
+                    OtlpHttpSpanExporter(
+                        settings.otlp_endpoint, settings.service_name
+                    )
+                )
+            _tracer_loaded = True
+    return _tracer
+
+
+def reset_tracer() -> None:
+    """Drop the tracer so the next span re-reads its configuration."""
+    global _tracer, _tracer_loaded
+    with _tracer_lock:
+        if _tracer is not None:
+            _tracer.shutdown()
+        _tracer = None
+        _tracer_loaded = False
+
+
+def _tracing_stats() -> Dict[str, Any]:
+    tracer = _tracer
+    if tracer is None:
+        return {"enabled": False}
+    return {"enabled": True, **tracer.stats()}
+
+
+register_stats_source("tracing", _tracing_stats)
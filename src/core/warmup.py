@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from src.core.stats import register_stats_source
+
+
+@dataclass(frozen=True)
+class WarmupStep:
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    # A failed required step keeps the process unready; optional ones are recorded.
+    required: bool = True
+
+
+class Warmup:
+    """Startup warm-up state behind the readiness probe.
+
+    ``status`` moves from ``pending`` to ``warming`` and then to ``ready``, or
+    to ``failed`` when a required step raised or timed out. Failed required
+    steps may be retried, which can still move a ``failed`` warm-up to
+    ``ready``.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.status = "pending"
+        self._steps: Dict[str, Dict[str, Any]] = {}
+        self._duration_ms: Optional[float] = None
+        self._attempts = 0
+        self._error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    async def run(
+        self,
+        steps: Sequence[WarmupStep],
+        timeout_seconds: float,
+        retry_base_seconds: float = 0.0,
+        retry_max_seconds: float = 30.0,
+    ) -> bool:
+        """Run ``steps`` in order, each bounded by ``timeout_seconds``.
+
+        With ``retry_base_seconds`` above zero, failed required steps are run
+        again with exponential backoff (capped at ``retry_max_seconds``) until
+        they all succeed; the status stays ``failed`` in between.
+        """
+        started = self._clock()
+        with self._lock:
+            self.status = "warming"
+        failed = await self._run_steps(steps, timeout_seconds)
+        while failed and retry_base_seconds > 0:
+            with self._lock:
+                self.status = "failed"
+                delay = retry_base_seconds * 2 ** (self._attempts - 1)
+            await asyncio.sleep(min(delay, retry_max_seconds))
+            failed = await self._run_steps(failed, timeout_seconds)
+        with self._lock:
+            self._duration_ms = round((self._clock() - started) * 1000, 1)
+            self.status = "failed" if failed else "ready"
+        return not failed
+
+    async def _run_steps(
+        self, steps: Sequence[WarmupStep], timeout_seconds: float
+    ) -> List[WarmupStep]:
+        """Run one attempt of ``steps``; return the required ones that failed."""
+        with self._lock:
+            self._attempts += 1
+        failed = []
+        for step in steps:
+            step_started = self._clock()
+            error = None
+            try:
+                await asyncio.wait_for(step.run(), timeout_seconds)
+            except asyncio.TimeoutError:
+                error = "timeout"
+            except Exception as exc:
+                error = type(exc).__name__
+            if error is not None and step.required:
+                failed.append(step)
+            with self._lock:
+                self._steps[step.name] = {
+                    "ms": round((self._clock() - step_started) * 1000, 1),
+                    "error": error,
+                    "required": step.required,
+                }
+        return failed
+
+    def fail(self, exc: BaseException) -> None:
+        """Mark the warm-up failed by an error outside its steps."""
+        with self._lock:
+            self.status = "failed"
+            self._error = f"{type(exc).__name__}: {exc}"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self.status,
+                "duration_ms": self._duration_ms,
+                "attempts": self._attempts,
+                "error": self._error,
+                "steps": {name: dict(step) for name, step in self._steps.items()},
+            }
+
+
+_warmup_lock = threading.Lock()
+_warmup: Optional[Warmup] = None
+
+
+def get_warmup() -> Warmup:
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = Warmup()
+        return _warmup
+
+
+def reset_warmup() -> None:
+    global _warmup
+    with _warmup_lock:
+        _warmup = None
+
+
+def _warmup_stats() -> Dict[str, Any]:
+    return get_warmup().stats()
+
+
+register_stats_source("warmup", _warmup_stats)
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, Optional, Protocol, TypeVar
+
+T = TypeVar("T")
+
+
+class ModelProvider(Protocol):
+    model_name: str
+
+    def generate(self, prompt: str) -> str: ...
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before the upstream call finished."""
+
+
+def remaining_seconds(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left until a ``time.monotonic()`` deadline, or None if unbounded."""
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+async def with_deadline(call: Awaitable[T], deadline: Optional[float]) -> T:
+    remaining = remaining_seconds(deadline)
+    if remaining is None:
+        return await call
+    if remaining <= 0:
+        if asyncio.iscoroutine(call):
+            call.close()
+        raise DeadlineExceeded()
+    try:
+        return await asyncio.wait_for(call, timeout=remaining)
+    except asyncio.TimeoutError as exc:
+        raise DeadlineExceeded() from exc
+
+
+async def agenerate(
+    provider: ModelProvider, prompt: str, deadline: Optional[float] = None
+) -> str:
+    """Call the provider without blocking the event loop.
+
+    Providers exposing ``agenerate`` are awaited directly; sync-only providers
+    run in a worker thread. The call is abandoned once ``deadline`` passes.
+    """
+    provider_agenerate = getattr(provider, "agenerate", None)
+    if provider_agenerate is not None:
+        return await with_deadline(provider_agenerate(prompt), deadline)
+    return await with_deadline(asyncio.to_thread(provider.generate, prompt), deadline)
+
+
+async def astream(
+    provider: ModelProvider, prompt: str, deadline: Optional[float] = None
+) -> AsyncIterator[str]:
+    """Yield text chunks as the provider produces them.
+
+    Providers without ``astream`` yield their whole answer as one chunk. Each
+    chunk must arrive before ``deadline``.
+    """
+    provider_astream = getattr(provider, "astream", None)
+    if provider_astream is None:
+        yield await agenerate(provider, prompt, deadline)
+        return
+    chunks = provider_astream(prompt)
+    while True:
+        try:
+            chunk = await with_deadline(anext(chunks), deadline)
+        except StopAsyncIteration:
+            return
+        yield chunk
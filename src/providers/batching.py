@@ -0,0 +1,128 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from src.providers.base import ModelProvider, agenerate, with_deadline
+
+# Combines several prompts into one request prompt.
+CombinePrompts = Callable[[List[str]], str]
+# Splits one batched model output into per-prompt outputs; None marks an item
+# that could not be parsed. Raising means the whole batch is unusable.
+SplitOutput = Callable[[str, int], List[Optional[str]]]
+
+
+class PromptBatcher:
+    """Coalesces concurrent prompts into one upstream call.
+
+    Prompts submitted within ``max_delay_seconds`` of the first pending prompt
+    (or until ``max_batch_size`` is reached) are sent together. Only prompts
+    with the same ``partition`` share a batch, so callers can keep tenants
+    (or anything else the combined prompt must not mix) apart. Items the combined output does not answer are retried as
+    individual calls.
+    """
+
+    def __init__(
+        self,
+        provider: ModelProvider,
+        combine: CombinePrompts,
+        split: SplitOutput,
+        max_batch_size: int,
+        max_delay_seconds: float,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("Batch size must be at least 1.")
+        self._provider = provider
+        self._combine = combine
+        self._split = split
+        self._max_batch_size = max_batch_size
+        self._max_delay_seconds = max_delay_seconds
+        self._pending: Dict[Hashable, List[Tuple[str, "asyncio.Future[str]"]]] = {}
+        self._flush_handles: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self.batches = 0
+        self.batched_items = 0
+        self.single_calls = 0
+        self.fallback_items = 0
+
+    async def submit(
+        self,
+        prompt: str,
+        deadline: Optional[float] = None,
+        partition: Hashable = "",
+    ) -> str:
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[str]" = loop.create_future()
+        pending = self._pending.setdefault(partition, [])
+        pending.append((prompt, future))
+        if len(pending) >= self._max_batch_size:
+            self._flush(partition)
+        elif partition not in self._flush_handles:
+            self._flush_handles[partition] = loop.call_later(
+                self._max_delay_seconds, self._flush, partition
+            )
+        return await with_deadline(future, deadline)
+
+    def _flush(self, partition: Hashable) -> None:
+        handle = self._flush_handles.pop(partition, None)
+        if handle is not None:
+            handle.cancel()
+        items = self._pending.pop(partition, [])
+        if items:
+            task = asyncio.ensure_future(self._send(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, items: List[Tuple[str, "asyncio.Future[str]"]]) -> None:
+        if len(items) == 1:
+            self.single_calls += 1
+            await self._send_one(*items[0])
+            return
+
+        self.batches += 1
+        self.batched_items += len(items)
+        try:
+            output = await agenerate(
+                self._provider, self._combine([prompt for prompt, _ in items])
+            )
+        except Exception as exc:
+            for _, future in items:
+                _set_exception(future, exc)
+            return
+
+        try:
+            outputs = self._split(output, len(items))
+        except Exception:
+            outputs = [None] * len(items)
+
+        retries = []
+        for (prompt, future), item_output in zip(items, outputs):
+            if item_output is None:
+                self.fallback_items += 1
+                retries.append(self._send_one(prompt, future))
+            else:
+                _set_result(future, item_output)
+        if retries:
+            await asyncio.gather(*retries)
+
+    async def _send_one(self, prompt: str, future: "asyncio.Future[str]") -> None:
+        try:
+            _set_result(future, await agenerate(self._provider, prompt))
+        except Exception as exc:
+            _set_exception(future, exc)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "single_calls": self.single_calls,
+            "fallback_items": self.fallback_items,
+        }
+
+
+def _set_result(future: "asyncio.Future[str]", value: str) -> None:
+    if not future.done():
+        future.set_result(value)
+
+
+def _set_exception(future: "asyncio.Future[str]", exc: Exception) -> None:
+    if not future.done():
+        future.set_exception(exc)
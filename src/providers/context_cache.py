@@ -0,0 +1,142 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+
+def cacheable_prefix(prompt: str) -> Optional[str]:
+    """The static leading segment the prompt's builder marked as cacheable.
+
+    Callers mark it with a ``cacheable_prefix`` attribute on the prompt string;
+    plain strings are always sent inline.
+    """
+    prefix = getattr(prompt, "cacheable_prefix", None)
+    if (
+        isinstance(prefix, str)
+        and prefix
+        and len(prompt) > len(prefix)
+        and prompt.startswith(prefix)
+    ):
+        return prefix
+    return None
+
+
+@dataclass(frozen=True)
+class ContextCachePolicy:
+    ttl_seconds: float = 3600.0
+    # A handle is recreated once it is this close to expiry.
+    refresh_seconds: float = 300.0
+    # Upstream rejects caches below a minimum size; shorter prefixes are sent inline.
+    min_prefix_chars: int = 4096
+    failure_backoff_seconds: float = 60.0
+
+
+@dataclass(frozen=True)
+class _Entry:
+    name: str
+    expires_at: float
+
+
+CreateCache = Callable[[str, float], Awaitable[str]]
+
+
+class ContextCache:
+    """Upstream cached-content handles for static prompt prefixes.
+
+    ``create(prefix, ttl_seconds)`` returns a handle name. One caller at a time
+    (re)creates a handle; concurrent callers keep using the current handle
+    until it expires, or send the prefix inline. A failed creation is not
+    retried for ``failure_backoff_seconds``.
+    """
+
+    def __init__(
+        self,
+        create: CreateCache,
+        policy: ContextCachePolicy,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._create = create
+        self._policy = policy
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self._creating: Set[str] = set()
+        self._retry_at: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.creates = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.invalidations = 0
+        # Prefixes below min_prefix_chars, sent inline; a high count with no
+        # creates means the prompts are too short for upstream caching.
+        self.too_short = 0
+
+    def _usable(self, entry: Optional[_Entry], now: float) -> Optional[str]:
+        return entry.name if entry is not None and entry.expires_at > now else None
+
+    async def handle(self, prefix: str) -> Optional[str]:
+        """Return a live handle for ``prefix``, creating one if needed."""
+        if len(prefix) < self._policy.min_prefix_chars:
+            with self._lock:
+                self.too_short += 1
+            return None
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(prefix)
+            fresh = (
+                entry is not None
+                and entry.expires_at - self._policy.refresh_seconds > now
+            )
+            backing_off = self._retry_at.get(prefix, 0.0) > now
+            if fresh or backing_off or prefix in self._creating:
+                name = self._usable(entry, now)
+                if name is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                return name
+            self._creating.add(prefix)
+
+        try:
+            name = await self._create(prefix, self._policy.ttl_seconds)
+        except Exception:
+            with self._lock:
+                self._creating.discard(prefix)
+                self._retry_at[prefix] = now + self._policy.failure_backoff_seconds
+                self.failures += 1
+                name = self._usable(entry, now)
+                if name is None:
+                    self.misses += 1
+                return name
+
+        with self._lock:
+            self._creating.discard(prefix)
+            self._retry_at.pop(prefix, None)
+            self._entries[prefix] = _Entry(name, now + self._policy.ttl_seconds)
+            if entry is None:
+                self.creates += 1
+            else:
+                self.refreshes += 1
+        return name
+
+    def invalidate(self, prefix: str, name: str) -> None:
+        """Forget ``name`` after upstream reports it missing or expired."""
+        with self._lock:
+            entry = self._entries.get(prefix)
+            if entry is not None and entry.name == name:
+                del self._entries[prefix]
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "handles": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "creates": self.creates,
+                "refreshes": self.refreshes,
+                "failures": self.failures,
+                "invalidations": self.invalidations,
+                "too_short": self.too_short,
+            }
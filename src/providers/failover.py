@@ -0,0 +1,267 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
+
+from src.providers.base import ModelProvider, agenerate, astream
+from src.providers.retry import is_retryable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    error_rate: float = 0.5
+    min_calls: int = 5
+    window: int = 20
+    open_seconds: float = 30.0
+    # 0 disables opening on latency.
+    latency_threshold_ms: float = 0.0
+    ewma_alpha: float = 0.2
+
+
+class CircuitBreaker:
+    """Per-region breaker that opens on error rate or EWMA latency.
+
+    After ``open_seconds`` one probe call is let through (half-open); its
+    outcome closes or re-opens the breaker.
+    """
+
+    def __init__(
+        self, policy: BreakerPolicy, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self._policy = policy
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=policy.window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.ewma_latency_ms: Optional[float] = None
+        self.calls = 0
+        self.failures = 0
+        self.opens = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and (
+            self._clock() - self._opened_at >= self._policy.open_seconds
+        ):
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def try_acquire(self) -> bool:
+        """Return True if a call may be sent through this breaker now."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def force_probe(self) -> None:
+        """Send a call through as a half-open probe before ``open_seconds``.
+
+        Used when every region is open: the call has to go somewhere, and as a
+        probe its success closes the breaker instead of being ignored.
+        """
+        with self._lock:
+            if self._current_state() != CLOSED:
+                self._state = HALF_OPEN
+                self._probe_in_flight = True
+
+    def release(self) -> None:
+        """Give back a half-open probe slot for a call that was abandoned."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self, latency_ms: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self._outcomes.append(True)
+            alpha = self._policy.ewma_alpha
+            self.ewma_latency_ms = (
+                latency_ms
+                if self.ewma_latency_ms is None
+                else alpha * latency_ms + (1 - alpha) * self.ewma_latency_ms
+            )
+            too_slow = (
+                self._policy.latency_threshold_ms > 0
+                and self.ewma_latency_ms > self._policy.latency_threshold_ms
+            )
+            if self._state == HALF_OPEN and not too_slow:
+                self._state = CLOSED
+                self._outcomes.clear()
+            elif too_slow:
+                self._open()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.failures += 1
+            self._outcomes.append(False)
+            if self._state == HALF_OPEN:
+                self._open()
+                return
+            failed = self._outcomes.count(False)
+            if (
+                len(self._outcomes) >= self._policy.min_calls
+                and failed / len(self._outcomes) >= self._policy.error_rate
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+        self.opens += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            outcomes = list(self._outcomes)
+            return {
+                "state": self._current_state(),
+                "ewma_latency_ms": (
+                    round(self.ewma_latency_ms, 1)
+                    if self.ewma_latency_ms is not None
+                    else None
+                ),
+                "error_rate": (
+                    outcomes.count(False) / len(outcomes) if outcomes else 0.0
+                ),
+                "calls": self.calls,
+                "failures": self.failures,
+                "opens": self.opens,
+            }
+
+
+@dataclass
+class RegionalProvider:
+    name: str
+    provider: ModelProvider
+    breaker: CircuitBreaker
+
+
+class FailoverProvider:
+    """Routes each call to the fastest healthy region, failing over on errors.
+
+    Only retryable errors (5xx, 429, timeouts, dropped connections) count
+    against a region and move the call on; any other error is the request's
+    own fault and is raised at once. Regions with an open breaker are skipped;
+    if every breaker is open the fastest region is still tried, as a half-open
+    probe, rather than failing outright.
+    """
+
+    def __init__(self, regions: Sequence[RegionalProvider]) -> None:
+        if not regions:
+            raise ValueError("Missing Vertex AI configuration.")
+        self.model_name = regions[0].provider.model_name
+        self._regions = list(regions)
+
+    def _candidates(self) -> Iterator[RegionalProvider]:
+        # Regions without latency samples sort first so they get measured.
+        ranked = sorted(
+            self._regions,
+            key=lambda region: region.breaker.ewma_latency_ms or 0.0,
+        )
+        acquired = False
+        for region in ranked:
+            if region.breaker.try_acquire():
+                acquired = True
+                yield region
+        if not acquired:
+            ranked[0].breaker.force_probe()
+            yield ranked[0]
+
+    async def agenerate(self, prompt: str) -> str:
+        errors: List[Exception] = []
+        for region in self._candidates():
+            started = time.monotonic()
+            try:
+                output = await agenerate(region.provider, prompt)
+            except asyncio.CancelledError:
+                region.breaker.release()
+                raise
+            except Exception as exc:
+                if not is_retryable(exc):
+                    region.breaker.release()
+                    raise
+                region.breaker.record_failure()
+                errors.append(exc)
+                continue
+            region.breaker.record_success(_elapsed_ms(started))
+            return output
+        raise errors[-1]
+
+    def generate(self, prompt: str) -> str:
+        errors: List[Exception] = []
+        for region in self._candidates():
+            started = time.monotonic()
+            try:
+                output = region.provider.generate(prompt)
+            except Exception as exc:
+                if not is_retryable(exc):
+                    region.breaker.release()
+                    raise
+                region.breaker.record_failure()
+                errors.append(exc)
+                continue
+            region.breaker.record_success(_elapsed_ms(started))
+            return output
+        raise errors[-1]
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        errors: List[Exception] = []
+        for region in self._candidates():
+            started = time.monotonic()
+            chunks = astream(region.provider, prompt)
+            try:
+                first_chunk = await anext(chunks)
+            except StopAsyncIteration:
+                region.breaker.record_success(_elapsed_ms(started))
+                return
+            except asyncio.CancelledError:
+                region.breaker.release()
+                raise
+            except Exception as exc:
+                if not is_retryable(exc):
+                    region.breaker.release()
+                    raise
+                region.breaker.record_failure()
+                errors.append(exc)
+                continue
+            # Once text has been forwarded the stream cannot move regions.
+            region.breaker.record_success(_elapsed_ms(started))
+            yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+            return
+        raise errors[-1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {region.name: region.breaker.stats() for region in self._regions}
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.monotonic() - started) * 1000
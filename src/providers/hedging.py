@@ -0,0 +1,105 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+Attempt = Callable[[], Awaitable[str]]
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies, in seconds."""
+
+    def __init__(self, window: int = 200) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(math.ceil(percentile / 100 * len(ordered)) - 1, 0)
+        return ordered[min(rank, len(ordered) - 1)]
+
+
+class Hedger:
+    """Sends a second attempt when the first is slower than the tracked percentile.
+
+    Whichever attempt succeeds first wins and the other is cancelled. Until
+    ``min_samples`` latencies are known no hedge is sent.
+    """
+
+    def __init__(
+        self,
+        percentile: float,
+        min_delay_seconds: float,
+        min_samples: int,
+        window: int = 200,
+    ) -> None:
+        self._percentile = percentile
+        self._min_delay_seconds = min_delay_seconds
+        self._min_samples = min_samples
+        self._latencies = LatencyTracker(window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def threshold_seconds(self) -> Optional[float]:
+        if len(self._latencies) < self._min_samples:
+            return None
+        latency = self._latencies.percentile(self._percentile)
+        if latency is None:
+            return None
+        return max(latency, self._min_delay_seconds)
+
+    async def call(self, attempt: Attempt) -> str:
+        self.calls += 1
+        started = time.monotonic()
+        threshold = self.threshold_seconds()
+        primary = asyncio.ensure_future(attempt())
+        tasks: Set["asyncio.Future[str]"] = {primary}
+        try:
+            if threshold is not None:
+                done, _ = await asyncio.wait(tasks, timeout=threshold)
+                if not done:
+                    self.hedges += 1
+                    tasks.add(asyncio.ensure_future(attempt()))
+            result, winner = await _first_success(tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if winner is not primary:
+            self.hedge_wins += 1
+        self._latencies.record(time.monotonic() - started)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        threshold = self.threshold_seconds()
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "threshold_ms": int(threshold * 1000) if threshold is not None else None,
+        }
+
+
+async def _first_success(
+    tasks: Set["asyncio.Future[str]"],
+) -> Tuple[str, "asyncio.Future[str]"]:
+    pending = set(tasks)
+    errors = []
+    while pending:
+        done, pending = await asyncio.wait(
+            pending, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in done:
+            error = task.exception()
+            if error is None:
+                return task.result(), task
+            errors.append(error)
+    raise errors[0]
@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from src.providers.context_cache import ContextCachePolicy
+from src.providers.failover import (
+    BreakerPolicy,
+    CircuitBreaker,
+    FailoverProvider,
+    RegionalProvider,
+)
+from src.providers.vertex_ai import VertexAIProvider
+
+ProviderKey = Tuple[str, str, str, str, str, Optional[ContextCachePolicy], bool]
+FailoverKey = Tuple[
+    str,
+    Tuple[Tuple[str, str], ...],
+    BreakerPolicy,
+    str,
+    str,
+    Optional[ContextCachePolicy],
+    bool,
+]
+
+DEFAULT_MAX_PROVIDERS = 8
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    size: int
+    builds: int
+    hits: int
+    evictions: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ProviderPool:
+    """Process-wide VertexAIProvider instances, one per model, endpoint and base URL.
+
+    Providers are built on first use and then shared across requests and
+    threads. A configuration change produces a new key and therefore a new
+    provider; the least recently used keys are evicted beyond ``max_size``.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_PROVIDERS) -> None:
+        if max_size < 1:
+            raise ValueError("Provider pool size must be at least 1.")
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._providers: "OrderedDict[ProviderKey, VertexAIProvider]" = OrderedDict()
+        self._failover: Dict[FailoverKey, FailoverProvider] = {}
+        self._builds = 0
+        self._hits = 0
+        self._evictions = 0
+
+    def get(
+        self,
+        model_name: str,
+        project: str,
+        location: str,
+        base_url: str = "",
+        access_token: str = "",
+        cache_policy: Optional[ContextCachePolicy] = None,
+        structured_output: bool = False,
+    ) -> VertexAIProvider:
+        key = (
+            model_name,
+            project,
+            location,
+            base_url,
+            access_token,
+            cache_policy,
+            structured_output,
+        )
+        with self._lock:
+            provider = self._providers.get(key)
+            if provider is not None:
+                self._providers.move_to_end(key)
+                self._hits += 1
+                return provider
+
+            # Built under the lock so concurrent first requests share one client.
+            provider = VertexAIProvider(
+                model_name=model_name,
+                project=project,
+                location=location,
+                base_url=base_url,
+                access_token=access_token,
+                cache_policy=cache_policy,
+                structured_output=structured_output,
+            )
+            self._providers[key] = provider
+            self._builds += 1
+            while len(self._providers) > self._max_size:
+                self._providers.popitem(last=False)
+                self._evictions += 1
+            return provider
+
+    def get_failover(
+        self,
+        model_name: str,
+        endpoints: Sequence[Tuple[str, str]],
+        policy: BreakerPolicy,
+        base_url: str = "",
+        access_token: str = "",
+        cache_policy: Optional[ContextCachePolicy] = None,
+        structured_output: bool = False,
+    ) -> FailoverProvider:
+        """Return the shared failover provider over (project, location) endpoints.
+
+        Breaker state lives as long as the endpoint list and policy are unchanged.
+        """
+        key: FailoverKey = (
+            model_name,
+            tuple(endpoints),
+            policy,
+            base_url,
+            access_token,
+            cache_policy,
+            structured_output,
+        )
+        with self._lock:
+            provider = self._failover.get(key)
+            if provider is not None:
+                return provider
+        regions = [
+            RegionalProvider(
+                name=f"{project}/{location}",
+                provider=self.get(
+                    model_name,
+                    project,
+                    location,
+                    base_url,
+                    access_token,
+                    cache_policy,
+                    structured_output,
+                ),
+                breaker=CircuitBreaker(policy),
+            )
+            for project, location in endpoints
+        ]
+        with self._lock:
+            provider = self._failover.get(key)
+            if provider is None:
+                # A configuration change replaces the previous failover set.
+                provider = FailoverProvider(regions)
+                self._failover = {key: provider}
+            return provider
+
+    def failover_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            providers = list(self._failover.values())
+        return providers[0].stats() if providers else {}
+
+    def context_cache_stats(self) -> Dict[str, Any]:
+        """Context cache counters summed over pooled providers."""
+        with self._lock:
+            providers = list(self._providers.values())
+        totals: Dict[str, Any] = {}
+        for provider in providers:
+            cache = getattr(provider, "context_cache", None)
+            if cache is None:
+                continue
+            for key, value in cache.stats().items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def clear(self) -> None:
+        with self._lock:
+            self._evictions += len(self._providers)
+            self._providers.clear()
+            self._failover.clear()
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(
+                size=len(self._providers),
+                builds=self._builds,
+                hits=self._hits,
+                evictions=self._evictions,
+            )
+
+
+PROVIDER_POOL = ProviderPool()
@@ -0,0 +1,131 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Iterator, Optional, TypeVar
+
+from src.providers.base import DeadlineExceeded, remaining_seconds
+
+try:
+    import httpx
+
+    _TRANSIENT_ERRORS: tuple = (ConnectionError, TimeoutError, httpx.TransportError)
+except ImportError:  # pragma: no cover - httpx ships with google-genai
+    _TRANSIENT_ERRORS = (ConnectionError, TimeoutError)
+
+T = TypeVar("T")
+
+# Quota, timeout and server-side statuses; anything else (auth, validation,
+# not found) fails immediately.
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay_seconds: float = 0.2
+    max_delay_seconds: float = 5.0
+
+
+@dataclass
+class RetryCounter:
+    """Retries spent on behalf of one request, reported in its metadata."""
+
+    retries: int = 0
+
+
+def _error_chain(exc: BaseException) -> Iterator[BaseException]:
+    seen = set()
+    current: Optional[BaseException] = exc
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        yield current
+        current = current.__cause__ or current.__context__
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """HTTP status of an SDK error, looking through wrapped causes."""
+    for error in _error_chain(exc):
+        for attribute in ("code", "status_code"):
+            value = getattr(error, attribute, None)
+            if isinstance(value, int) and 100 <= value <= 599:
+                return value
+        response = getattr(error, "response", None)
+        value = getattr(response, "status_code", None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, DeadlineExceeded):
+        return False
+    status = status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(isinstance(error, _TRANSIENT_ERRORS) for error in _error_chain(exc))
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Seconds requested by a ``Retry-After`` response header, if any."""
+    for error in _error_chain(exc):
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        value = headers.get("retry-after") if headers is not None else None
+        if not value:
+            continue
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(retry_at.timestamp() - time.time(), 0.0)
+    return None
+
+
+def backoff_delay(
+    policy: RetryPolicy,
+    retry_number: int,
+    retry_after: Optional[float] = None,
+    rand: Callable[[], float] = random.random,
+) -> float:
+    """Full-jitter exponential backoff, never shorter than ``retry_after``."""
+    ceiling = min(
+        policy.max_delay_seconds,
+        policy.base_delay_seconds * 2 ** (retry_number - 1),
+    )
+    delay = rand() * ceiling
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+async def call_with_retry(
+    attempt: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    deadline: Optional[float] = None,
+    counter: Optional[RetryCounter] = None,
+) -> T:
+    """Run ``attempt`` again after retryable errors.
+
+    Gives up with the last error once ``max_attempts`` is reached, the error
+    is fatal, or the next backoff would end after ``deadline``.
+    """
+    retry_number = 0
+    while True:
+        try:
+            return await attempt()
+        except Exception as exc:
+            retry_number += 1
+            if retry_number >= policy.max_attempts or not is_retryable(exc):
+                raise
+            delay = backoff_delay(policy, retry_number, retry_after_seconds(exc))
+            remaining = remaining_seconds(deadline)
+            if remaining is not None and delay >= remaining:
+                raise
+            if counter is not None:
+                counter.retries += 1
+        await asyncio.sleep(delay)
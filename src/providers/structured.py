@@ -0,0 +1,44 @@
+import dataclasses
+import typing
+from typing import Any, Dict, List, Optional
+
+JSON_MIME_TYPE = "application/json"
+
+_JSON_TYPES = {str: "string", bool: "boolean", int: "integer", float: "number"}
+
+
+def _json_type(annotation: Any) -> Any:
+    if annotation in _JSON_TYPES:
+        return _JSON_TYPES[annotation]
+    args = typing.get_args(annotation)
+    if typing.get_origin(annotation) is typing.Union and type(None) in args:
+        return [_json_type(arg) for arg in args if arg is not type(None)] + ["null"]
+    raise TypeError(f"No JSON schema type for {annotation!r}.")
+
+
+def json_schema_for_dataclass(cls: type) -> Dict[str, Any]:
+    """Object schema with one property per field of a flat dataclass.
+
+    Fields without a default are required; ``Optional[X]`` becomes nullable.
+    """
+    hints = typing.get_type_hints(cls)
+    properties: Dict[str, Any] = {}
+    required: List[str] = []
+    for field in dataclasses.fields(cls):
+        properties[field.name] = {"type": _json_type(hints[field.name])}
+        if (
+            field.default is dataclasses.MISSING
+            and field.default_factory is dataclasses.MISSING
+        ):
+            required.append(field.name)
+    return {"type": "object", "properties": properties, "required": required}
+
+
+def response_schema(prompt: str) -> Optional[Dict[str, Any]]:
+    """The JSON schema the prompt's builder attached, if any.
+
+    Callers attach it as a ``response_schema`` attribute on the prompt string;
+    plain strings are answered unconstrained.
+    """
+    schema = getattr(prompt, "response_schema", None)
+    return schema if isinstance(schema, dict) else None
@@ -1,23 +1,148 @@
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from src.providers.context_cache import (
+    ContextCache,
+    ContextCachePolicy,
+    cacheable_prefix,
+)
+from src.providers.retry import status_code
+from src.providers.structured import JSON_MIME_TYPE, response_schema
+
+# Upstream answers a missing or expired cached-content handle with one of these.
+_STALE_CACHE_STATUS_CODES = {400, 404}
+
+
+def _response_text(response: Any) -> str:
+    if hasattr(response, "text"):
+        return response.text
+    if hasattr(response, "content"):
+        return response.content
+    return str(response)
+
+
 class VertexAIProvider:
-    def __init__(self, model_name: str, project: str, location: str) -> None:
+    def __init__(
+        self,
+        model_name: str,
+        project: str,
+        location: str,
+        base_url: str = "",
+        access_token: str = "",
+        cache_policy: Optional[ContextCachePolicy] = None,
+        structured_output: bool = False,
+    ) -> None:
         if not model_name or not project or not location:
             raise ValueError("Missing Vertex AI configuration.")
 
         self.model_name = model_name
+        self._structured_output = structured_output
         from langchain_google_genai import ChatGoogleGenerativeAI
 
+        client_options: dict[str, Any] = {}
+        if base_url:
+            client_options["base_url"] = base_url
+        if access_token:
+            # A fixed bearer token instead of Application Default Credentials.
+            from google.oauth2.credentials import Credentials
+
+            client_options["credentials"] = Credentials(token=access_token)
+
         self._client = ChatGoogleGenerativeAI(
             model=model_name,
             project=project,
             location=location,
             vertexai=True,
             temperature=0.2,
+            # Retries are owned by src.providers.retry, which respects deadlines.
+            max_retries=1,
+            **client_options,
+        )
+        self.context_cache = (
+            ContextCache(self._create_cached_prefix, cache_policy)
+            if cache_policy is not None
+            else None
         )
 
+    async def _create_cached_prefix(self, prefix: str, ttl_seconds: float) -> str:
+        from google.genai import types
+
+        cached = await self._client.client.aio.caches.create(
+            model=self.model_name,
+            config=types.CreateCachedContentConfig(
+                system_instruction=prefix, ttl=f"{int(ttl_seconds)}s"
+            ),
+        )
+        return cached.name
+
+    async def _cached_prompt(self, prompt: str) -> Tuple[str, Optional[str]]:
+        """Split off a cached prefix: (prefix, handle), or ("", None) to send inline."""
+        if self.context_cache is None:
+            return "", None
+        prefix = cacheable_prefix(prompt)
+        if prefix is None:
+            return "", None
+        return prefix, await self.context_cache.handle(prefix)
+
+    def _output_options(self, prompt: str) -> Dict[str, Any]:
+        """Request schema-constrained JSON for prompts that carry a response schema."""
+        if not self._structured_output:
+            return {}
+        schema = response_schema(prompt)
+        if schema is None:
+            return {}
+        return {"response_mime_type": JSON_MIME_TYPE, "response_json_schema": schema}
+
+    def _is_stale_cache(self, exc: Exception, prefix: str, name: str) -> bool:
+        if status_code(exc) not in _STALE_CACHE_STATUS_CODES:
+            return False
+        assert self.context_cache is not None
+        self.context_cache.invalidate(prefix, name)
+        return True
+
     def generate(self, prompt: str) -> str:
-        response = self._client.invoke(prompt)
-        if hasattr(response, "text"):
-            return response.text
-        if hasattr(response, "content"):
-            return response.content
-        return str(response)
+        options = self._output_options(prompt)
+        return _response_text(self._client.invoke(prompt, **options))
+
+    async def agenerate(self, prompt: str) -> str:
+        options = self._output_options(prompt)
+        prefix, name = await self._cached_prompt(prompt)
+        if name is not None:
+            try:
+                return _response_text(
+                    await self._client.ainvoke(
+                        prompt[len(prefix) :], cached_content=name, **options
+                    )
+                )
+            except Exception as exc:
+                if not self._is_stale_cache(exc, prefix, name):
+                    raise
+        return _response_text(await self._client.ainvoke(prompt, **options))
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        options = self._output_options(prompt)
+        prefix, name = await self._cached_prompt(prompt)
+        if name is not None:
+            chunks = self._client.astream(
+                prompt[len(prefix) :], cached_content=name, **options
+            )
+            try:
+                # A stale handle fails before the first chunk; fall back inline.
+                first = await anext(chunks)
+            except StopAsyncIteration:
+                return
+            except Exception as exc:
+                if not self._is_stale_cache(exc, prefix, name):
+                    raise
+            else:
+                text = _response_text(first)
+                if text:
+                    yield text
+                async for chunk in chunks:
+                    text = _response_text(chunk)
+                    if text:
+                        yield text
+                return
+        async for chunk in self._client.astream(prompt, **options):
+            text = _response_text(chunk)
+            if text:
+                yield text
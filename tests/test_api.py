@@ -1,9 +1,25 @@
+import asyncio
 import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
 
 from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
 
+from src.agents.survey_agent.cache import reset_routing_cache
+from src.agents.survey_agent.state_token import decode_state_token, encode_state_token
 from src.api import routes
+from src.api.schemas import ErrorResponse, Result, SuccessResponse, SurveyRequest
 from src.app import app
+from src.core.admission import reset_admission_controller
+from src.core.idempotency import reset_idempotency_cache
+from src.core.sessions import reset_session_store
+from src.core.tracing import get_tracer, reset_tracer, trace_id_for
+from src.core.warmup import reset_warmup
 
 client = TestClient(app)
 SURVEY_PATH = routes.SURVEY_PATH
@@ -51,6 +67,95 @@ def test_health() -> None:
     assert response.json() == {"ok": True}
 
 
+def test_ready_turns_green_after_warmup(monkeypatch) -> None:
+    built = []
+    generated = []
+
+    class WarmupProvider:
+        model_name = "test-model"
+
+        async def agenerate(self, prompt: str) -> str:
+            generated.append(prompt)
+            raise RuntimeError("cold upstream")
+
+    def build_provider() -> WarmupProvider:
+        built.append(1)
+        return WarmupProvider()
+
+    monkeypatch.setattr(routes, "get_vertex_provider", build_provider)
+    monkeypatch.setenv("WARMUP_GENERATE", "true")
+    reset_warmup()
+    assert client.get("/ready").status_code == 503
+
+    with TestClient(app) as warm_client:
+        for _ in range(100):
+            response = warm_client.get("/ready")
+            if response.status_code == 200:
+                break
+            time.sleep(0.01)
+        assert response.json() == {"ok": True, "status": "ready"}
+        steps = warm_client.get("/stats").json()["warmup"]["steps"]
+    assert list(steps) == ["agents", "provider", "generate"]
+    assert steps["generate"]["error"] == "RuntimeError"
+    assert len(built) == 2 and len(generated) == 1
+    reset_warmup()
+
+
+def test_warmup_retries_failed_steps_and_records_setup_errors(monkeypatch) -> None:
+    builds = []
+
+    def flaky_provider() -> ScenarioProvider:
+        builds.append(1)
+        if len(builds) < 3:
+            raise ConnectionError("credentials not mounted yet")
+        return ScenarioProvider()
+
+    monkeypatch.setattr(routes, "get_vertex_provider", flaky_provider)
+    monkeypatch.setenv("WARMUP_RETRY_BASE_MS", "1")
+    reset_warmup()
+    assert asyncio.run(routes.run_warmup()) is True
+    stats = client.get("/stats").json()["warmup"]
+    assert stats["status"] == "ready"
+    assert stats["attempts"] == 3
+    assert stats["steps"]["provider"]["error"] is None
+
+    monkeypatch.setenv("WARMUP_TIMEOUT_MS", "soon")
+    reset_warmup()
+    assert asyncio.run(routes.run_warmup()) is False
+    assert client.get("/ready").status_code == 503
+    stats = client.get("/stats").json()["warmup"]
+    assert stats["status"] == "failed"
+    assert stats["error"] == "ValueError: Invalid configuration: WARMUP_TIMEOUT_MS"
+    reset_warmup()
+
+
+def test_importing_the_app_defers_agents_and_the_model_sdk() -> None:
+    code = (
+        "import sys, src.app; "
+        "print(sorted(m for m in ('langchain_google_genai', 'src.agents.survey_agent')"
+        " if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_metrics_endpoint() -> None:
+    original_provider = routes.get_vertex_provider
+    routes.get_vertex_provider = lambda: ScenarioProvider()
+    client.post(SURVEY_PATH, json=build_payload("Start a survey"))
+    client.post(SURVEY_PATH, json={"source": "msteams"})
+    routes.get_vertex_provider = original_provider
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE survey_stage_duration_seconds histogram" in response.text
+    assert 'survey_stage_duration_seconds_count{stage="validation"}' in response.text
+    assert 'survey_agent_requests_total{agent="survey"}' in response.text
+
+
 def build_payload(message_content: str, survey_state: dict | None = None) -> dict:
     payload = {
         "source": "msteams",
@@ -215,6 +320,534 @@ def test_valid_request_multi_turn() -> None:
     routes.get_vertex_provider = original_provider
 
 
+class AsyncOnlyProvider:
+    model_name = "test-model"
+
+    def __init__(self, payload: dict) -> None:
+        self.payload = payload
+        self.call_count = 0
+
+    async def agenerate(self, prompt: str) -> str:
+        self.call_count += 1
+        return json.dumps(self.payload)
+
+
+def test_async_provider_is_awaited() -> None:
+    original_provider = routes.get_vertex_provider
+    provider = AsyncOnlyProvider(
+        {
+            "next_question_id": "q2",
+            "accepted_answer": True,
+            "normalized_answer": "Gather onboarding feedback.",
+            "assistant_message": "Captured.",
+        }
+    )
+    routes.get_vertex_provider = lambda: provider
+
+    response = client.post(
+        SURVEY_PATH,
+        json=build_payload(
+            "The goal is onboarding feedback.",
+            survey_state={
+                "status": "in_progress",
+                "initial_message": "<p>Hello @Agent please run survey</p>",
+                "current_question_id": "q1",
+                "awaiting_question_id": "q1",
+                "answers": [],
+            },
+        ),
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ok"] is True
+    assert body["result"]["survey_state"]["current_question_id"] == "q2"
+    assert provider.call_count == 1
+
+    routes.get_vertex_provider = original_provider
+
+
+def test_routing_cache_skips_repeated_model_calls(monkeypatch) -> None:
+    monkeypatch.setenv("ROUTING_CACHE_ENABLED", "true")
+    reset_routing_cache()
+    original_provider = routes.get_vertex_provider
+    decision = {
+        "next_question_id": "q3",
+        "accepted_answer": True,
+        "normalized_answer": "Everyone.",
+        "assistant_message": "Captured.",
+    }
+    clarification = {
+        "next_question_id": "q2",
+        "accepted_answer": False,
+        "normalized_answer": None,
+        "assistant_message": "Who should answer, roughly?",
+    }
+    provider = ScenarioProvider(
+        call_plan=[
+            ("routing", decision),
+            ("routing", clarification),
+            ("routing", clarification),
+        ]
+    )
+    routes.get_vertex_provider = lambda: provider
+
+    def post(message: str, initial_message: str, goal: str) -> dict:
+        return client.post(
+            SURVEY_PATH,
+            json=build_payload(
+                message,
+                survey_state={
+                    "status": "in_progress",
+                    "initial_message": initial_message,
+                    "current_question_id": "q2",
+                    "awaiting_question_id": "q2",
+                    "answers": [{"question_id": "q1", "answer": goal}],
+                },
+            ),
+        ).json()
+
+    # The same reply to the same question hits, whoever sends it.
+    for message, initial_message, goal in (
+        ("  everyone ", "Survey please", "Goal A"),
+        ("Everyone", "Run a survey", "Goal B"),
+    ):
+        body = post(message, initial_message, goal)
+        assert body["ok"] is True
+        assert body["result"]["survey_state"]["current_question_id"] == "q3"
+        assert body["result"]["answers"][1]["answer"] == "Everyone."
+
+    # Clarifications are never cached.
+    for _ in range(2):
+        body = post("not sure yet", "Survey please", "Goal A")
+        assert body["result"]["agent_message"] == "Who should answer, roughly?"
+        assert body["result"]["survey_state"]["current_question_id"] == "q2"
+
+    assert provider.routing_call_count == 3
+    stats = client.get("/stats").json()["survey_routing_cache"]
+    assert stats["enabled"] is True
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+    routes.get_vertex_provider = original_provider
+    monkeypatch.delenv("ROUTING_CACHE_ENABLED")
+    reset_routing_cache()
+
+
+def test_fast_path_accepts_unambiguous_answers(monkeypatch) -> None:
+    monkeypatch.setenv("FAST_PATH_ENABLED", "true")
+    original_provider = routes.get_vertex_provider
+    provider = ScenarioProvider(
+        call_plan=[
+            (
+                "routing",
+                {
+                    "next_question_id": "q3",
+                    "accepted_answer": True,
+                    "normalized_answer": "Recently onboarded hires.",
+                    "assistant_message": "Captured.",
+                },
+            ),
+            (
+                "final",
+                {
+                    "summary": "Survey completed successfully.",
+                    "agent_message": "Thanks.",
+                },
+            ),
+        ]
+    )
+    routes.get_vertex_provider = lambda: provider
+    state = {
+        "status": "in_progress",
+        "initial_message": "<p>Hello @Agent please run survey</p>",
+        "current_question_id": "q2",
+        "awaiting_question_id": "q2",
+        "answers": [{"question_id": "q1", "answer": "Gather feedback."}],
+    }
+
+    # No audience keyword: the validator is unsure and the model decides.
+    response_1 = client.post(
+        SURVEY_PATH, json=build_payload("The folks who joined lately", state)
+    )
+    body_1 = response_1.json()
+    assert body_1["result"]["survey_state"]["current_question_id"] == "q3"
+    assert provider.routing_call_count == 1
+
+    # A plain date phrase is accepted locally and completes the survey.
+    response_2 = client.post(
+        SURVEY_PATH,
+        json=build_payload("Run it next Monday.", body_1["result"]["survey_state"]),
+    )
+    body_2 = response_2.json()
+    assert body_2["result"]["status"] == "completed"
+    assert body_2["result"]["answers"][2]["answer"] == "Next Monday"
+    assert provider.routing_call_count == 1
+    assert provider.final_call_count == 1
+    assert client.get("/stats").json()["survey_fast_path"]["accepted"] >= 1
+
+    routes.get_vertex_provider = original_provider
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_session_store_keeps_state_server_side(monkeypatch, tmp_path, backend) -> None:
+    monkeypatch.setenv("SESSION_STORE", backend)
+    monkeypatch.setenv("SESSION_SQLITE_PATH", str(tmp_path / "sessions.db"))
+    reset_session_store()
+    original_provider = routes.get_vertex_provider
+    provider = ScenarioProvider(
+        call_plan=[
+            (
+                "routing",
+                {
+                    "next_question_id": "q2",
+                    "accepted_answer": True,
+                    "normalized_answer": "Gather onboarding feedback.",
+                    "assistant_message": "Captured.",
+                },
+            )
+        ]
+    )
+    routes.get_vertex_provider = lambda: provider
+
+    body_1 = client.post(SURVEY_PATH, json=build_payload("Run a survey")).json()
+    session_id = body_1["result"]["session_id"]
+    assert session_id
+    assert body_1["result"]["survey_state"] is None
+
+    payload = build_payload("The goal is onboarding feedback.")
+    payload["session_id"] = session_id
+    body_2 = client.post(SURVEY_PATH, json=payload).json()
+    assert body_2["ok"] is True
+    assert body_2["result"]["session_id"] == session_id
+    assert body_2["result"]["survey_state"] is None
+    assert body_2["result"]["agent_message"] == "Who is the intended audience?"
+    assert body_2["result"]["answers"][0]["answer"] == "Gather onboarding feedback."
+
+    payload["session_id"] = "unknown"
+    body_3 = client.post(SURVEY_PATH, json=payload).json()
+    assert body_3["ok"] is False
+    assert body_3["error"]["code"] == "SESSION_NOT_FOUND"
+
+    routes.get_vertex_provider = original_provider
+    monkeypatch.delenv("SESSION_STORE")
+    reset_session_store()
+
+
+def test_session_id_is_rejected_without_a_session_store() -> None:
+    reset_session_store()
+    original_provider = routes.get_vertex_provider
+    routes.get_vertex_provider = lambda: ScenarioProvider(call_plan=[])
+    payload = build_payload("The goal is onboarding feedback.")
+    payload["session_id"] = "abc"
+    body = client.post(SURVEY_PATH, json=payload).json()
+    routes.get_vertex_provider = original_provider
+    assert body["ok"] is False
+    assert body["error"]["code"] == "SESSIONS_DISABLED"
+
+
+def test_state_token_round_trip(monkeypatch) -> None:
+    monkeypatch.setenv("SURVEY_STATE_FORMAT", "token")
+    monkeypatch.setenv("STATE_TOKEN_SECRET", "test-secret")
+    original_provider = routes.get_vertex_provider
+    provider = ScenarioProvider(
+        call_plan=[
+            (
+                "routing",
+                {
+                    "next_question_id": "q2",
+                    "accepted_answer": True,
+                    "normalized_answer": "Gather onboarding feedback.",
+                    "assistant_message": "Captured.",
+                },
+            )
+        ]
+    )
+    routes.get_vertex_provider = lambda: provider
+
+    body_1 = client.post(SURVEY_PATH, json=build_payload("Run a survey")).json()
+    token = body_1["result"]["state_token"]
+    assert token
+    assert body_1["result"]["survey_state"] is None
+
+    payload = build_payload("The goal is onboarding feedback.")
+    payload["state_token"] = token
+    body_2 = client.post(SURVEY_PATH, json=payload).json()
+    assert body_2["ok"] is True
+    assert body_2["result"]["answers"][0]["answer"] == "Gather onboarding feedback."
+    assert body_2["result"]["state_token"] != token
+    state_2 = decode_state_token(body_2["result"]["state_token"], b"test-secret")
+    assert state_2.turns == 2
+
+    payload["state_token"] = token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1]
+    body_3 = client.post(SURVEY_PATH, json=payload).json()
+    assert body_3["ok"] is False
+    assert body_3["error"]["code"] == "INVALID_STATE_TOKEN"
+
+    # A token older than the max age cannot be replayed to roll the survey back.
+    monkeypatch.setenv("STATE_TOKEN_MAX_AGE_SECONDS", "60")
+    payload["state_token"] = encode_state_token(
+        state_2, b"test-secret", issued_at=time.time() - 61
+    )
+    body_4 = client.post(SURVEY_PATH, json=payload).json()
+    assert body_4["error"]["code"] == "INVALID_STATE_TOKEN"
+
+    routes.get_vertex_provider = original_provider
+
+
+def test_response_schema_example_matches_the_response_model() -> None:
+    schema_path = Path(__file__).resolve().parents[1] / "schema" / "response.json"
+    examples = json.loads(schema_path.read_text(encoding="utf-8"))
+    success = SuccessResponse.model_validate(examples["success"])
+    ErrorResponse.model_validate(examples["error"])
+    assert set(examples["success"]["result"]) == set(Result.model_fields)
+    assert success.model_dump(mode="json") == examples["success"]
+
+
+def test_idempotent_retry_replays_response(monkeypatch) -> None:
+    monkeypatch.setenv("IDEMPOTENCY_ENABLED", "true")
+    reset_idempotency_cache()
+    original_provider = routes.get_vertex_provider
+    provider = ScenarioProvider(
+        call_plan=[
+            (
+                "routing",
+                {
+                    "next_question_id": "q2",
+                    "accepted_answer": True,
+                    "normalized_answer": "Gather onboarding feedback.",
+                    "assistant_message": "Captured.",
+                },
+            )
+        ]
+    )
+    routes.get_vertex_provider = lambda: provider
+    payload = build_payload(
+        "The goal is onboarding feedback.",
+        survey_state={
+            "status": "in_progress",
+            "initial_message": "Run a survey",
+            "current_question_id": "q1",
+            "awaiting_question_id": "q1",
+            "answers": [],
+        },
+    )
+
+    body_1 = client.post(SURVEY_PATH, json=payload).json()
+    body_2 = client.post(SURVEY_PATH, json=payload).json()
+    assert body_1["ok"] is True
+    assert body_2 == body_1
+    assert provider.routing_call_count == 1
+    assert client.get("/stats").json()["idempotency"]["replayed"] == 1
+
+    routes.get_vertex_provider = original_provider
+    monkeypatch.delenv("IDEMPOTENCY_ENABLED")
+    reset_idempotency_cache()
+
+
+def test_admission_rejects_over_budget_channel(monkeypatch) -> None:
+    monkeypatch.setenv("ADMISSION_ENABLED", "true")
+    monkeypatch.setenv("ADMISSION_RATE_PER_SECOND", "0.001")
+    monkeypatch.setenv("ADMISSION_BURST", "1")
+    reset_admission_controller()
+    original_provider = routes.get_vertex_provider
+    routes.get_vertex_provider = lambda: ScenarioProvider(
+        call_plan=[("initial", {"agent_message": "Hi! What is the survey goal?"})]
+    )
+
+    first = client.post(SURVEY_PATH, json=build_payload("Start a survey"))
+    second = client.post(SURVEY_PATH, json=build_payload("Start a survey"))
+    assert first.status_code == 200
+    assert first.json()["ok"] is True
+    assert second.status_code == 429
+    assert int(second.headers["Retry-After"]) >= 1
+    assert second.json()["ok"] is False
+    assert second.json()["error"]["code"] == "RATE_LIMITED"
+    assert client.get("/stats").json()["admission"]["rate_limited"] == 1
+
+    routes.get_vertex_provider = original_provider
+    monkeypatch.delenv("ADMISSION_ENABLED")
+    reset_admission_controller()
+
+
+def test_stream_releases_admission_when_client_disconnects(monkeypatch) -> None:
+    monkeypatch.setenv("ADMISSION_ENABLED", "true")
+    monkeypatch.setenv("ADMISSION_MAX_CONCURRENCY", "1")
+    reset_admission_controller()
+    request = SurveyRequest.model_validate(build_payload("Start a survey"))
+
+    async def disconnected(message: dict) -> None:
+        raise OSError("client went away")
+
+    async def receive() -> dict:
+        return {"type": "http.disconnect"}
+
+    async def scenario() -> None:
+        response = await routes._agent_stream(
+            request, None, f"{SURVEY_PATH}/stream", routes.SURVEY_AGENT.key
+        )
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        with pytest.raises(ClientDisconnect):
+            await response(scope, receive, disconnected)
+
+    asyncio.run(scenario())
+    assert client.get("/stats").json()["admission"]["active"] == 0
+
+    monkeypatch.delenv("ADMISSION_ENABLED")
+    reset_admission_controller()
+
+
+def test_tracing_exports_spans_to_jsonl(monkeypatch, tmp_path) -> None:
+    trace_path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv("TRACING_EXPORTER", "jsonl")
+    monkeypatch.setenv("TRACING_JSONL_PATH", str(trace_path))
+    reset_tracer()
+    original_provider = routes.get_vertex_provider
+    routes.get_vertex_provider = lambda: ScenarioProvider(
+        call_plan=[
+            (
+                "routing",
+                {
+                    "next_question_id": "q2",
+                    "accepted_answer": True,
+                    "normalized_answer": "Gather onboarding feedback.",
+                    "assistant_message": "Captured.",
+                },
+            )
+        ]
+    )
+    payload = build_payload(
+        "The goal is onboarding feedback.",
+        survey_state={
+            "status": "in_progress",
+            "initial_message": "Run a survey",
+            "current_question_id": "q1",
+            "awaiting_question_id": "q1",
+            "answers": [],
+        },
+    )
+
+    assert client.post(SURVEY_PATH, json=payload).json()["ok"] is True
+    get_tracer().flush()
+    spans = {
+        span["name"]: span
+        for span in map(json.loads, trace_path.read_text().splitlines())
+    }
+    root = spans["survey.request"]
+    assert root["trace_id"] == trace_id_for(payload["correlation_id"])
+    assert root["parent_span_id"] is None
+    assert spans["agent.run"]["parent_span_id"] == root["span_id"]
+    provider_span = spans["vertex.generate"]
+    assert provider_span["trace_id"] == root["trace_id"]
+    assert provider_span["attributes"]["model"] == "test-model"
+    assert provider_span["attributes"]["prompt_chars"] > 0
+    assert "survey.parse_routing_output" in spans
+
+    routes.get_vertex_provider = original_provider
+    monkeypatch.delenv("TRACING_EXPORTER")
+    reset_tracer()
+
+
+class StreamingProvider:
+    model_name = "test-model"
+
+    def __init__(self, chunks: list[str]) -> None:
+        self.chunks = chunks
+
+    async def agenerate(self, prompt: str) -> str:
+        return json.dumps(
+            {
+                "next_question_id": "END",
+                "accepted_answer": True,
+                "normalized_answer": "Next Monday.",
+                "assistant_message": "Captured.",
+            }
+        )
+
+    async def astream(self, prompt: str):
+        assert "---SUMMARY---" in prompt
+        for chunk in self.chunks:
+            yield chunk
+
+
+def parse_sse(text: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_final_summary() -> None:
+    original_provider = routes.get_vertex_provider
+    provider = StreamingProvider(
+        ["Thanks, I have ", "captured your responses.\n---SUM", "MARY---\nDone."]
+    )
+    routes.get_vertex_provider = lambda: provider
+    payload = build_payload(
+        "Run it next Monday.",
+        survey_state={
+            "status": "in_progress",
+            "initial_message": "Run a survey",
+            "current_question_id": "q3",
+            "awaiting_question_id": "q3",
+            "answers": [
+                {"question_id": "q1", "answer": "Gather feedback."},
+                {"question_id": "q2", "answer": "Leadership."},
+            ],
+        },
+    )
+
+    response = client.post(f"{SURVEY_PATH}/stream", json=payload)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    chunks = [data["text"] for name, data in events if name == "message_chunk"]
+    assert len(chunks) >= 2
+    assert "".join(chunks).strip() == "Thanks, I have captured your responses."
+    name, body = events[-1]
+    assert name == "result"
+    assert body["result"]["status"] == "completed"
+    assert body["result"]["summary"] == "Done."
+    assert body["result"]["agent_message"] == "Thanks, I have captured your responses."
+    assert body["meta"]["ttfb_ms"] is not None
+
+    routes.get_vertex_provider = original_provider
+
+
+class SlowProvider:
+    model_name = "test-model"
+
+    async def agenerate(self, prompt: str) -> str:
+        await asyncio.sleep(1)
+        return "{}"
+
+
+def test_request_deadline_from_header() -> None:
+    original_provider = routes.get_vertex_provider
+    routes.get_vertex_provider = lambda: SlowProvider()
+
+    response = client.post(
+        SURVEY_PATH,
+        json=build_payload(
+            "The goal is onboarding feedback.",
+            survey_state={
+                "status": "in_progress",
+                "initial_message": "Run a survey",
+                "current_question_id": "q1",
+                "awaiting_question_id": "q1",
+                "answers": [],
+            },
+        ),
+        headers={"X-Request-Timeout-Ms": "50"},
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ok"] is False
+    assert body["error"]["code"] == "DEADLINE_EXCEEDED"
+
+    routes.get_vertex_provider = original_provider
+
+
 def test_invalid_request() -> None:
     response = client.post(SURVEY_PATH, json={"source": "msteams"})
     assert response.status_code == 422
@@ -304,3 +937,56 @@ def test_provider_failure() -> None:
     assert body["error"]["code"] == "VERTEX_UNAVAILABLE"
 
     routes.get_vertex_provider = original_provider
+
+
+class UpstreamStatusError(Exception):
+    def __init__(self, code: int) -> None:
+        super().__init__(f"upstream returned {code}")
+        self.code = code
+
+
+class FlakyProvider(ScenarioProvider):
+    def __init__(self, failures: list[int], **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.failures = failures
+
+    def generate(self, prompt: str) -> str:
+        if self.failures:
+            raise UpstreamStatusError(self.failures.pop(0))
+        return super().generate(prompt)
+
+
+def test_transient_failures_are_retried(monkeypatch) -> None:
+    monkeypatch.setenv("RETRY_BASE_DELAY_MS", "1")
+    original_provider = routes.get_vertex_provider
+    routing = {
+        "next_question_id": "q2",
+        "accepted_answer": True,
+        "normalized_answer": "Gather onboarding feedback.",
+        "assistant_message": "Captured.",
+    }
+    payload = build_payload(
+        "The goal is onboarding feedback.",
+        survey_state={
+            "status": "in_progress",
+            "initial_message": "Run a survey",
+            "current_question_id": "q1",
+            "awaiting_question_id": "q1",
+            "answers": [],
+        },
+    )
+
+    provider = FlakyProvider([429, 503], call_plan=[("routing", routing)])
+    routes.get_vertex_provider = lambda: provider
+    body = client.post(SURVEY_PATH, json=payload).json()
+    assert body["ok"] is True
+    assert body["meta"]["retries"] == 2
+
+    provider = FlakyProvider([403], call_plan=[("routing", routing)])
+    routes.get_vertex_provider = lambda: provider
+    body = client.post(SURVEY_PATH, json=payload).json()
+    assert body["ok"] is False
+    assert body["error"]["code"] == "VERTEX_UNAVAILABLE"
+    assert provider.call_plan
+
+    routes.get_vertex_provider = original_provider
@@ -0,0 +1,355 @@
+import asyncio
+import json
+import sys
+from dataclasses import replace
+
+import pytest
+
+from src.core.admission import AdmissionController, AdmissionRejected
+from src.core.agent import (
+    AGENT_ENTRY_POINTS,
+    PATH_TO_AGENT_KEY,
+    AgentEntryPoint,
+    configure_agents,
+    decode_agent_state,
+    encode_agent_state,
+    preload_agents,
+    register_agent_entry_point,
+    register_agent_runner,
+    run_agent,
+    run_agent_async,
+)
+from src.core.cache import TTLCache
+from src.core.errors import CoreError
+from src.core.idempotency import IdempotencyCache
+from src.core.metrics import Counter, Histogram
+from src.core.models import AgentResult, CoreRequest
+from src.core.sessions import MemorySessionStore, SQLiteSessionStore
+
+
+def build_core_request() -> CoreRequest:
+    return CoreRequest(
+        source="msteams",
+        event_type="message_mentioned",
+        message_content="hello",
+        sender_name="Jane Doe",
+        mentions=[],
+        correlation_id="CORRELATION_ID",
+    )
+
+
+def build_result(summary: str) -> AgentResult:
+    return AgentResult(
+        summary=summary,
+        answers=[],
+        model="test-model",
+        latency_ms=0,
+        status="completed",
+        agent_message=summary,
+    )
+
+
+def test_sync_and_async_runners_share_dispatch() -> None:
+    def sync_runner(request: CoreRequest, provider: object) -> AgentResult:
+        return build_result("sync")
+
+    async def async_runner(request: CoreRequest, provider: object) -> AgentResult:
+        await asyncio.sleep(0)
+        return build_result("async")
+
+    register_agent_runner("test-sync", sync_runner)
+    register_agent_runner("test-async", async_runner)
+    request = build_core_request()
+
+    assert run_agent(request, None, agent_key="test-sync").summary == "sync"
+    assert run_agent(request, None, agent_key="test-async").summary == "async"
+    assert (
+        asyncio.run(run_agent_async(request, None, agent_key="test-sync")).summary
+        == "sync"
+    )
+    assert (
+        asyncio.run(run_agent_async(request, None, agent_key="test-async")).summary
+        == "async"
+    )
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_concurrent_turns_on_one_session_are_serialized(tmp_path, backend) -> None:
+    async def appending_runner(request: CoreRequest, provider: object) -> AgentResult:
+        messages = (request.agent_state or {}).get("messages", [])
+        await asyncio.sleep(0.01)
+        return replace(
+            build_result("appended"),
+            status="in_progress",
+            agent_state={"messages": [*messages, request.message_content]},
+        )
+
+    register_agent_runner("test-session", appending_runner)
+    store = (
+        MemorySessionStore(max_entries=8, ttl_seconds=60)
+        if backend == "memory"
+        else SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60)
+    )
+    store.save("s1", {"messages": []})
+
+    async def scenario() -> None:
+        await asyncio.gather(
+            *[
+                run_agent_async(
+                    replace(
+                        build_core_request(), message_content=text, session_id="s1"
+                    ),
+                    None,
+                    agent_key="test-session",
+                    session_store=store,
+                )
+                for text in ("first", "second")
+            ]
+        )
+
+    asyncio.run(scenario())
+    assert sorted(store.load("s1")["messages"]) == ["first", "second"]
+
+    # A save based on a state that is no longer current is rejected.
+    assert not store.save("s1", {"messages": ["stale"]}, expected={"messages": []})
+    assert sorted(store.load("s1")["messages"]) == ["first", "second"]
+
+
+def test_sqlite_session_store_sweeps_expired_rows_in_batches(tmp_path) -> None:
+    path = str(tmp_path / "sessions.db")
+    store = SQLiteSessionStore(path, ttl_seconds=-1, sweep_every_saves=3)
+    store.save("s1", {})
+    store.save("s2", {})
+    assert store.load("s1") is None
+    assert store.stats()["size"] == 2
+    store.save("s3", {})
+    assert store.stats()["size"] == 0
+    index_names = [
+        row[1]
+        for row in store._connection.execute("PRAGMA index_list(survey_sessions)")
+    ]
+    assert "survey_sessions_expires_at" in index_names
+
+
+def test_ttl_cache_expires_and_evicts() -> None:
+    now = [0.0]
+    cache: TTLCache[str] = TTLCache(
+        max_entries=2, ttl_seconds=10, clock=lambda: now[0]
+    )
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    now[0] = 11.0
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 2
+    assert stats.evictions == 1
+    assert stats.expirations == 1
+
+
+def test_idempotency_cache_coalesces_and_replays() -> None:
+    calls = []
+
+    async def compute() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return f"result-{len(calls)}"
+
+    async def failing() -> str:
+        raise RuntimeError("boom")
+
+    async def scenario() -> None:
+        cache: IdempotencyCache[str] = IdempotencyCache(
+            max_entries=8, ttl_seconds=60
+        )
+        results = await asyncio.gather(*[cache.run("key", compute) for _ in range(3)])
+        assert results == ["result-1"] * 3
+        assert await cache.run("key", compute) == "result-1"
+        assert len(calls) == 1
+
+        for _ in range(2):
+            try:
+                await cache.run("failing", failing)
+            except RuntimeError:
+                pass
+        stats = cache.stats()
+        assert stats["computed"] == 3
+        assert stats["coalesced"] == 2
+        assert stats["replayed"] == 1
+        assert stats["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_admission_rate_limits_and_bounds_queue() -> None:
+    now = [0.0]
+
+    async def scenario() -> None:
+        controller = AdmissionController(
+            rate_per_second=1,
+            burst=2,
+            max_concurrency=1,
+            max_queue=1,
+            max_wait_seconds=0.05,
+            clock=lambda: now[0],
+        )
+        await controller.acquire("team-a")
+        queued = asyncio.ensure_future(controller.acquire("team-a"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rate_limited:
+            await controller.acquire("team-a")
+        assert rate_limited.value.code == "RATE_LIMITED"
+        assert rate_limited.value.retry_after == 1.0
+
+        with pytest.raises(AdmissionRejected) as queue_full:
+            await controller.acquire("team-b")
+        assert queue_full.value.code == "OVERLOADED"
+
+        controller.release()
+        await queued
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await controller.acquire("team-c")
+        assert timed_out.value.code == "OVERLOADED"
+
+        controller.release()
+        stats = controller.stats()
+        assert stats["active"] == 0
+        assert stats["admitted"] == 2
+        assert stats["rate_limited"] == 1
+        assert stats["overloaded"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_metrics_render_prometheus_text() -> None:
+    histogram = Histogram("stage_seconds", "Stage time.", "stage", buckets=(0.1, 1))
+    histogram.observe("parse", 0.05)
+    histogram.observe("parse", 0.5)
+    histogram.observe("parse", 5)
+    counter = Counter("errors_total", "Errors.", "code")
+    counter.inc('BAD "CODE"')
+
+    assert histogram.render() == [
+        "# HELP stage_seconds Stage time.",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="parse",le="0.1"} 1',
+        'stage_seconds_bucket{stage="parse",le="1.0"} 2',
+        'stage_seconds_bucket{stage="parse",le="+Inf"} 3',
+        'stage_seconds_sum{stage="parse"} 5.55',
+        'stage_seconds_count{stage="parse"} 3',
+    ]
+    assert counter.render()[-1] == 'errors_total{code="BAD \\"CODE\\""} 1.0'
+
+
+def test_agents_from_config_are_imported_on_first_use(monkeypatch, tmp_path) -> None:
+    for name in ("lazy_agent_one", "lazy_agent_two"):
+        (tmp_path / f"{name}.py").write_text(
+            "from tests.test_core import build_result\n"
+            "def run(request, provider):\n"
+            f"    return build_result(request.catalog_path or {name!r})\n",
+            encoding="utf-8",
+        )
+    config = tmp_path / "agents.json"
+    config.write_text(
+        json.dumps(
+            {
+                "agents": {
+                    "one": {
+                        "key": "lazy-one",
+                        "runner": "lazy_agent_one:run",
+                        "catalog": "one.yaml",
+                    },
+                    "/two": {"key": "lazy-two", "runner": "lazy_agent_two:run"},
+                }
+            }
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("AGENTS_CONFIG_PATH", str(config))
+    monkeypatch.setenv("AGENTS_PRELOAD", "lazy-two")
+    default = AgentEntryPoint(key="unused", path="/unused", runner="x:y")
+
+    try:
+        entries = configure_agents(default)
+        assert [(e.path, e.preload) for e in entries] == [
+            ("/one", False),
+            ("/two", True),
+        ]
+        assert PATH_TO_AGENT_KEY["/one"] == "lazy-one"
+        assert "lazy_agent_one" not in sys.modules
+
+        assert list(preload_agents()) == ["lazy-two"]
+        assert "lazy_agent_two" in sys.modules
+        assert "lazy_agent_one" not in sys.modules
+
+        result = run_agent(build_core_request(), None, agent_key="lazy-one")
+        assert result.summary == "one.yaml"
+        result = run_agent(build_core_request(), None, agent_key="lazy-two")
+        assert result.summary == "lazy_agent_two"
+
+        config.write_text(json.dumps({"agents": {"/x": {}}}), encoding="utf-8")
+        with pytest.raises(ValueError):
+            configure_agents(default)
+    finally:
+        for key, path in (("lazy-one", "/one"), ("lazy-two", "/two")):
+            AGENT_ENTRY_POINTS.pop(key, None)
+            PATH_TO_AGENT_KEY.pop(path, None)
+        for name in ("lazy_agent_one", "lazy_agent_two"):
+            sys.modules.pop(name, None)
+
+
+def test_agents_without_state_hooks_get_survey_state_as_a_dict() -> None:
+    from src.agents.survey_agent.models import SurveyState as AgentSurveyState
+    from src.api.schemas import SurveyState
+
+    async def reading_runner(request: CoreRequest, provider: object) -> AgentResult:
+        return replace(
+            build_result(request.agent_state.get("initial_message")),
+            status="in_progress",
+            agent_state=request.agent_state,
+        )
+
+    register_agent_runner("test-plain-state", reading_runner)
+    survey_state = SurveyState(status="in_progress", initial_message="hi")
+
+    agent_state = decode_agent_state("test-plain-state", survey_state, None)
+    assert agent_state == survey_state.model_dump()
+    result = asyncio.run(
+        run_agent_async(
+            replace(build_core_request(), agent_state=agent_state),
+            None,
+            agent_key="test-plain-state",
+        )
+    )
+    assert result.summary == "hi"
+    assert encode_agent_state("test-plain-state", result.agent_state) == (
+        agent_state,
+        None,
+    )
+    with pytest.raises(CoreError) as excinfo:
+        decode_agent_state("test-plain-state", None, "token")
+    assert excinfo.value.code == "INVALID_STATE_TOKEN"
+
+    # The survey agent's hooks build its own state object.
+    register_agent_entry_point(
+        AgentEntryPoint(
+            key="test-survey-state",
+            path="/test-survey-state",
+            runner="src.agents.survey_agent:run_survey_agent",
+            decode_state="src.agents.survey_agent:decode_survey_state",
+            encode_state="src.agents.survey_agent:encode_survey_state",
+        )
+    )
+    try:
+        decoded = decode_agent_state("test-survey-state", survey_state, None)
+        assert isinstance(decoded, AgentSurveyState)
+        assert decoded.initial_message == "hi"
+    finally:
+        AGENT_ENTRY_POINTS.pop("test-survey-state", None)
+        PATH_TO_AGENT_KEY.pop("/test-survey-state", None)
@@ -0,0 +1,386 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.vertex_standin import FaultConfig, VertexStandIn
+from src.agents.survey_agent.prompts import (
+    ROUTING_OUTPUT_SCHEMA,
+    ROUTING_PROMPT_PREFIX,
+    build_final_stream_prompt,
+    build_routing_prompt,
+)
+from src.providers import pool as pool_module
+from src.providers.context_cache import (
+    ContextCache,
+    ContextCachePolicy,
+    cacheable_prefix,
+)
+from src.providers.failover import (
+    BreakerPolicy,
+    CircuitBreaker,
+    FailoverProvider,
+    RegionalProvider,
+)
+from src.providers.hedging import Hedger
+from src.providers.retry import (
+    RetryCounter,
+    RetryPolicy,
+    backoff_delay,
+    call_with_retry,
+    is_retryable,
+    retry_after_seconds,
+)
+from src.providers.pool import ProviderPool
+from src.providers.structured import response_schema
+from src.providers.vertex_ai import VertexAIProvider
+
+
+class FakeVertexAIProvider:
+    def __init__(self, model_name: str, project: str, location: str, **_) -> None:
+        self.model_name = model_name
+        self.location = location
+
+
+def test_provider_pool_reuses_and_rebuilds_on_config_change(monkeypatch) -> None:
+    monkeypatch.setattr(pool_module, "VertexAIProvider", FakeVertexAIProvider)
+    pool = ProviderPool(max_size=1)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        providers = list(
+            executor.map(
+                lambda _: pool.get("model-a", "project", "us-central1"), range(32)
+            )
+        )
+    assert all(provider is providers[0] for provider in providers)
+
+    rebuilt = pool.get("model-a", "project", "europe-west4")
+    assert rebuilt is not providers[0]
+    assert rebuilt.location == "europe-west4"
+
+    stats = pool.stats()
+    assert stats.builds == 2
+    assert stats.hits == 31
+    assert stats.evictions == 1
+    assert stats.size == 1
+
+
+def test_hedger_sends_second_attempt_after_slow_primary() -> None:
+    delays = [0.001, 1.0, 0.001]
+
+    async def attempt() -> str:
+        delay = delays.pop(0)
+        await asyncio.sleep(delay)
+        return f"slept {delay}"
+
+    async def scenario() -> None:
+        hedger = Hedger(percentile=95, min_delay_seconds=0.02, min_samples=1)
+        assert await hedger.call(attempt) == "slept 0.001"
+        assert await hedger.call(attempt) == "slept 0.001"
+
+        stats = hedger.stats()
+        assert stats["calls"] == 2
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+
+    asyncio.run(scenario())
+
+
+class RegionProvider:
+    model_name = "model-a"
+
+    def __init__(
+        self, name: str, healthy: bool = True, error: Exception | None = None
+    ) -> None:
+        self.name = name
+        self.healthy = healthy
+        self.error = error or ConnectionError(f"{name} unavailable")
+        self.calls = 0
+
+    def generate(self, prompt: str) -> str:
+        self.calls += 1
+        if not self.healthy:
+            raise self.error
+        return self.name
+
+
+def test_failover_skips_region_with_open_breaker() -> None:
+    now = [0.0]
+    policy = BreakerPolicy(error_rate=0.5, min_calls=2, window=4, open_seconds=10)
+    primary = RegionProvider("us-central1", healthy=False)
+    secondary = RegionProvider("europe-west4")
+    failover = FailoverProvider(
+        [
+            RegionalProvider(
+                provider.name, provider, CircuitBreaker(policy, lambda: now[0])
+            )
+            for provider in (primary, secondary)
+        ]
+    )
+    # Equal (unmeasured) latency keeps configuration order, so primary goes first.
+    failover._regions[1].breaker.ewma_latency_ms = 5.0
+
+    assert asyncio.run(failover.agenerate("prompt")) == "europe-west4"
+    assert asyncio.run(failover.agenerate("prompt")) == "europe-west4"
+    assert failover.stats()["us-central1"]["state"] == "open"
+
+    assert asyncio.run(failover.agenerate("prompt")) == "europe-west4"
+    assert primary.calls == 2
+
+    # After the open period a single probe is let through and closes the breaker.
+    now[0] = 11.0
+    primary.healthy = True
+    assert asyncio.run(failover.agenerate("prompt")) == "us-central1"
+    assert failover.stats()["us-central1"]["state"] == "closed"
+
+
+def test_failover_raises_last_error_when_all_regions_fail() -> None:
+    policy = BreakerPolicy()
+    failover = FailoverProvider(
+        [
+            RegionalProvider(
+                name, RegionProvider(name, healthy=False), CircuitBreaker(policy)
+            )
+            for name in ("us-central1", "europe-west4")
+        ]
+    )
+    with pytest.raises(ConnectionError, match="europe-west4"):
+        failover.generate("prompt")
+
+
+def test_failover_probes_fastest_region_when_every_breaker_is_open() -> None:
+    now = [0.0]
+    policy = BreakerPolicy(error_rate=0.5, min_calls=1, window=4, open_seconds=10)
+    providers = [RegionProvider(name) for name in ("us-central1", "europe-west4")]
+    failover = FailoverProvider(
+        [
+            RegionalProvider(
+                provider.name, provider, CircuitBreaker(policy, lambda: now[0])
+            )
+            for provider in providers
+        ]
+    )
+    for region in failover._regions:
+        region.breaker.record_failure()
+    assert failover.stats()["us-central1"]["state"] == "open"
+
+    # A failed fallback call re-opens the region like any failed probe.
+    providers[0].healthy = False
+    now[0] = 5.0
+    with pytest.raises(ConnectionError):
+        failover.generate("prompt")
+    assert failover.stats()["us-central1"]["state"] == "open"
+
+    # A successful one closes it, well before the open period has elapsed.
+    providers[0].healthy = True
+    now[0] = 6.0
+    assert failover.generate("prompt") == "us-central1"
+    assert failover.stats()["us-central1"]["state"] == "closed"
+    assert failover.stats()["europe-west4"]["state"] == "open"
+
+
+def test_failover_raises_request_errors_without_touching_breakers() -> None:
+    policy = BreakerPolicy(error_rate=0.5, min_calls=1, window=4)
+    primary = RegionProvider("us-central1", healthy=False, error=FakeAPIError(400))
+    secondary = RegionProvider("europe-west4")
+    failover = FailoverProvider(
+        [
+            RegionalProvider(provider.name, provider, CircuitBreaker(policy))
+            for provider in (primary, secondary)
+        ]
+    )
+
+    for _ in range(3):
+        with pytest.raises(FakeAPIError):
+            asyncio.run(failover.agenerate("prompt"))
+
+    assert secondary.calls == 0
+    assert failover.stats()["us-central1"]["failures"] == 0
+    assert failover.stats()["us-central1"]["state"] == "closed"
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict) -> None:
+        self.status_code = status_code
+        self.headers = headers
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code: int, headers: dict | None = None) -> None:
+        super().__init__(f"status {status_code}")
+        self.response = FakeResponse(status_code, headers or {})
+
+
+def test_retry_classification_and_backoff() -> None:
+    try:
+        try:
+            raise FakeAPIError(503, {"retry-after": "2"})
+        except FakeAPIError as cause:
+            raise RuntimeError("wrapped by the SDK") from cause
+    except RuntimeError as wrapped:
+        assert is_retryable(wrapped)
+        assert retry_after_seconds(wrapped) == 2.0
+
+    assert is_retryable(FakeAPIError(429))
+    assert not is_retryable(FakeAPIError(401))
+    assert not is_retryable(ValueError("bad prompt"))
+    assert is_retryable(ConnectionResetError())
+
+    policy = RetryPolicy(max_attempts=5, base_delay_seconds=0.1, max_delay_seconds=1)
+    assert backoff_delay(policy, 1, rand=lambda: 1.0) == 0.1
+    assert backoff_delay(policy, 10, rand=lambda: 1.0) == 1
+    assert backoff_delay(policy, 1, retry_after=3.0, rand=lambda: 0.5) == 3.0
+
+
+def test_call_with_retry_stops_at_deadline() -> None:
+    attempts = []
+
+    async def attempt() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise FakeAPIError(503)
+        return "ok"
+
+    async def throttled() -> str:
+        attempts.append(1)
+        raise FakeAPIError(429, {"retry-after": "30"})
+
+    async def scenario() -> None:
+        policy = RetryPolicy(max_attempts=3, base_delay_seconds=0.001)
+        counter = RetryCounter()
+        assert await call_with_retry(attempt, policy, counter=counter) == "ok"
+        assert counter.retries == 2
+
+        attempts.clear()
+        deadline = time.monotonic() + 1
+        with pytest.raises(FakeAPIError):
+            await call_with_retry(throttled, policy, deadline)
+        assert len(attempts) == 1
+
+    asyncio.run(scenario())
+
+
+def test_vertex_provider_against_local_standin() -> None:
+    routing_prompt = build_routing_prompt(
+        "init", "Jane", "Goal?", "q1", "Gather feedback", [], ["q1", "q2", "END"]
+    )
+    stream_prompt = build_final_stream_prompt("init", "Jane", [])
+
+    async def scenario(provider: VertexAIProvider, standin: VertexStandIn) -> None:
+        routed = json.loads(await provider.agenerate(routing_prompt))
+        assert routed["next_question_id"] == "q2"
+        chunks = [chunk async for chunk in provider.astream(stream_prompt)]
+        assert len(chunks) > 1
+
+        standin.set_faults(
+            burst_code=429, burst_length=1, burst_period=100, retry_after_seconds=2
+        )
+        with pytest.raises(Exception) as raised:
+            await provider.agenerate(routing_prompt)
+        assert is_retryable(raised.value)
+        assert retry_after_seconds(raised.value) == 2.0
+        assert json.loads(await provider.agenerate(routing_prompt))
+
+    faults = FaultConfig(stream_chunk_chars=16, fenced_rate=1.0)
+    with VertexStandIn(faults) as standin:
+        provider = VertexAIProvider(
+            "stand-in-model",
+            "project",
+            "us-central1",
+            base_url=standin.url,
+            access_token="local",
+            structured_output=True,
+        )
+        asyncio.run(scenario(provider, standin))
+        assert standin.counters["errors"] == 1
+        # Schema-constrained requests never get fenced answers.
+        assert standin.counters["fenced"] == 0
+
+
+def test_context_cache_reuses_refreshes_and_backs_off() -> None:
+    now = [0.0]
+    created: list[str] = []
+    failing = [False]
+
+    async def create(prefix: str, ttl_seconds: float) -> str:
+        if failing[0]:
+            raise FakeAPIError(503)
+        created.append(prefix)
+        return f"cachedContents/{len(created)}"
+
+    policy = ContextCachePolicy(
+        ttl_seconds=100,
+        refresh_seconds=10,
+        min_prefix_chars=4,
+        failure_backoff_seconds=30,
+    )
+    cache = ContextCache(create, policy, clock=lambda: now[0])
+
+    async def scenario() -> None:
+        assert await cache.handle("abc") is None  # below the minimum size
+        assert await cache.handle("prefix") == "cachedContents/1"
+        now[0] = 50
+        assert await cache.handle("prefix") == "cachedContents/1"
+        now[0] = 95  # inside the refresh margin
+        assert await cache.handle("prefix") == "cachedContents/2"
+
+        failing[0] = True
+        now[0] = 190
+        assert await cache.handle("prefix") == "cachedContents/2"
+        failing[0] = False
+        now[0] = 200  # expired, but creation is still backing off
+        assert await cache.handle("prefix") is None
+        now[0] = 221
+        assert await cache.handle("prefix") == "cachedContents/3"
+        cache.invalidate("prefix", "cachedContents/3")
+        assert await cache.handle("prefix") == "cachedContents/4"
+
+    asyncio.run(scenario())
+    assert cache.stats() == {
+        "handles": 1,
+        "hits": 1,
+        "misses": 1,
+        "creates": 2,
+        "refreshes": 2,
+        "failures": 1,
+        "invalidations": 1,
+        "too_short": 1,
+    }
+
+
+def test_vertex_provider_caches_prompt_prefix_on_standin() -> None:
+    prompt = build_routing_prompt(
+        "init", "Jane", "Goal?", "q1", "Gather feedback", [], ["q1", "q2", "END"]
+    )
+    assert cacheable_prefix(prompt) == ROUTING_PROMPT_PREFIX
+    assert cacheable_prefix(str(prompt)) is None
+    assert response_schema(prompt) == ROUTING_OUTPUT_SCHEMA
+    assert response_schema(str(prompt)) is None
+
+    with VertexStandIn() as standin:
+        provider = VertexAIProvider(
+            "stand-in-model",
+            "project",
+            "us-central1",
+            base_url=standin.url,
+            access_token="local",
+            cache_policy=ContextCachePolicy(min_prefix_chars=0),
+        )
+
+        async def scenario() -> None:
+            for _ in range(2):
+                assert json.loads(await provider.agenerate(prompt))
+            standin.expire_caches()
+            # The stale handle is dropped and the prompt is sent inline.
+            assert json.loads(await provider.agenerate(prompt))
+            assert json.loads(await provider.agenerate(prompt))
+
+        asyncio.run(scenario())
+        counters = standin.counters
+
+    assert counters["cache_creates"] == 2
+    assert counters["cache_hits"] == 3
+    assert counters["cache_misses"] == 1
+    assert provider.context_cache.stats()["invalidations"] == 1